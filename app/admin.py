@@ -0,0 +1,26 @@
+"""
+Admin access for operational endpoints (profiling, memory diagnostics).
+
+Admins are the users whose email is listed in ADMIN_EMAILS (comma
+separated). With ADMIN_EMAILS unset nobody is an admin and every admin
+endpoint answers 403.
+"""
+import os
+
+from fastapi import Depends, HTTPException, status
+
+from app import security
+
+ADMIN_EMAILS = frozenset(
+    email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()
+)
+
+
+def require_admin(current_user_email: str = Depends(security.get_current_user_email)) -> str:
+    """Dependency: the authenticated user's email, if they are an admin"""
+    if current_user_email.lower() not in ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+    return current_user_email
@@ -0,0 +1,161 @@
+"""
+Admission control and load shedding.
+
+Every request is put in a route class before it reaches the app:
+
+- "auth": login and registration (CPU-bound password hashing)
+- "read": GET and HEAD
+- "write": everything else
+
+Each class has its own AdmissionGate. Up to `limit` requests of the class run
+at once, and up to `queue` more wait in FIFO order for a free slot. A request
+that finds the queue full, or is still waiting after `timeout` seconds, is
+answered 503 with a Retry-After header straight away. It never reaches the
+threadpool or the database, so an overload turns into fast rejections instead
+of every request timing out, and the requests that are admitted keep their
+normal latency.
+
+Health checks and scrapes (EXEMPT_PATHS) bypass the gates, so they answer
+even at full load. So do long-lived event streams (STREAM_PATHS), which would
+otherwise hold a read slot for as long as they are open; EventHub caps them.
+The limits come from ADMISSION_<CLASS>_LIMIT, ADMISSION_<CLASS>_QUEUE and
+ADMISSION_<CLASS>_TIMEOUT.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+
+from app.metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_WAIT, ADMISSION_QUEUED, ADMISSION_SHED
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+
+EXEMPT_PATHS = frozenset({"/health", "/metrics"})
+STREAM_PATHS = frozenset({"/api/calculations/events"})
+AUTH_PATHS = frozenset({"/login", "/register", "/users/login", "/users/register"})
+
+# Defaults per class: (limit, queue, timeout seconds)
+_DEFAULTS = {
+    "auth": (8, 16, 2.0),
+    "read": (64, 128, 1.0),
+    "write": (32, 64, 2.0),
+}
+
+
+def route_class(method: str, path: str) -> str | None:
+    """Class of a request, or None when it bypasses admission control"""
+    if path in EXEMPT_PATHS or path in STREAM_PATHS or path.startswith("/static/"):
+        return None
+    if path in AUTH_PATHS:
+        return "auth"
+    if method in ("GET", "HEAD"):
+        return "read"
+    return "write"
+
+
+class _Waiter:
+    __slots__ = ("future", "granted")
+
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+        self.granted = False
+
+
+class AdmissionGate:
+    """
+    Concurrency limit with a bounded, deadline-limited FIFO queue.
+
+    Args:
+        name: Route class, used as the metrics label
+        limit: Requests allowed to run at once
+        queue: Requests allowed to wait for a slot
+        timeout: Longest a request may wait before it is shed
+    """
+
+    def __init__(self, name: str, limit: int, queue: int, timeout: float):
+        self.name = name
+        self.limit = limit
+        self.queue = queue
+        self.timeout = timeout
+        self.in_flight = 0
+        self._waiters: deque[_Waiter] = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> str | None:
+        """
+        Wait for a slot.
+
+        Returns:
+            None once admitted, otherwise why the request is shed: "queue_full" or "timeout"
+        """
+        with self._lock:
+            if self.in_flight < self.limit and not self._waiters:
+                self.in_flight += 1
+                ADMISSION_IN_FLIGHT.set(self.in_flight, self.name)
+                return None
+            if len(self._waiters) >= self.queue:
+                ADMISSION_SHED.inc(self.name, "queue_full")
+                return "queue_full"
+            waiter = _Waiter(asyncio.get_running_loop().create_future())
+            self._waiters.append(waiter)
+            ADMISSION_QUEUED.set(len(self._waiters), self.name)
+
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter.future, self.timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            with self._lock:
+                granted = waiter.granted
+                if not granted:
+                    self._waiters.remove(waiter)
+                    ADMISSION_QUEUED.set(len(self._waiters), self.name)
+            if isinstance(exc, asyncio.CancelledError):
+                if granted:
+                    self.release()
+                raise
+            if not granted:
+                ADMISSION_SHED.inc(self.name, "timeout")
+                return "timeout"
+            # The slot was handed over just as the deadline passed; keep it
+        ADMISSION_QUEUE_WAIT.observe(time.perf_counter() - started, self.name)
+        return None
+
+    def release(self) -> None:
+        """Hand the slot to the oldest waiter, or free it"""
+        with self._lock:
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                ADMISSION_QUEUED.set(len(self._waiters), self.name)
+                waiter.future.get_loop().call_soon_threadsafe(_wake, waiter.future)
+                return
+            self.in_flight -= 1
+            ADMISSION_IN_FLIGHT.set(self.in_flight, self.name)
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+def _setting(route_class: str, name: str, default):
+    return type(default)(os.getenv(f"ADMISSION_{route_class.upper()}_{name}", str(default)))
+
+
+def build_gates() -> dict[str, AdmissionGate]:
+    """One gate per route class, configured from the environment"""
+    gates = {}
+    for name, (limit, queue, timeout) in _DEFAULTS.items():
+        gates[name] = AdmissionGate(
+            name,
+            limit=_setting(name, "LIMIT", limit),
+            queue=_setting(name, "QUEUE", queue),
+            timeout=_setting(name, "TIMEOUT", timeout),
+        )
+    return gates
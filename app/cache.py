@@ -0,0 +1,284 @@
+"""
+Per-user cache of serialized calculation reads.
+
+Entries hold the exact JSON bytes a read endpoint would send, keyed by user
+and resource. Every entry also records the user's calc_version at the time it
+was built; lookups pass the current version, so an entry filled by a read that
+raced a write can never be served. crud writes additionally invalidate the
+user's entries so memory is released straight away.
+
+Backends:
+    memory  per-process LRU with TTL and a byte cap (default)
+    sqlite  file on local disk shared by every worker on the host
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from app.metrics import CALC_CACHE_EVICTIONS, CALC_CACHE_INVALIDATIONS, CALC_CACHE_LOOKUPS
+
+CALC_CACHE_BACKEND = os.getenv("CALC_CACHE_BACKEND", "memory")
+CALC_CACHE_PATH = os.getenv("CALC_CACHE_PATH", "./calc_cache.db")
+CALC_CACHE_TTL = float(os.getenv("CALC_CACHE_TTL", "300"))
+CALC_CACHE_MAX_BYTES = int(os.getenv("CALC_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class MemoryBackend:
+    """In-process LRU keyed by (user_id, key) with TTL and a total byte cap"""
+
+    def __init__(self, ttl: float = CALC_CACHE_TTL, max_bytes: int = CALC_CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple, tuple[int, float, bytes]] = OrderedDict()
+        self._user_keys: dict[int, set[str]] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int, key: str) -> tuple[int, bytes] | None:
+        with self._lock:
+            entry = self._entries.get((user_id, key))
+            if entry is None:
+                return None
+            version, expires, value = entry
+            if expires < time.monotonic():
+                self._pop((user_id, key))
+                return None
+            self._entries.move_to_end((user_id, key))
+            return version, value
+
+    def set(self, user_id: int, key: str, version: int, value: bytes) -> int:
+        """Store an entry and return how many entries were evicted to fit it"""
+        if len(value) > self.max_bytes:
+            return 0
+        evicted = 0
+        with self._lock:
+            self._pop((user_id, key))
+            self._entries[(user_id, key)] = (version, time.monotonic() + self.ttl, value)
+            self._user_keys.setdefault(user_id, set()).add(key)
+            self._size += len(value)
+            while self._size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._pop(oldest)
+                evicted += 1
+        return evicted
+
+    def delete_user(self, user_id: int) -> None:
+        with self._lock:
+            for key in list(self._user_keys.get(user_id, ())):
+                self._pop((user_id, key))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._user_keys.clear()
+            self._size = 0
+
+    def _pop(self, entry_key: tuple) -> None:
+        entry = self._entries.pop(entry_key, None)
+        if entry is None:
+            return
+        self._size -= len(entry[2])
+        user_id, key = entry_key
+        keys = self._user_keys[user_id]
+        keys.discard(key)
+        if not keys:
+            del self._user_keys[user_id]
+
+
+class SQLiteBackend:
+    """
+    Cache table in a local SQLite file so several worker processes share it.
+
+    Same semantics as MemoryBackend; LRU order is tracked with a last-access
+    timestamp and the byte cap is enforced on write. The total size of all
+    values is kept in the one-row calc_cache_meta table, updated in the same
+    transaction as every write, so enforcing the cap never scans the table.
+    """
+
+    def __init__(self, path: str = CALC_CACHE_PATH, ttl: float = CALC_CACHE_TTL, max_bytes: int = CALC_CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS calc_cache ("
+            " user_id INTEGER NOT NULL, key TEXT NOT NULL, version INTEGER NOT NULL,"
+            " expires REAL NOT NULL, accessed REAL NOT NULL, value BLOB NOT NULL,"
+            " PRIMARY KEY (user_id, key))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_calc_cache_accessed ON calc_cache (accessed)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS calc_cache_meta (id INTEGER PRIMARY KEY CHECK (id = 1), bytes INTEGER NOT NULL)"
+        )
+        # Seeds the total for a cache file created before the meta table existed
+        self._conn.execute(
+            "INSERT OR IGNORE INTO calc_cache_meta VALUES (1, (SELECT COALESCE(SUM(LENGTH(value)), 0) FROM calc_cache))"
+        )
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int, key: str) -> tuple[int, bytes] | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version, expires, value FROM calc_cache WHERE user_id = ? AND key = ?",
+                (user_id, key),
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                with self._transaction():
+                    self._delete(user_id, key)
+                return None
+            self._conn.execute(
+                "UPDATE calc_cache SET accessed = ? WHERE user_id = ? AND key = ?",
+                (now, user_id, key),
+            )
+            return row[0], row[2]
+
+    def set(self, user_id: int, key: str, version: int, value: bytes) -> int:
+        if len(value) > self.max_bytes:
+            return 0
+        now = time.time()
+        evicted = 0
+        with self._lock, self._transaction():
+            self._delete(user_id, key)
+            self._conn.execute(
+                "INSERT INTO calc_cache VALUES (?, ?, ?, ?, ?, ?)",
+                (user_id, key, version, now + self.ttl, now, value),
+            )
+            size = self._add_bytes(len(value))
+            while size > self.max_bytes:
+                oldest = self._conn.execute(
+                    "SELECT user_id, key FROM calc_cache ORDER BY accessed LIMIT 1"
+                ).fetchone()
+                self._delete(*oldest)
+                size = self._bytes()
+                evicted += 1
+        return evicted
+
+    def delete_user(self, user_id: int) -> None:
+        with self._lock, self._transaction():
+            removed = self._conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(value)), 0) FROM calc_cache WHERE user_id = ?", (user_id,)
+            ).fetchone()[0]
+            self._conn.execute("DELETE FROM calc_cache WHERE user_id = ?", (user_id,))
+            self._add_bytes(-removed)
+
+    def clear(self) -> None:
+        with self._lock, self._transaction():
+            self._conn.execute("DELETE FROM calc_cache")
+            self._conn.execute("UPDATE calc_cache_meta SET bytes = 0")
+
+    @contextmanager
+    def _transaction(self):
+        # IMMEDIATE takes the write lock up front, so the running total stays
+        # consistent with the rows when several processes share the file
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _delete(self, user_id: int, key: str) -> None:
+        row = self._conn.execute(
+            "DELETE FROM calc_cache WHERE user_id = ? AND key = ? RETURNING LENGTH(value)", (user_id, key)
+        ).fetchone()
+        if row is not None:
+            self._add_bytes(-row[0])
+
+    def _add_bytes(self, delta: int) -> int:
+        return self._conn.execute(
+            "UPDATE calc_cache_meta SET bytes = bytes + ? RETURNING bytes", (delta,)
+        ).fetchone()[0]
+
+    def _bytes(self) -> int:
+        return self._conn.execute("SELECT bytes FROM calc_cache_meta").fetchone()[0]
+
+
+class CalculationCache:
+    """
+    Serialized per-user calculation reads with hit-rate statistics.
+
+    The statistics are also exported as calc_cache_* counters on /metrics.
+
+    Keys are "list:" for the calculation list and "calc:<id>" for single
+    calculations.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.stats = CacheStats()
+
+    @staticmethod
+    def list_key() -> str:
+        """
+        The list endpoint takes no query parameters, so it has one key. Keying
+        on the raw query string would let ignored or reordered parameters
+        (?_=<timestamp> cache-busters) fill the cache with duplicates; a
+        parameter the endpoint starts accepting must be added here normalized.
+        """
+        return "list:"
+
+    @staticmethod
+    def calc_key(calc_id: int) -> str:
+        return f"calc:{calc_id}"
+
+    def get(self, user_id: int, key: str, version: int) -> bytes | None:
+        """Return cached bytes if present and built at the given calc_version"""
+        entry = self.backend.get(user_id, key)
+        if entry is None or entry[0] != version:
+            self.stats.misses += 1
+            CALC_CACHE_LOOKUPS.inc("miss")
+            return None
+        self.stats.hits += 1
+        CALC_CACHE_LOOKUPS.inc("hit")
+        return entry[1]
+
+    def set(self, user_id: int, key: str, version: int, value: bytes) -> None:
+        evicted = self.backend.set(user_id, key, version, value)
+        if evicted:
+            self.stats.evictions += evicted
+            CALC_CACHE_EVICTIONS.inc(amount=evicted)
+
+    def invalidate(self, user_id: int | None) -> None:
+        """
+        Drop a user's entries after a write. Every write bumps the user's
+        calc_version, so all of them are stale; other users are untouched.
+        """
+        if user_id is None:
+            return
+        self.stats.invalidations += 1
+        CALC_CACHE_INVALIDATIONS.inc()
+        self.backend.delete_user(user_id)
+
+    def clear(self) -> None:
+        self.backend.clear()
+        self.stats = CacheStats()
+
+
+def _backend_from_env():
+    if CALC_CACHE_BACKEND == "sqlite":
+        return SQLiteBackend(CALC_CACHE_PATH)
+    return MemoryBackend()
+
+
+calculation_cache = CalculationCache(_backend_from_env())
@@ -1,7 +1,17 @@
+import numpy as np
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
-from . import models, schemas, security
+from . import models, schemas, security, timing
+from .cache import calculation_cache
+from .events import RESET, event_hub
+from .schemas.calculation import calculate_result
+from .services import group_commit
+from .services.graph import CycleError, DependencyGraph, FanOutError
+from .services.reductions import OPERAND_DTYPE, is_array_type, reduce_operands, unpack_operands
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
+from pydantic import ValidationError
 
 
 def _to_dict(pydantic_obj, **kwargs) -> dict:
@@ -46,7 +56,8 @@ def get_user_by_username(db: Session, username: str) -> models.User | None:
 
 def get_user_by_email(db: Session, email: str) -> models.User | None:
     """Get user by email address"""
-    return db.query(models.User).filter(models.User.email == email).first()
+    with timing.phase("user"):
+        return db.query(models.User).filter(models.User.email == email).first()
 
 
 def authenticate_user(db: Session, email: str | None = None, username: str | None = None, password: str = None) -> models.User | None:
@@ -64,15 +75,205 @@ def authenticate_user(db: Session, email: str | None = None, username: str | Non
 
 # ---------- CALCULATION CRUD ----------
 
+def _bump_calc_version(db: Session, user_id: int | None) -> int | None:
+    """
+    Increment the owner's calculation version inside the current transaction,
+    so the ETag of their calculation resources changes with the write.
+
+    Returns:
+        The new version, which the write stamps as `seq` on the rows it
+        touches (None for ownerless rows)
+    """
+    if user_id is None:
+        return None
+    stmt = (
+        update(models.User)
+        .where(models.User.id == user_id)
+        .values(calc_version=models.User.calc_version + 1)
+        .returning(models.User.calc_version)
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(stmt).scalar_one()
+
+
+def _owner_filter(user_id: int | None):
+    if user_id is None:
+        return models.Calculation.user_id.is_(None)
+    return models.Calculation.user_id == user_id
+
+
+def _unprocessable(db: Session, detail: str) -> HTTPException:
+    """Roll back pending changes and build a 422 for the caller to raise"""
+    db.rollback()
+    return HTTPException(status_code=422, detail=detail)
+
+
+def _validate_calculation(db: Session, calc: models.Calculation, label: str = "") -> None:
+    """Check a row with CalculationCreate's rules after operands are resolved"""
+    if is_array_type(calc.type):
+        # The packed operands were checked by _store_operands; don't rebuild the list
+        if not calc.operand_count:
+            raise _unprocessable(db, label + f"operands are required for {calc.type} operation")
+        if any(v is not None for v in (calc.a, calc.b, calc.a_ref_id, calc.b_ref_id, calc.expression)):
+            raise _unprocessable(db, label + f"a, b, references and expression are not allowed for {calc.type} operation")
+        return
+    try:
+        schemas.CalculationCreate(
+            a=calc.a,
+            b=calc.b,
+            type=calc.type,
+            expression=calc.expression,
+            a_ref_id=calc.a_ref_id,
+            b_ref_id=calc.b_ref_id,
+        )
+    except ValidationError as exc:
+        raise _unprocessable(db, label + exc.errors()[0]["msg"])
+
+
+def _calculation_result(db: Session, calc: models.Calculation) -> float:
+    try:
+        return calculate_result(calc.type, calc.a, calc.b, calc.expression, calc.reduced)
+    except ValueError as exc:
+        raise _unprocessable(db, f"Calculation {calc.id} has no valid result: {exc}")
+
+
+def _store_operands(db: Session, calc: models.Calculation, values) -> None:
+    """Pack array operands into the row and evaluate its reduction once"""
+    array = np.asarray(values, dtype=OPERAND_DTYPE)
+    try:
+        calc.reduced = reduce_operands(calc.type, array)
+    except ValueError as exc:
+        raise _unprocessable(db, str(exc))
+    calc.operands = array.tobytes()
+    calc.operand_count = int(array.size)
+
+
+def _resolve_reference(db: Session, ref_id: int, user_id: int | None) -> float:
+    """Result of a referenced calculation, which must belong to the same owner"""
+    parent = db.query(models.Calculation).filter(
+        models.Calculation.id == ref_id,
+        _owner_filter(user_id),
+    ).first()
+    if not parent:
+        raise _unprocessable(db, f"Referenced calculation {ref_id} not found")
+    return _calculation_result(db, parent)
+
+
+def _is_ancestor(db: Session, node_id: int, parents: set[int], user_id: int | None) -> bool:
+    """Whether node_id is one of `parents` or something they depend on (recursive CTE up the references)"""
+    calc = models.Calculation
+    ancestors = (
+        select(calc.id, calc.a_ref_id, calc.b_ref_id)
+        .where(calc.id.in_(parents), _owner_filter(user_id))
+        .cte("ancestors", recursive=True)
+    )
+    ancestors = ancestors.union(
+        select(calc.id, calc.a_ref_id, calc.b_ref_id)
+        .join(ancestors, or_(calc.id == ancestors.c.a_ref_id, calc.id == ancestors.c.b_ref_id))
+        .where(_owner_filter(user_id))
+    )
+    return db.execute(select(ancestors.c.id).where(ancestors.c.id == node_id).limit(1)).first() is not None
+
+
+def _downstream_graph(db: Session, node_id: int, user_id: int | None) -> DependencyGraph:
+    """The reference edges of everything that depends on node_id (recursive CTE down the references)"""
+    calc = models.Calculation
+    descendants = (
+        select(calc.id, calc.a_ref_id, calc.b_ref_id)
+        .where(or_(calc.a_ref_id == node_id, calc.b_ref_id == node_id), _owner_filter(user_id))
+        .cte("descendants", recursive=True)
+    )
+    descendants = descendants.union(
+        select(calc.id, calc.a_ref_id, calc.b_ref_id)
+        .join(descendants, or_(calc.a_ref_id == descendants.c.id, calc.b_ref_id == descendants.c.id))
+        .where(_owner_filter(user_id))
+    )
+    return DependencyGraph(db.execute(select(descendants)).all())
+
+
+def _recompute_downstream(db: Session, graph: DependencyGraph, calc: models.Calculation) -> list[models.Calculation]:
+    """
+    Push calc's new result through its dependents in topological order.
+    Only operands that point at a recomputed node are rewritten.
+
+    Returns:
+        The recomputed dependents
+    """
+    try:
+        order = graph.downstream_order(calc.id)
+    except (CycleError, FanOutError) as exc:
+        raise _unprocessable(db, str(exc))
+    if not order:
+        return []
+
+    nodes = {
+        node.id: node
+        for node in db.query(models.Calculation).filter(models.Calculation.id.in_(order))
+    }
+    results = {calc.id: _calculation_result(db, calc)}
+    for node_id in order:
+        node = nodes[node_id]
+        if node.a_ref_id in results:
+            node.a = results[node.a_ref_id]
+        if node.b_ref_id in results:
+            node.b = results[node.b_ref_id]
+        _validate_calculation(db, node, label=f"Recomputing calculation {node_id} failed: ")
+        results[node_id] = _calculation_result(db, node)
+    return [nodes[node_id] for node_id in order]
+
+
+def _publish(owner_id: int | None, kind: str, calcs) -> None:
+    """Send committed rows to the owner's live event streams, if any are open"""
+    if not event_hub.has_subscribers(owner_id):
+        return
+    for calc in calcs:
+        payload = schemas.CalculationRead.model_validate(calc, from_attributes=True).model_dump(mode="json")
+        event_hub.publish(owner_id, {"type": kind, "seq": calc.seq, "calculation": payload})
+
+
 def create_calculation(db: Session, calc_in: schemas.CalculationCreate, user_id: int | None = None) -> models.Calculation:
     data = _to_dict(calc_in)
+    operands = data.pop("operands")
+    # Referenced operands take the referenced calculation's current result
+    for operand in ("a", "b"):
+        ref_id = data[f"{operand}_ref_id"]
+        if ref_id is not None:
+            data[operand] = _resolve_reference(db, ref_id, user_id)
     db_calc = models.Calculation(**data, user_id=user_id)
-    db.add(db_calc)
-    db.commit()
-    db.refresh(db_calc)
+    if operands is not None:
+        _store_operands(db, db_calc, operands)
+    _validate_calculation(db, db_calc)
+    if group_commit.GROUP_COMMIT_ENABLED:
+        # Committed (with the version bump and cache invalidation) in a shared batch
+        row = {column.key: getattr(db_calc, column.key) for column in models.Calculation.__table__.columns}
+        del row["id"]
+        calc_id = group_commit.group_committer.insert(db.get_bind(), row)
+        db_calc = db.get(models.Calculation, calc_id)
+    else:
+        db.add(db_calc)
+        db_calc.seq = _bump_calc_version(db, user_id)
+        db.commit()
+        calculation_cache.invalidate(user_id)
+        db.refresh(db_calc)
+    _publish(user_id, "created", [db_calc])
     return db_calc
 
 
+def bulk_insert_calculations(db: Session, rows: list[dict], user_id: int | None = None) -> None:
+    """
+    Insert many already-validated calculations in one multi-row INSERT and
+    one commit. Rows are dicts with a, b and type (optionally expression).
+    """
+    if not rows:
+        return
+    seq = _bump_calc_version(db, user_id)
+    db.execute(insert(models.Calculation), [{**row, "user_id": user_id, "seq": seq} for row in rows])
+    db.commit()
+    calculation_cache.invalidate(user_id)
+    # Too many rows for individual events; open pages reload the list
+    event_hub.publish(user_id, RESET)
+
+
 def get_user_calculations(db: Session, user_id: int) -> list[models.Calculation]:
     """Get all calculations for a specific user"""
     return db.query(models.Calculation).filter(models.Calculation.user_id == user_id).all()
@@ -94,6 +295,80 @@ def get_calculation_by_id_and_user(db: Session, calc_id: int, user_id: int) -> m
     ).first()
 
 
+# ---------- READ-ONLY CALCULATION QUERIES ----------
+# The read endpoints never modify what they load, so these select only the
+# columns CalculationRead needs and return plain Row tuples. Nothing enters the
+# session identity map and no change-tracking state is allocated per row.
+
+_CALCULATION_COLUMNS = (
+    models.Calculation.id,
+    models.Calculation.a,
+    models.Calculation.b,
+    models.Calculation.type,
+    models.Calculation.expression,
+    models.Calculation.a_ref_id,
+    models.Calculation.b_ref_id,
+    models.Calculation.operand_count,
+    models.Calculation.reduced,
+    models.Calculation.user_id,
+)
+
+
+def get_user_calculation_rows(db: Session, user_id: int) -> list[Row]:
+    """Read-only variant of get_user_calculations"""
+    stmt = select(*_CALCULATION_COLUMNS).where(models.Calculation.user_id == user_id)
+    return db.execute(stmt).all()
+
+
+def get_all_calculation_rows(db: Session) -> list[Row]:
+    """Read-only variant of get_all_calculations"""
+    return db.execute(select(*_CALCULATION_COLUMNS)).all()
+
+
+def get_calculation_row_by_id(db: Session, calc_id: int) -> Row | None:
+    """Read-only variant of get_calculation_by_id"""
+    stmt = select(*_CALCULATION_COLUMNS).where(models.Calculation.id == calc_id)
+    return db.execute(stmt).first()
+
+
+def get_calculation_row_by_id_and_user(db: Session, calc_id: int, user_id: int) -> Row | None:
+    """Read-only variant of get_calculation_by_id_and_user"""
+    stmt = select(*_CALCULATION_COLUMNS).where(
+        models.Calculation.id == calc_id,
+        models.Calculation.user_id == user_id
+    )
+    return db.execute(stmt).first()
+
+
+def get_calculation_changes(db: Session, user_id: int, since: int) -> tuple[list[Row], list[Row]]:
+    """
+    Delta sync feed: (rows written after `since`, (calc_id, seq) tombstones
+    written after it), both in seq order. since=0 returns every live row and
+    no tombstones. Both queries are range scans on the (user_id, seq) indexes.
+    """
+    stmt = select(*_CALCULATION_COLUMNS, models.Calculation.seq).where(models.Calculation.user_id == user_id)
+    if not since:
+        return db.execute(stmt.order_by(models.Calculation.id)).all(), []
+    rows = db.execute(
+        stmt.where(models.Calculation.seq > since).order_by(models.Calculation.seq, models.Calculation.id)
+    ).all()
+    tombstones = db.execute(
+        select(models.CalculationTombstone.calc_id, models.CalculationTombstone.seq)
+        .where(models.CalculationTombstone.user_id == user_id, models.CalculationTombstone.seq > since)
+        .order_by(models.CalculationTombstone.seq)
+    ).all()
+    return rows, tombstones
+
+
+def get_calculation_operands(db: Session, calc_id: int, user_id: int) -> Row | None:
+    """(type, operands) of one calculation; the only read that loads the operand blob"""
+    stmt = select(models.Calculation.type, models.Calculation.operands).where(
+        models.Calculation.id == calc_id,
+        models.Calculation.user_id == user_id
+    )
+    return db.execute(stmt).first()
+
+
 def update_calculation(
     db: Session,
     calc_id: int,
@@ -110,11 +385,52 @@ def update_calculation(
 
     # Only update provided fields (exclude_unset)
     update_data = _to_dict(calc_in, exclude_unset=True)
+    operands = update_data.pop("operands", None)
+    for operand in ("a", "b"):
+        # An explicit value detaches the operand from its reference
+        if operand in update_data and f"{operand}_ref_id" not in update_data:
+            update_data[f"{operand}_ref_id"] = None
     for field, value in update_data.items():
         setattr(calc, field, value)
-
+    if calc.type != schemas.CalcType.Expression:
+        calc.expression = None
+    if is_array_type(calc.type):
+        # Switching to a reduction drops the binary operands unless given explicitly
+        for field in ("a", "b", "a_ref_id", "b_ref_id"):
+            if field not in update_data:
+                setattr(calc, field, None)
+        if operands is None and calc.operands is not None:
+            # Reduction type changed over the stored operands
+            operands = unpack_operands(calc.operands)
+        if operands is not None:
+            _store_operands(db, calc, operands)
+    elif operands is not None:
+        raise _unprocessable(db, "operands are only allowed for array operations")
+    else:
+        calc.operands = calc.operand_count = calc.reduced = None
+
+    owner_id = calc.user_id
+    # Only the new parents' ancestors and calc's own dependents are visited,
+    # so a plain numeric edit never loads the owner's reference graph
+    parents = {ref for ref in (calc.a_ref_id, calc.b_ref_id) if ref is not None}
+    if parents and _is_ancestor(db, calc.id, parents, owner_id):
+        raise _unprocessable(db, "Reference would create a dependency cycle")
+    for operand in ("a", "b"):
+        ref_id = getattr(calc, f"{operand}_ref_id")
+        if ref_id is not None and f"{operand}_ref_id" in update_data:
+            setattr(calc, operand, _resolve_reference(db, ref_id, owner_id))
+
+    # A partial update can combine into an invalid row (e.g. Expression without a formula)
+    _validate_calculation(db, calc)
+    dependents = _recompute_downstream(db, _downstream_graph(db, calc.id, owner_id), calc)
+
+    seq = _bump_calc_version(db, owner_id)
+    for changed in (calc, *dependents):
+        changed.seq = seq
     db.commit()
+    calculation_cache.invalidate(owner_id)
     db.refresh(calc)
+    _publish(owner_id, "updated", [calc, *dependents])
     return calc
 
 
@@ -127,7 +443,29 @@ def delete_calculation(db: Session, calc_id: int, user_id: int | None = None) ->
     if not calc:
         return False
 
+    owner_id = calc.user_id
+    detached = []
+    if event_hub.has_subscribers(owner_id):
+        detached = db.query(models.Calculation).filter(
+            or_(models.Calculation.a_ref_id == calc.id, models.Calculation.b_ref_id == calc.id),
+        ).all()
+    seq = _bump_calc_version(db, owner_id)
+    # Dependents keep their last resolved value and stop following this row
+    for ref_column in (models.Calculation.a_ref_id, models.Calculation.b_ref_id):
+        db.query(models.Calculation).filter(ref_column == calc.id).update(
+            {ref_column: None, models.Calculation.seq: seq},
+            synchronize_session=False,
+        )
     db.delete(calc)
+    if owner_id is not None:
+        # Delta sync clients learn about the delete from the tombstone
+        db.add(models.CalculationTombstone(user_id=owner_id, calc_id=calc_id, seq=seq))
     db.commit()
+    calculation_cache.invalidate(owner_id)
+    event_hub.publish(owner_id, {"type": "deleted", "id": calc_id, "seq": seq})
+    if detached:
+        for dependent in detached:
+            db.refresh(dependent)
+        _publish(owner_id, "updated", detached)
     return True
 
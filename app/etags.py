@@ -0,0 +1,52 @@
+from fastapi import Request, Response
+
+# Clients must revalidate every time, but may keep the body and send If-None-Match
+CACHE_CONTROL = "private, no-cache"
+
+
+def calculations_etag(user_id: int, calc_version: int, calc_id: int | None = None) -> str:
+    """
+    Build a strong ETag for a user's calculation list (or one calculation).
+
+    The tag is derived from the user's calc_version counter, which every
+    calculation write bumps, so it can be computed without touching any rows.
+    """
+    if calc_id is None:
+        return f'"calcs-{user_id}-{calc_version}"'
+    return f'"calc-{user_id}-{calc_version}-{calc_id}"'
+
+
+def is_not_modified(request: Request, etag: str, exists: bool = True) -> bool:
+    """
+    Return True if the request's If-None-Match header matches etag.
+
+    "*" matches any current representation, so it only matches when `exists`
+    is True; pass False while the resource has not been confirmed to exist.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return exists
+    # If-None-Match uses the weak comparison function, so ignore any W/ prefix
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def not_modified_response(etag: str) -> Response:
+    """Empty 304 response carrying the validator headers"""
+    return Response(
+        status_code=304,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
+
+
+def set_etag(response: Response, etag: str) -> None:
+    """Attach the validator headers to a full 200 response"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
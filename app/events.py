@@ -0,0 +1,130 @@
+"""
+In-process pub/sub for live calculation updates.
+
+crud publishes an event for every committed calculation write:
+
+    {"type": "created" | "updated", "seq": 12, "calculation": {...CalculationRead...}}
+    {"type": "deleted", "id": 7, "seq": 13}
+    {"type": "reset"}   (bulk changes; reload the list)
+
+EventHub fans each event out to the owner's subscribers, which are the
+GET /api/calculations/events streams (Server-Sent Events). Writes run on
+worker threads and subscribers live on the event loop, so publish() hands
+events over with call_soon_threadsafe. Each subscriber queue is bounded by
+EVENTS_QUEUE_SIZE; a subscriber that falls that far behind gets a single
+"reset" instead of the backlog and reloads the list. `seq` is the delta sync
+position (GET /api/calculations/changes?since=) the event brings a client to.
+
+Only subscribers in this process are notified. With several workers, a tab
+served by another worker sees the change on its next reload.
+"""
+import asyncio
+import itertools
+import os
+import threading
+
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "256"))
+EVENTS_MAX_SUBSCRIBERS = int(os.getenv("EVENTS_MAX_SUBSCRIBERS", "1000"))
+EVENTS_HEARTBEAT = float(os.getenv("EVENTS_HEARTBEAT", "15"))
+
+RESET = {"type": "reset"}
+
+
+class TooManySubscribers(Exception):
+    """Raised by subscribe() when EVENTS_MAX_SUBSCRIBERS streams are open"""
+
+
+class Subscription:
+    """One open event stream: a bounded queue on the subscriber's event loop"""
+
+    def __init__(self, user_id: int, max_size: int = EVENTS_QUEUE_SIZE):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue[tuple[int, dict]] = asyncio.Queue(max_size)
+        self.overflowed = False
+
+    def _put(self, event_id: int, event: dict) -> None:
+        """Runs on the subscriber's loop"""
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait((event_id, event))
+        except asyncio.QueueFull:
+            # Drop the backlog; the client reloads the list instead
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait((event_id, RESET))
+
+    async def get(self, timeout: float | None = None) -> tuple[int, dict] | None:
+        """Next (event id, event), or None after `timeout` seconds without one"""
+        try:
+            item = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if item[1] is RESET:
+            self.overflowed = False
+        return item
+
+
+class EventHub:
+    """Per-user fan-out of calculation events to open subscriptions"""
+
+    def __init__(self, max_subscribers: int = EVENTS_MAX_SUBSCRIBERS):
+        self.max_subscribers = max_subscribers
+        self._subscribers: dict[int, set[Subscription]] = {}
+        self._count = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def subscribers(self) -> int:
+        return self._count
+
+    def has_subscribers(self, user_id: int | None) -> bool:
+        """Cheap check so writers only build events someone will receive"""
+        return user_id in self._subscribers
+
+    def subscribe(self, user_id: int) -> Subscription:
+        """
+        Open a subscription on the running event loop.
+
+        Raises:
+            TooManySubscribers: If the hub is full
+        """
+        subscription = Subscription(user_id)
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                raise TooManySubscribers()
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+            self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscribers.get(subscription.user_id)
+            if subscriptions is None or subscription not in subscriptions:
+                return
+            subscriptions.discard(subscription)
+            self._count -= 1
+            if not subscriptions:
+                del self._subscribers[subscription.user_id]
+
+    def publish(self, user_id: int | None, event: dict) -> None:
+        """Send an event to the user's subscribers; safe to call from any thread"""
+        if user_id is None:
+            return
+        with self._lock:
+            subscriptions = list(self._subscribers.get(user_id, ()))
+            if not subscriptions:
+                return
+            event_id = next(self._ids)
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._put, event_id, event)
+            except RuntimeError:
+                # The subscriber's loop has closed; its stream is gone
+                self.unsubscribe(subscription)
+
+
+event_hub = EventHub()
@@ -1,19 +1,92 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from . import schemas, crud
 from .database import engine, Base, get_db
-from app.routers import auth_router, calculations_router  # Include both routers
-from fastapi.staticfiles import StaticFiles
+from app.admission import ADMISSION_ENABLED
+from app.memory import memory_reporter
+from app.metrics import METRICS_ENABLED, instrument_pool, snapshot_writer
+from app.monitor import LOOP_MONITOR_ENABLED, configure_threadpool, loop_monitor
+from app.profiler import PROFILER_ENABLED
+from app.routers import (
+    admin_router,
+    auth_router,
+    calculations_router,
+    compute_router,
+    jobs_router,
+    metrics_router,
+)
+from app.services.jobs import JOBS_ENABLED, job_runner
+from app.services.sync import tombstone_compactor
+from app.static_assets import StaticAssets
+from app.middleware.admission import AdmissionMiddleware
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.monitor import RequestArrivalMiddleware
+from app.middleware.profiler import ProfilerMiddleware
+from app.middleware.timing import ServerTimingMiddleware
+from app.timing import SERVER_TIMING_ENABLED, TimedRoute, install_sql_timing
 
 # Create tables once at startup
 Base.metadata.create_all(bind=engine)
 
-app = FastAPI()
-app.mount("/static", StaticFiles(directory="static"), name="static")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Each worker process runs its own job runner; claims are atomic in the DB
+    if JOBS_ENABLED:
+        job_runner.start()
+    if METRICS_ENABLED:
+        snapshot_writer.start()
+    memory_reporter.start()
+    tombstone_compactor.start()
+    configure_threadpool()
+    if LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    yield
+    await loop_monitor.stop()
+    job_runner.stop()
+    snapshot_writer.stop()
+    memory_reporter.stop()
+    tombstone_compactor.stop()
+
+
+app = FastAPI(lifespan=lifespan)
+# Legacy routes below are timed like the routers' routes
+app.router.route_class = TimedRoute
+app.add_middleware(CompressionMiddleware)
+if PROFILER_ENABLED:
+    app.add_middleware(ProfilerMiddleware)
+if METRICS_ENABLED:
+    instrument_pool(engine)
+    app.add_middleware(MetricsMiddleware)
+if LOOP_MONITOR_ENABLED:
+    app.add_middleware(RequestArrivalMiddleware)
+if ADMISSION_ENABLED:
+    # Outside the arrival stamp, so threadpool wait excludes admission queueing
+    app.add_middleware(AdmissionMiddleware)
+if SERVER_TIMING_ENABLED:
+    install_sql_timing()
+    # Added last so it is outermost and its total covers compression too
+    app.add_middleware(ServerTimingMiddleware)
+app.mount("/static", StaticAssets(directory="static"), name="static")
 # Include routers
 app.include_router(auth_router.router)
 app.include_router(calculations_router.router)
+app.include_router(compute_router.router)
+app.include_router(jobs_router.router)
+if METRICS_ENABLED:
+    app.include_router(metrics_router.router)
+app.include_router(admin_router.router)
+
+
+@app.get("/health", include_in_schema=False)
+async def health():
+    """Liveness check; exempt from admission control"""
+    return {"status": "ok"}
+
 
 # ---------- User Endpoints (backward compatible) ----------
 
@@ -70,14 +143,14 @@ def create_calculation(calc_in: schemas.CalculationCreate, db: Session = Depends
 @app.get("/calculations/", response_model=list[schemas.CalculationRead])
 def read_all_calculations(db: Session = Depends(get_db)):
     """Get all calculations (old endpoint without authentication)"""
-    calculations = crud.get_all_calculations(db)
+    calculations = crud.get_all_calculation_rows(db)
     return calculations
 
 
 @app.get("/calculations/{calc_id}", response_model=schemas.CalculationRead)
 def read_calculation(calc_id: int, db: Session = Depends(get_db)):
     """Get specific calculation (old endpoint without authentication)"""
-    calculation = crud.get_calculation_by_id(db, calc_id)
+    calculation = crud.get_calculation_row_by_id(db, calc_id)
     if not calculation:
         raise HTTPException(status_code=404, detail="Calculation not found")
     return calculation
@@ -0,0 +1,213 @@
+"""
+Memory diagnostics for long-running workers.
+
+MemoryTracker keeps a few numbered tracemalloc snapshots so an admin can take
+one now, another after a while, and list the allocation sites that grew in
+between (GET /admin/memory/diff). tracemalloc slows allocations down, so it
+only runs between an explicit start and stop.
+
+process_report() summarizes RSS and garbage collector state; with
+MEMORY_REPORT_INTERVAL set it is also logged periodically as JSON to the
+"app.memory" logger. measure_growth() is the test-side helper: it runs a
+callable many times and returns the net traced growth.
+"""
+import gc
+import json
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+logger = logging.getLogger("app.memory")
+
+MEMORY_MAX_SNAPSHOTS = int(os.getenv("MEMORY_MAX_SNAPSHOTS", "8"))
+MEMORY_REPORT_INTERVAL = float(os.getenv("MEMORY_REPORT_INTERVAL", "0"))  # seconds; 0 disables
+MEMORY_TRACE_FRAMES = int(os.getenv("MEMORY_TRACE_FRAMES", "10"))
+
+# Allocations made by the diagnostics themselves are not interesting
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def rss_bytes() -> int:
+    """Current resident set size (peak RSS where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def process_report() -> dict:
+    """RSS, GC generation counters and tracemalloc totals for this process"""
+    report = {
+        "pid": os.getpid(),
+        "rss_bytes": rss_bytes(),
+        "gc_counts": list(gc.get_count()),
+        "gc_generations": [
+            {"generation": generation, **stats} for generation, stats in enumerate(gc.get_stats())
+        ],
+        "gc_garbage": len(gc.garbage),
+        "tracemalloc": None,
+    }
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        report["tracemalloc"] = {"current_bytes": current, "peak_bytes": peak}
+    return report
+
+
+class MemoryTracker:
+    """Numbered tracemalloc snapshots (oldest dropped beyond max_snapshots)"""
+
+    def __init__(self, max_snapshots: int = MEMORY_MAX_SNAPSHOTS):
+        self.max_snapshots = max_snapshots
+        self._snapshots: OrderedDict[int, tuple[str, tracemalloc.Snapshot]] = OrderedDict()
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def start(self, frames: int = MEMORY_TRACE_FRAMES) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop(self) -> None:
+        """Stop tracing and forget all snapshots"""
+        tracemalloc.stop()
+        with self._lock:
+            self._snapshots.clear()
+
+    def take(self) -> dict:
+        """
+        Collect garbage and snapshot current allocations.
+
+        Raises:
+            RuntimeError: If tracing was not started
+        """
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc is not running; start it first")
+        gc.collect()
+        snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+        taken = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            snapshot_id = self._next_id
+            self._next_id += 1
+            self._snapshots[snapshot_id] = (taken, snapshot)
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+        return self._describe(snapshot_id, taken, snapshot)
+
+    def snapshots(self) -> list[dict]:
+        with self._lock:
+            items = list(self._snapshots.items())
+        return [self._describe(snapshot_id, taken, snapshot) for snapshot_id, (taken, snapshot) in items]
+
+    def get(self, snapshot_id: int) -> tracemalloc.Snapshot | None:
+        with self._lock:
+            entry = self._snapshots.get(snapshot_id)
+        return entry[1] if entry else None
+
+    def diff(self, base_id: int, current_id: int, limit: int = 20, group_by: str = "lineno") -> list[dict]:
+        """
+        Top allocation sites by growth from base to current.
+
+        Raises:
+            KeyError: If either snapshot is unknown (or was dropped)
+        """
+        base, current = self.get(base_id), self.get(current_id)
+        if base is None or current is None:
+            raise KeyError(base_id if base is None else current_id)
+        return top_growth(base, current, limit, group_by)
+
+    @staticmethod
+    def _describe(snapshot_id: int, taken: str, snapshot: tracemalloc.Snapshot) -> dict:
+        stats = snapshot.statistics("filename")
+        return {
+            "id": snapshot_id,
+            "taken_at": taken,
+            "size_bytes": sum(stat.size for stat in stats),
+            "count": sum(stat.count for stat in stats),
+        }
+
+
+def top_growth(base: tracemalloc.Snapshot, current: tracemalloc.Snapshot, limit: int = 20,
+               group_by: str = "lineno") -> list[dict]:
+    """Largest positive size differences between two snapshots"""
+    diffs = [stat for stat in current.compare_to(base, group_by) if stat.size_diff > 0]
+    return [
+        {
+            "site": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+            "size_diff_bytes": stat.size_diff,
+            "count_diff": stat.count_diff,
+            "size_bytes": stat.size,
+            "count": stat.count,
+        }
+        for stat in diffs[:limit]
+    ]
+
+
+def measure_growth(fn, iterations: int = 100, warmup: int = 20, frames: int = 1) -> tuple[int, list[dict]]:
+    """
+    Net traced allocation growth over `iterations` calls of fn.
+
+    The warmup calls fill caches and lazy imports first, so steady-state
+    code should come out near zero.
+
+    Returns:
+        (growth in bytes, top growing sites)
+    """
+    for _ in range(warmup):
+        fn()
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start(frames)
+    try:
+        gc.collect()
+        before = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+        for _ in range(iterations):
+            fn()
+        gc.collect()
+        after = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    growth = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return growth, top_growth(before, after, limit=10)
+
+
+class MemoryReporter:
+    """Background thread logging process_report() every `interval` seconds"""
+
+    def __init__(self, interval: float = MEMORY_REPORT_INTERVAL):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="memory-reporter", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            logger.info(json.dumps({"event": "memory", "time": time.time(), **process_report()}))
+
+
+memory_tracker = MemoryTracker()
+memory_reporter = MemoryReporter()
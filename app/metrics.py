@@ -0,0 +1,371 @@
+"""
+Dependency-free Prometheus metrics.
+
+Counters, gauges and histograms live in plain dicts keyed by label values,
+each guarded by its own uncontended lock, so an update on the hot path is a
+lock acquire and a dict write. render() produces the Prometheus text
+exposition format served by GET /metrics.
+
+With several worker processes each process only sees its own requests. Set
+METRICS_MULTIPROC_DIR to a directory shared by the workers: every process
+then writes a JSON snapshot of its metrics there every METRICS_FLUSH_INTERVAL
+seconds (and on shutdown), and /metrics sums the snapshots of all processes.
+Counters and histograms of exited processes keep counting toward the totals;
+gauges of exited processes are dropped. Empty the directory between
+deployments so old snapshots don't carry over.
+"""
+import json
+import math
+import os
+import threading
+import time
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR") or None
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "1.0"))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def samples(self) -> dict[tuple, object]:
+        with self._lock:
+            return {key: self._copy(value) for key, value in self._values.items()}
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set"""
+    type = "counter"
+
+    def inc(self, *labelvalues, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """Value that goes up and down per label set"""
+    type = "gauge"
+
+    def inc(self, *labelvalues, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def dec(self, *labelvalues, amount: float = 1.0) -> None:
+        self.inc(*labelvalues, amount=-amount)
+
+    def set(self, value: float, *labelvalues) -> None:
+        with self._lock:
+            self._values[labelvalues] = float(value)
+
+
+class Histogram(_Metric):
+    """Observation counts per bucket, plus sum and count, per label set"""
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value: float, *labelvalues) -> None:
+        # Index of the first bucket the value fits in; len(buckets) is +Inf
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            entry = self._values.get(labelvalues)
+            if entry is None:
+                entry = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def time(self, *labelvalues):
+        """Context manager observing the duration of a block"""
+        return _Timer(self, labelvalues)
+
+    @staticmethod
+    def _copy(value):
+        return [list(value[0]), value[1], value[2]]
+
+
+class _Timer:
+    __slots__ = ("histogram", "labelvalues", "started")
+
+    def __init__(self, histogram: Histogram, labelvalues: tuple):
+        self.histogram = histogram
+        self.labelvalues = labelvalues
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labelvalues)
+        return False
+
+
+class Registry:
+    """Set of metrics plus collectors that refresh gauges before each read"""
+
+    def __init__(self):
+        self.metrics: dict[str, _Metric] = {}
+        self.collectors: list = []
+
+    def register(self, metric: _Metric) -> None:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+
+    def add_collector(self, collector) -> None:
+        """collector() is called before every snapshot, e.g. to set pool gauges"""
+        self.collectors.append(collector)
+
+    def snapshot(self) -> dict:
+        """JSON-serializable view of every metric in this process"""
+        for collector in self.collectors:
+            collector()
+        return {
+            name: {
+                "type": metric.type,
+                "help": metric.documentation,
+                "labelnames": list(metric.labelnames),
+                "buckets": list(getattr(metric, "buckets", ())),
+                "samples": [[list(key), value] for key, value in metric.samples().items()],
+            }
+            for name, metric in self.metrics.items()
+        }
+
+    def clear(self) -> None:
+        for metric in self.metrics.values():
+            metric.clear()
+
+
+REGISTRY = Registry()
+
+
+# ---------- Multi-process aggregation ----------
+
+def _snapshot_path(directory: str, pid: int) -> str:
+    return os.path.join(directory, f"metrics-{pid}.json")
+
+
+def write_snapshot(registry: Registry = REGISTRY, directory: str | None = METRICS_MULTIPROC_DIR) -> None:
+    """Atomically replace this process's snapshot file"""
+    os.makedirs(directory, exist_ok=True)
+    path = _snapshot_path(directory, os.getpid())
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(registry.snapshot(), f)
+    os.replace(tmp, path)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def merge_snapshots(snapshots: list[tuple[bool, dict]]) -> dict:
+    """
+    Sum (alive, snapshot) pairs into one snapshot. Gauges only count from
+    live processes; counters and histograms count from all of them.
+    """
+    merged: dict = {}
+    for alive, snapshot in snapshots:
+        for name, metric in snapshot.items():
+            if metric["type"] == "gauge" and not alive:
+                continue
+            target = merged.setdefault(name, {**metric, "samples": {}})
+            for key, value in metric["samples"]:
+                key = tuple(key)
+                current = target["samples"].get(key)
+                if current is None:
+                    target["samples"][key] = value
+                elif metric["type"] == "histogram":
+                    target["samples"][key] = [
+                        [x + y for x, y in zip(current[0], value[0])],
+                        current[1] + value[1],
+                        current[2] + value[2],
+                    ]
+                else:
+                    target["samples"][key] = current + value
+    for metric in merged.values():
+        metric["samples"] = [[list(key), value] for key, value in metric["samples"].items()]
+    return merged
+
+
+def collect(registry: Registry = REGISTRY, directory: str | None = METRICS_MULTIPROC_DIR) -> dict:
+    """This process's snapshot, or the sum over all processes in multiprocess mode"""
+    if directory is None:
+        return registry.snapshot()
+    write_snapshot(registry, directory)
+    snapshots = []
+    for entry in os.scandir(directory):
+        if not (entry.name.startswith("metrics-") and entry.name.endswith(".json")):
+            continue
+        pid = int(entry.name[len("metrics-"):-len(".json")])
+        try:
+            with open(entry.path) as f:
+                snapshots.append((_pid_alive(pid), json.load(f)))
+        except (OSError, ValueError):
+            continue  # replaced or removed while scanning
+    return merge_snapshots(snapshots)
+
+
+class SnapshotWriter:
+    """Background thread flushing this process's snapshot in multiprocess mode"""
+
+    def __init__(self, registry: Registry = REGISTRY, directory: str | None = METRICS_MULTIPROC_DIR,
+                 interval: float = METRICS_FLUSH_INTERVAL):
+        self.registry = registry
+        self.directory = directory
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        if self.directory is None or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="metrics-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+        write_snapshot(self.registry, self.directory)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            write_snapshot(self.registry, self.directory)
+
+
+snapshot_writer = SnapshotWriter()
+
+
+# ---------- Text exposition ----------
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+def render(snapshot: dict) -> str:
+    """Prometheus text format (version 0.0.4) for a snapshot"""
+    lines = []
+    for name, metric in sorted(snapshot.items()):
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        names = metric["labelnames"]
+        for key, value in sorted(metric["samples"], key=lambda sample: sample[0]):
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_labels(names, key)} {_number(value)}")
+                continue
+            bucket_counts, total, count = value
+            cumulative = 0
+            for bound, bucket_count in zip(list(metric["buckets"]) + [math.inf], bucket_counts):
+                cumulative += bucket_count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{name}_bucket{_labels(names, key, le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(names, key)} {_number(total)}")
+            lines.append(f"{name}_count{_labels(names, key)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+# ---------- Application metrics ----------
+
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests", ("method", "route", "status"))
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency until the response is sent", ("method", "route")
+)
+HTTP_IN_PROGRESS = Gauge("http_requests_in_progress", "HTTP requests currently being served", ("method",))
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_duration_seconds", "Time spent hashing or verifying passwords", ("operation",),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+AUTH_FAILURES = Counter("auth_failures_total", "Rejected logins and tokens", ("reason",))
+JWT_DECODE_CACHE = Counter("jwt_decode_cache_total", "JWT decode cache lookups", ("result",))
+CALC_CACHE_LOOKUPS = Counter("calc_cache_lookups_total", "Calculation read cache lookups", ("result",))
+CALC_CACHE_EVICTIONS = Counter("calc_cache_evictions_total", "Calculation cache entries evicted to fit the byte cap")
+CALC_CACHE_INVALIDATIONS = Counter("calc_cache_invalidations_total", "Per-user calculation cache invalidations")
+DB_POOL_CHECKOUTS = Counter("db_pool_checkouts_total", "Connections checked out of the pool")
+DB_POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Connections currently checked out")
+DB_POOL_SIZE = Gauge("db_pool_size", "Configured pool size (QueuePool only)")
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds", "How late the event loop ran a timer",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+THREADPOOL_SIZE_GAUGE = Gauge("threadpool_size", "Threads available to sync endpoints and dependencies")
+THREADPOOL_BUSY = Gauge("threadpool_busy_threads", "Threadpool threads currently in use")
+THREADPOOL_QUEUED = Gauge("threadpool_queued_tasks", "Tasks waiting for a threadpool thread")
+THREADPOOL_WAIT = Histogram(
+    "threadpool_wait_seconds", "Time from request arrival until its sync endpoint started on a thread", ("route",),
+)
+ADMISSION_IN_FLIGHT = Gauge("admission_in_flight", "Requests admitted and not yet finished", ("route_class",))
+ADMISSION_QUEUED = Gauge("admission_queued", "Requests waiting for admission", ("route_class",))
+ADMISSION_QUEUE_WAIT = Histogram(
+    "admission_queue_wait_seconds", "Time admitted requests spent queued", ("route_class",),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+ADMISSION_SHED = Counter("admission_shed_total", "Requests rejected with 503", ("route_class", "reason"))
+SINGLEFLIGHT_CALLS = Counter(
+    "singleflight_calls_total", "Coalesced reads by outcome (leader computed, shared, timeout)", ("result",),
+)
+
+
+def instrument_pool(engine) -> None:
+    """Track checkouts of engine's connection pool"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CHECKOUTS.inc()
+        DB_POOL_CHECKED_OUT.inc()
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        DB_POOL_CHECKED_OUT.dec()
+
+    size = getattr(engine.pool, "size", None)
+    if callable(size):
+        REGISTRY.add_collector(lambda: DB_POOL_SIZE.set(size()))
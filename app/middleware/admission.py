@@ -0,0 +1,46 @@
+"""
+Shed load before it reaches the app.
+
+AdmissionMiddleware classifies each request (app/admission.py) and holds a
+slot of its class's gate until the response has been sent. Requests that
+cannot get a slot in time are answered 503 with Retry-After without touching
+the app.
+"""
+import json
+
+from app import admission
+
+_SHED_BODY = json.dumps({"detail": "Server is overloaded, retry later"}).encode()
+
+
+class AdmissionMiddleware:
+    def __init__(self, app, gates: dict[str, admission.AdmissionGate] | None = None):
+        self.app = app
+        self.gates = gates if gates is not None else admission.build_gates()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route_class = admission.route_class(scope["method"], scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        gate = self.gates[route_class]
+        if await gate.acquire() is not None:
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(_SHED_BODY)).encode()),
+                    (b"retry-after", str(admission.ADMISSION_RETRY_AFTER).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": _SHED_BODY})
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release()
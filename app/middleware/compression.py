@@ -0,0 +1,233 @@
+"""
+Adaptive response compression.
+
+CompressionMiddleware is a pure ASGI middleware: it never buffers more than
+the first body chunk, so StreamingResponse bodies are compressed chunk by chunk
+as they are sent. The compression level follows CPU load: idle workers spend
+CPU on small payloads for mobile clients, busy workers fall back to cheap
+levels and finally stop compressing.
+"""
+import os
+import time
+import zlib
+
+from app.static_assets import choose_encoding
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+# Content types worth compressing (prefix match on the media type)
+DEFAULT_CONTENT_TYPES = (
+    "application/json",
+    "text/",
+    "application/javascript",
+    "image/svg+xml",
+)
+
+
+class CompressionPolicy:
+    """
+    Map current CPU load to a compression level.
+
+    Load is the 1-minute load average divided by the CPU count (or process CPU
+    share where load averages are unavailable), sampled at most once per
+    `sample_interval` seconds so the hot path only reads a cached float.
+
+    Args:
+        low_load: At or below this load the maximum level is used
+        high_load: At or above this load the minimum level is used
+        skip_load: At or above this load compression is switched off (None disables)
+    """
+
+    # (min, max) useful levels per encoding
+    LEVELS = {"gzip": (1, 6), "br": (1, 5)}
+
+    def __init__(
+        self,
+        low_load: float = 0.5,
+        high_load: float = 1.0,
+        skip_load: float | None = 1.5,
+        sample_interval: float = 1.0,
+    ):
+        self.low_load = low_load
+        self.high_load = high_load
+        self.skip_load = skip_load
+        self.sample_interval = sample_interval
+        self._cpus = os.cpu_count() or 1
+        self._load = 0.0
+        self._sampled_at = 0.0
+        self._cpu_time = time.process_time()
+
+    def _read_load(self, now: float) -> float:
+        if hasattr(os, "getloadavg"):
+            return os.getloadavg()[0] / self._cpus
+        # Fall back to this process' share of one CPU since the last sample
+        cpu_time = time.process_time()
+        elapsed = now - self._sampled_at if self._sampled_at else self.sample_interval
+        load = (cpu_time - self._cpu_time) / max(elapsed, 1e-6)
+        self._cpu_time = cpu_time
+        return load
+
+    def load(self) -> float:
+        now = time.monotonic()
+        if now - self._sampled_at >= self.sample_interval:
+            self._load = self._read_load(now)
+            self._sampled_at = now
+        return self._load
+
+    def level(self, encoding: str) -> int | None:
+        """Return the level to use for encoding, or None to skip compression"""
+        load = self.load()
+        if self.skip_load is not None and load >= self.skip_load:
+            return None
+        low, high = self.LEVELS[encoding]
+        if load <= self.low_load:
+            return high
+        if load >= self.high_load:
+            return low
+        fraction = (load - self.low_load) / (self.high_load - self.low_load)
+        return round(high - fraction * (high - low))
+
+
+class _GzipStream:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._compressor.compress(data)
+        # Sync-flush so every chunk reaches the client as soon as it is produced
+        return out + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class _BrotliStream:
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._compressor.process(data)
+        return out + (self._compressor.finish() if final else self._compressor.flush())
+
+
+class CompressionMiddleware:
+    """
+    Compress HTTP responses with gzip or brotli.
+
+    Args:
+        app: The wrapped ASGI app
+        minimum_size: Complete bodies smaller than this are sent as-is
+        content_types: Media type prefixes that may be compressed
+        encodings: Encodings the server offers, in preference order
+        policy: CompressionPolicy deciding the level per response
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        content_types: tuple[str, ...] = DEFAULT_CONTENT_TYPES,
+        encodings: tuple[str, ...] = ("br", "gzip"),
+        policy: CompressionPolicy | None = None,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.content_types = content_types
+        self.encodings = tuple(e for e in encodings if e != "br" or brotli is not None)
+        self.policy = policy or CompressionPolicy()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = None
+        for key, value in scope["headers"]:
+            if key == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept_encoding, self.encodings)
+        if encoding == "identity":
+            await self.app(scope, receive, send)
+            return
+
+        await _CompressedResponder(self, encoding, send).run(scope, receive)
+
+    def compressible(self, headers: list) -> bool:
+        content_type = b""
+        for key, value in headers:
+            lower = key.lower()
+            if lower == b"content-encoding":
+                return False
+            if lower == b"content-type":
+                content_type = value
+        media_type = content_type.decode("latin-1").split(";")[0].strip().lower()
+        return any(media_type.startswith(prefix) for prefix in self.content_types)
+
+
+class _CompressedResponder:
+    """Per-request state: decides on the first body chunk, then streams"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start_message = None
+        self.stream = None
+        self.passthrough = False
+
+    async def run(self, scope, receive):
+        await self.middleware.app(scope, receive, self.send_wrapper)
+
+    async def send_wrapper(self, message):
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            self.start_message = message
+            status_code = message["status"]
+            if status_code < 200 or status_code in (204, 304) or not self.middleware.compressible(message.get("headers", [])):
+                self.passthrough = True
+                await self.send(message)
+            return
+
+        if message_type != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.stream is None:
+            level = None
+            if more_body or len(body) >= self.middleware.minimum_size:
+                level = self.middleware.policy.level(self.encoding)
+            if level is None:
+                self.passthrough = True
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+            self.stream = _BrotliStream(level) if self.encoding == "br" else _GzipStream(level)
+            await self.send(self._compressed_start())
+
+        data = self.stream.compress(body, final=not more_body)
+        await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    def _compressed_start(self):
+        headers = []
+        vary = b"Accept-Encoding"
+        for key, value in self.start_message.get("headers", []):
+            lower = key.lower()
+            if lower == b"content-length":
+                continue
+            if lower == b"vary":
+                vary = value + b", Accept-Encoding"
+                continue
+            if lower == b"etag" and not value.startswith(b"W/"):
+                # The compressed bytes depend on the adaptive level, so a strong
+                # validator no longer holds; If-None-Match still matches weakly
+                value = b"W/" + value
+            headers.append((key, value))
+        headers.append((b"content-encoding", self.encoding.encode()))
+        headers.append((b"vary", vary))
+        return {**self.start_message, "headers": headers}
@@ -0,0 +1,41 @@
+"""
+Request metrics for GET /metrics.
+
+MetricsMiddleware is pure ASGI and records per-route request counts, the
+latency histogram (until the last body chunk is sent) and in-flight gauges.
+Routes are labelled by their path template ("/api/calculations/{calc_id}"),
+and requests that match no route share the "unmatched" label, so label
+cardinality stays bounded.
+"""
+import time
+
+from app.metrics import HTTP_IN_PROGRESS, HTTP_REQUEST_DURATION, HTTP_REQUESTS
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_PROGRESS.inc(method)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_PROGRESS.dec(method)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, method, route)
+            HTTP_REQUESTS.inc(method, route, str(status))
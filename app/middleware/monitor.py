@@ -0,0 +1,24 @@
+"""
+Stamp each request's arrival time for the threadpool monitor.
+
+ThreadTracker (app/monitor.py) subtracts this from the moment a sync endpoint
+starts on a worker thread to get the request's threadpool wait.
+"""
+import time
+
+from app.monitor import request_received
+
+
+class RequestArrivalMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = request_received.set(time.perf_counter())
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_received.reset(token)
@@ -0,0 +1,53 @@
+"""
+Profile single requests on demand.
+
+A request carrying a valid X-Profile header (see POST /admin/profile/token)
+is sampled from start to the last body chunk, on the threads serving it
+only. The session name is returned in an X-Profile-Id response header and
+the stacks are written to PROFILER_DIR. Requests without the header only pay
+for a header scan.
+"""
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+
+from app import profiler
+
+_HEADER = profiler.PROFILE_HEADER.lower().encode("latin-1")
+
+
+class ProfilerMiddleware:
+    def __init__(self, app, sampler: profiler.StackSampler | None = None):
+        self.app = app
+        self.sampler = sampler or profiler.sampler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = None
+        for key, value in scope["headers"]:
+            if key == _HEADER:
+                token = value.decode("latin-1")
+                break
+        if (
+            token is None
+            or self.sampler.active >= profiler.PROFILER_MAX_CONCURRENT
+            or not profiler.verify_profile_token(token)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        session = self.sampler.begin(profiler.session_name("request"), scoped=True)
+        token = profiler.set_request_session(session)
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Profile-Id", session.name)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.reset_request_session(token)
+            await run_in_threadpool(self.sampler.end, session)
@@ -0,0 +1,65 @@
+"""
+Server-Timing header and structured request logs.
+
+ServerTimingMiddleware opens the per-request RequestTimings (see app.timing),
+adds a Server-Timing header when the response starts and, once the body has
+been sent, logs one JSON line per request to the "app.timing" logger.
+"""
+import json
+import logging
+import time
+
+from starlette.datastructures import MutableHeaders
+
+from app import timing
+
+logger = logging.getLogger("app.timing")
+
+
+class ServerTimingMiddleware:
+    """
+    Args:
+        app: The wrapped ASGI app
+        log: Emit a structured log line per request
+    """
+
+    def __init__(self, app, log: bool = True):
+        self.app = app
+        self.log = log
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings, token = timing.start()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                now = time.perf_counter()
+                if timings.handler_finished is not None:
+                    timings.add("response", now - timings.handler_finished)
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", timings.header(now - timings.started))
+                headers.append("X-Query-Count", str(timings.queries))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            timing.finish(token)
+            if self.log and logger.isEnabledFor(logging.INFO):
+                route = scope.get("route")
+                logger.info(json.dumps({
+                    "event": "request",
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": getattr(route, "path", None),
+                    "status": status,
+                    "duration_ms": round((time.perf_counter() - timings.started) * 1000, 3),
+                    "queries": timings.queries,
+                    "phases": timings.as_dict(),
+                }))
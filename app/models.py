@@ -1,7 +0,0 @@
-# Models are now organized in the models package
-# Import them from app.models subpackages
-from app.models.user import User
-from app.models.calculation import Calculation
-
-__all__ = ["User", "Calculation"]
-
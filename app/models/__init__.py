@@ -1,4 +1,6 @@
 from .user import User
 from .calculation import Calculation
+from .job import Job
+from .tombstone import CalculationTombstone
 
-__all__ = ["User", "Calculation"]
+__all__ = ["User", "Calculation", "Job", "CalculationTombstone"]
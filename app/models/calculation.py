@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, String, ForeignKey
+from sqlalchemy import Column, Integer, Float, String, ForeignKey, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -7,10 +7,24 @@ class Calculation(Base):
     __tablename__ = "calculations"
 
     id = Column(Integer, primary_key=True, index=True)
-    a = Column(Float, nullable=False)
-    b = Column(Float, nullable=False)
-    type = Column(String(20), nullable=False)  # "Add", "Sub", "Multiply", "Divide"
+    a = Column(Float, nullable=True)  # NULL for array types
+    b = Column(Float, nullable=True)
+    type = Column(String(20), nullable=False)  # "Add", "Sub", "Multiply", "Divide", "Expression", or a reduction
+    expression = Column(String(500), nullable=True)  # formula over a and b, Expression only
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    # Optional operand references; a / b then hold the referenced result
+    a_ref_id = Column(Integer, ForeignKey("calculations.id", ondelete="SET NULL"), nullable=True, index=True)
+    b_ref_id = Column(Integer, ForeignKey("calculations.id", ondelete="SET NULL"), nullable=True, index=True)
+    # Array types (Sum, Product, Mean, Min, Max): packed little-endian float64
+    # operands, their count, and the reduction evaluated when they were written
+    operands = Column(LargeBinary, nullable=True)
+    operand_count = Column(Integer, nullable=True)
+    reduced = Column(Float, nullable=True)
+    # Owner's calc_version after the write that last changed this row; the
+    # delta sync feed (GET /api/calculations/changes) selects on it
+    seq = Column(Integer, nullable=True)
 
     # Relationship back to User
     user = relationship("User", back_populates="calculations")
+
+    __table_args__ = (Index("ix_calculations_user_seq", "user_id", "seq"),)
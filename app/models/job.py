@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, func
+from app.database import Base
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    kind = Column(String(20), nullable=False)  # "compute", "import", "export"
+    # "queued" -> "running" -> "succeeded" / "failed" / "cancelled"
+    # ("cancelling" while a running job finishes its current chunk)
+    status = Column(String(20), nullable=False, default="queued", index=True)
+    total = Column(Integer, nullable=False, default=0)
+    processed = Column(Integer, nullable=False, default=0)
+    eta_seconds = Column(Float, nullable=True)
+    error = Column(String(500), nullable=True)
+    result_path = Column(String(500), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    # Lease: refreshed on claim and after every chunk; a running job whose
+    # heartbeat is older than JOBS_LEASE_SECONDS lost its worker
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index, func
+from app.database import Base
+
+
+class CalculationTombstone(Base):
+    """
+    Record of a deleted calculation, kept so delta sync clients learn about
+    the delete. Compacted after TOMBSTONE_RETENTION_DAYS (app/services/sync.py).
+    """
+    __tablename__ = "calculation_tombstones"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    calc_id = Column(Integer, nullable=False)  # the deleted calculation's id
+    seq = Column(Integer, nullable=False)  # owner's calc_version after the delete
+    deleted_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
+
+    __table_args__ = (Index("ix_calculation_tombstones_user_seq", "user_id", "seq"),)
@@ -11,6 +11,10 @@ class User(Base):
     email = Column(String(255), unique=True, index=True, nullable=False)
     password_hash = Column(String(255), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Bumped by every calculation write for this user; used to build ETags
+    calc_version = Column(Integer, nullable=False, default=0, server_default="0")
+    # Highest tombstone seq compacted away; syncs from before it must start over
+    sync_floor = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Relationship to Calculation
     calculations = relationship("Calculation", back_populates="user", cascade="all, delete-orphan")
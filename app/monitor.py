@@ -0,0 +1,143 @@
+"""
+Event-loop lag and threadpool saturation.
+
+Sync endpoints and dependencies run on AnyIO's default threadpool. When every
+thread is busy, new requests queue in front of the pool before any app code
+runs. This module makes that visible:
+
+- LoopMonitor is an asyncio task that sleeps LOOP_MONITOR_INTERVAL seconds and
+  records how late it woke up (event_loop_lag_seconds). On the same tick it
+  samples the pool's CapacityLimiter into the threadpool_size, _busy and
+  _queued gauges, and logs the routes holding threads while tasks are queued.
+- ThreadTracker wraps sync endpoints (see timing.TimedRoute). It records how
+  long each request waited from arrival until its endpoint started on a
+  thread (threadpool_wait_seconds, per route), and which route each busy
+  thread is serving. When a wait exceeds THREADPOOL_WAIT_WARNING seconds, it
+  logs the routes currently holding threads (at most once per
+  THREADPOOL_WARNING_INTERVAL). If the request is being profiled, the thread
+  is added to its profile session (app.profiler) while the endpoint runs.
+
+The pool size itself is THREADPOOL_SIZE (AnyIO's default is 40).
+"""
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+from anyio import to_thread
+
+from app import profiler
+from app.metrics import EVENT_LOOP_LAG, THREADPOOL_BUSY, THREADPOOL_QUEUED, THREADPOOL_SIZE_GAUGE, THREADPOOL_WAIT
+
+logger = logging.getLogger("app.monitor")
+
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "1") == "1"
+LOOP_MONITOR_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", "0.5"))
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "40"))
+THREADPOOL_WAIT_WARNING = float(os.getenv("THREADPOOL_WAIT_WARNING", "0.5"))
+THREADPOOL_WARNING_INTERVAL = float(os.getenv("THREADPOOL_WARNING_INTERVAL", "10"))
+
+# perf_counter() when the current request entered the app; copied into worker threads
+request_received: contextvars.ContextVar[float | None] = contextvars.ContextVar("request_received", default=None)
+
+
+def configure_threadpool(size: int = THREADPOOL_SIZE) -> None:
+    """Resize AnyIO's default thread limiter; must run inside the event loop"""
+    to_thread.current_default_thread_limiter().total_tokens = size
+
+
+class ThreadTracker:
+    """Per-route threadpool wait times and the routes currently holding threads"""
+
+    def __init__(self, threshold: float = THREADPOOL_WAIT_WARNING, warning_interval: float = THREADPOOL_WARNING_INTERVAL):
+        self.threshold = threshold
+        self.warning_interval = warning_interval
+        self._running: dict[int, tuple[str, float]] = {}
+        self._last_warning = 0.0
+
+    def wrap(self, endpoint, route: str):
+        """Wrap a sync endpoint so its thread wait and occupancy are tracked"""
+        @functools.wraps(endpoint)
+        def tracked(*args, **kwargs):
+            started = time.perf_counter()
+            received = request_received.get()
+            if received is not None:
+                wait = started - received
+                THREADPOOL_WAIT.observe(wait, route)
+                if wait > self.threshold:
+                    self.warn({"route": route, "wait_seconds": round(wait, 3)})
+            ident = threading.get_ident()
+            self._running[ident] = (route, started)
+            try:
+                with profiler.request_thread():
+                    return endpoint(*args, **kwargs)
+            finally:
+                self._running.pop(ident, None)
+        return tracked
+
+    def holders(self) -> dict[str, dict]:
+        """{route: {"threads": n, "longest_seconds": s}} for endpoints running now"""
+        now = time.perf_counter()
+        holders: dict[str, dict] = {}
+        for route, started in list(self._running.values()):
+            entry = holders.setdefault(route, {"threads": 0, "longest_seconds": 0.0})
+            entry["threads"] += 1
+            entry["longest_seconds"] = max(entry["longest_seconds"], round(now - started, 3))
+        return holders
+
+    def warn(self, detail: dict) -> None:
+        """Log a threadpool_saturated event with the current holders (rate limited)"""
+        now = time.monotonic()
+        if now - self._last_warning < self.warning_interval:
+            return
+        self._last_warning = now
+        logger.warning(json.dumps({"event": "threadpool_saturated", **detail, "holders": self.holders()}))
+
+
+class LoopMonitor:
+    """asyncio task measuring event-loop lag and sampling threadpool usage"""
+
+    def __init__(self, interval: float = LOOP_MONITOR_INTERVAL, tracker: ThreadTracker | None = None):
+        self.interval = interval
+        self.tracker = tracker or thread_tracker
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Start on the running loop (call from the app lifespan)"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            EVENT_LOOP_LAG.observe(max(0.0, loop.time() - expected))
+            self.sample_threadpool()
+
+    def sample_threadpool(self) -> None:
+        """Update the threadpool gauges; log the holders while tasks are queued"""
+        limiter = to_thread.current_default_thread_limiter()
+        stats = limiter.statistics()
+        THREADPOOL_SIZE_GAUGE.set(limiter.total_tokens)
+        THREADPOOL_BUSY.set(stats.borrowed_tokens)
+        THREADPOOL_QUEUED.set(stats.tasks_waiting)
+        if stats.tasks_waiting:
+            self.tracker.warn({"queued": stats.tasks_waiting, "size": limiter.total_tokens})
+
+
+thread_tracker = ThreadTracker()
+loop_monitor = LoopMonitor()
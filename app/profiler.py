@@ -0,0 +1,228 @@
+"""
+On-demand sampling profiler.
+
+A StackSampler thread wakes every PROFILER_INTERVAL seconds, reads every
+other thread's current stack with sys._current_frames() and counts each
+distinct stack. Nothing is instrumented: the profiled code runs unchanged,
+and the thread only exists while a profiling session is open, so profiling
+costs nothing when inactive. While active the overhead is bounded by the
+sampling interval, PROFILER_MAX_DEPTH frames per stack and
+PROFILER_MAX_SECONDS per session.
+
+Sessions are opened either for one request (ProfilerMiddleware, triggered by
+a signed X-Profile header from POST /admin/profile/token) or for a time
+window (POST /admin/profile). A time-window session samples every thread. A
+request session only samples the threads serving that request: the event
+loop while it is running the request's task, and the worker threads running
+its sync endpoint (registered through request_thread()), so concurrent
+requests and background threads stay out of its flamegraph. Each session is
+written to PROFILER_DIR in the collapsed-stack format used by flamegraph.pl
+and speedscope:
+
+    thread;outer (file.py:12);inner (file.py:40) 17
+"""
+import asyncio
+import contextlib
+import contextvars
+import hashlib
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from app import security
+
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "1") == "1"
+PROFILER_DIR = os.getenv("PROFILER_DIR", "./profiles")
+PROFILER_INTERVAL = max(float(os.getenv("PROFILER_INTERVAL", "0.01")), 0.001)
+PROFILER_MAX_DEPTH = int(os.getenv("PROFILER_MAX_DEPTH", "64"))
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "60"))
+# Single-request sessions beyond this many at once run unprofiled
+PROFILER_MAX_CONCURRENT = int(os.getenv("PROFILER_MAX_CONCURRENT", "2"))
+PROFILE_TOKEN_TTL = 300
+
+PROFILE_HEADER = "X-Profile"
+
+
+class ProfileSession:
+    """
+    Stack counts collected while the session is open.
+
+    `threads` is None to sample every thread. Otherwise only the listed
+    thread idents are sampled; an ident mapped to an asyncio task (the event
+    loop thread) is only sampled while that task is the one running.
+    """
+
+    def __init__(self, name: str, max_seconds: float = PROFILER_MAX_SECONDS, scoped: bool = False):
+        self.name = name
+        self.started = time.monotonic()
+        self.deadline = self.started + max_seconds
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self.threads: dict[int, asyncio.Task | None] | None = {} if scoped else None
+
+    @property
+    def path(self) -> str:
+        return os.path.join(PROFILER_DIR, f"{self.name}.folded")
+
+
+class StackSampler:
+    """
+    One background sampling thread shared by all open sessions.
+
+    Args:
+        interval: Seconds between samples
+        max_depth: Innermost frames kept per stack
+    """
+
+    def __init__(self, interval: float = PROFILER_INTERVAL, max_depth: int = PROFILER_MAX_DEPTH):
+        self.interval = interval
+        self.max_depth = max_depth
+        self._sessions: list[ProfileSession] = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def active(self) -> int:
+        return len(self._sessions)
+
+    def begin(self, name: str, max_seconds: float = PROFILER_MAX_SECONDS, scoped: bool = False) -> ProfileSession:
+        """Open a session; `scoped` sessions only sample the threads added to session.threads"""
+        session = ProfileSession(name, min(max_seconds, PROFILER_MAX_SECONDS), scoped)
+        with self._lock:
+            self._sessions.append(session)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="stack-sampler", daemon=True)
+                self._thread.start()
+        return session
+
+    def end(self, session: ProfileSession) -> str:
+        """Close a session and write its collapsed stacks; returns the file path"""
+        with self._lock:
+            if session in self._sessions:
+                self._sessions.remove(session)
+        return write_collapsed(session)
+
+    def _loop(self) -> None:
+        own_id = threading.get_ident()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                expired = [session for session in self._sessions if now >= session.deadline]
+                for session in expired:
+                    self._sessions.remove(session)
+                sessions = list(self._sessions)
+                if not sessions:
+                    self._thread = None
+            for session in expired:
+                write_collapsed(session)
+            if not sessions:
+                return
+
+            frames = sys._current_frames()
+            frames.pop(own_id, None)
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks: dict[int, str] = {}
+
+            def stack(thread_id: int) -> str:
+                if thread_id not in stacks:
+                    stacks[thread_id] = self._collapse(names.get(thread_id, str(thread_id)), frames[thread_id])
+                return stacks[thread_id]
+
+            for session in sessions:
+                if session.threads is None:
+                    session.stacks.update(stack(thread_id) for thread_id in frames)
+                else:
+                    for thread_id, task in list(session.threads.items()):
+                        if thread_id in frames and (task is None or _running(task)):
+                            session.stacks[stack(thread_id)] += 1
+                session.samples += 1
+            time.sleep(self.interval)
+
+    def _collapse(self, thread_name: str, frame) -> str:
+        frames = []
+        while frame is not None and len(frames) < self.max_depth:
+            code = frame.f_code
+            frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        frames.append(thread_name.replace(" ", "_"))
+        return ";".join(reversed(frames))
+
+
+def _running(task: asyncio.Task) -> bool:
+    """Whether `task` is the one its event loop is executing right now"""
+    return asyncio.current_task(task.get_loop()) is task
+
+
+# The request session profiling the current request, if any
+_request_session: contextvars.ContextVar[ProfileSession | None] = contextvars.ContextVar(
+    "profile_session", default=None
+)
+
+
+def set_request_session(session: ProfileSession) -> contextvars.Token:
+    """Mark the current request as profiled by `session`; the calling task's loop thread is sampled"""
+    session.threads[threading.get_ident()] = asyncio.current_task()
+    return _request_session.set(session)
+
+
+def reset_request_session(token: contextvars.Token) -> None:
+    _request_session.reset(token)
+
+
+@contextlib.contextmanager
+def request_thread():
+    """Sample the current worker thread into the request's session while the block runs"""
+    session = _request_session.get()
+    if session is None:
+        yield
+        return
+    ident = threading.get_ident()
+    session.threads[ident] = None
+    try:
+        yield
+    finally:
+        session.threads.pop(ident, None)
+
+
+def write_collapsed(session: ProfileSession) -> str:
+    os.makedirs(PROFILER_DIR, exist_ok=True)
+    with open(session.path, "w") as f:
+        for stack, count in session.stacks.most_common():
+            f.write(f"{stack} {count}\n")
+    return session.path
+
+
+def session_name(kind: str) -> str:
+    return f"{kind}-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')}"
+
+
+def list_profiles() -> list[str]:
+    if not os.path.isdir(PROFILER_DIR):
+        return []
+    return sorted(name for name in os.listdir(PROFILER_DIR) if name.endswith(".folded"))
+
+
+# ---------- Signed single-request trigger ----------
+
+def _signature(expires: int) -> str:
+    return hmac.new(security.SECRET_KEY.encode(), f"profile:{expires}".encode(), hashlib.sha256).hexdigest()
+
+
+def create_profile_token(ttl: int = PROFILE_TOKEN_TTL) -> str:
+    """Value for the X-Profile header, valid for ttl seconds"""
+    expires = int(time.time()) + ttl
+    return f"{expires}.{_signature(expires)}"
+
+
+def verify_profile_token(value: str) -> bool:
+    expires, _, signature = value.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(signature, _signature(int(expires)))
+
+
+sampler = StackSampler()
@@ -0,0 +1,119 @@
+# app/routers/admin_router.py
+import os
+
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse
+
+from app import profiler
+from app.admin import require_admin
+from app.memory import memory_tracker, process_report
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+def _require_profiler() -> None:
+    if not profiler.PROFILER_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profiler is disabled",
+        )
+
+
+@router.post("/profile/token")
+def create_profile_token():
+    """Signed X-Profile header value; a request sending it is profiled"""
+    _require_profiler()
+    return {
+        "header": profiler.PROFILE_HEADER,
+        "value": profiler.create_profile_token(),
+        "expires_in": profiler.PROFILE_TOKEN_TTL,
+    }
+
+
+@router.post("/profile", status_code=202)
+def start_profile(seconds: float = Query(10.0, gt=0, le=profiler.PROFILER_MAX_SECONDS)):
+    """
+    Sample every thread of this worker for `seconds`. The profile is written
+    when the window closes and can then be fetched from /admin/profiles.
+    """
+    _require_profiler()
+    session = profiler.sampler.begin(profiler.session_name("window"), max_seconds=seconds)
+    return {"id": session.name, "seconds": seconds}
+
+
+@router.get("/profiles")
+def list_profiles():
+    """Collapsed-stack files written so far by this host"""
+    return {"profiles": profiler.list_profiles()}
+
+
+@router.get("/profiles/{name}")
+def read_profile(name: str):
+    """Download one collapsed-stack file (flamegraph.pl / speedscope input)"""
+    if name not in profiler.list_profiles():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found",
+        )
+    return FileResponse(os.path.join(profiler.PROFILER_DIR, name), media_type="text/plain")
+
+
+# ---------- Memory ----------
+
+@router.get("/memory")
+def read_memory_report():
+    """RSS, GC generation counters and tracemalloc totals for this worker"""
+    return process_report()
+
+
+@router.post("/memory/tracemalloc/start")
+def start_tracemalloc(frames: int = Query(10, ge=1, le=50)):
+    """Start tracing allocations (slows the worker down until stopped)"""
+    memory_tracker.start(frames)
+    return process_report()
+
+
+@router.post("/memory/tracemalloc/stop")
+def stop_tracemalloc():
+    """Stop tracing and drop all snapshots"""
+    memory_tracker.stop()
+    return process_report()
+
+
+@router.post("/memory/snapshots", status_code=201)
+def take_memory_snapshot():
+    """Take a numbered tracemalloc snapshot"""
+    try:
+        return memory_tracker.take()
+    except RuntimeError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+
+
+@router.get("/memory/snapshots")
+def list_memory_snapshots():
+    return {"snapshots": memory_tracker.snapshots()}
+
+
+@router.get("/memory/diff")
+def diff_memory_snapshots(
+    base: int,
+    current: int | None = None,
+    limit: int = Query(20, ge=1, le=200),
+    group_by: Literal["lineno", "filename", "traceback"] = "lineno",
+):
+    """
+    Allocation sites that grew between two snapshots, largest first.
+    Without `current` a new snapshot is taken now.
+    """
+    if current is None:
+        current = take_memory_snapshot()["id"]
+    try:
+        growth = memory_tracker.diff(base, current, limit=limit, group_by=group_by)
+    except KeyError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Snapshot {exc.args[0]} not found",
+        )
+    return {"base": base, "current": current, "top_growth": growth}
@@ -2,10 +2,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from app import schemas, crud, security
+from app import schemas, crud, security, metrics, timing
 from app.database import get_db
 
-router = APIRouter(tags=["auth"])
+router = APIRouter(tags=["auth"], route_class=timing.TimedRoute)
 
 
 @router.post("/register", response_model=schemas.Token)
@@ -46,6 +46,7 @@ def login(user_in: schemas.UserLogin, db: Session = Depends(get_db)):
     # Use your existing authentication helper if you have one
     user = crud.authenticate_user(db, email=user_in.email, password=user_in.password)
     if not user:
+        metrics.AUTH_FAILURES.inc("bad_credentials")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
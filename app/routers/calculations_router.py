@@ -1,11 +1,48 @@
 # app/routers/calculations_router.py
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 
-from app import schemas, crud, security
+from app import schemas, crud, security, etags, timing
+from app.cache import calculation_cache
 from app.database import get_db
+from app.events import EVENTS_HEARTBEAT, TooManySubscribers, event_hub
+from app.singleflight import SingleFlightTimeout, calculation_reads
+from app.services.reductions import unpack_operands
+from app.streaming import BINARY_MEDIA_TYPE, array_response
+
+router = APIRouter(prefix="/api/calculations", tags=["calculations-authenticated"], route_class=timing.TimedRoute)
+
+_calculation_adapter = TypeAdapter(schemas.CalculationRead)
+_calculation_list_adapter = TypeAdapter(list[schemas.CalculationRead])
+
 
-router = APIRouter(prefix="/api/calculations", tags=["calculations-authenticated"])
+def _json_response(body: bytes, etag: str) -> Response:
+    response = Response(content=body, media_type="application/json")
+    etags.set_etag(response, etag)
+    return response
+
+
+def _coalesced(user, cache_key: str, build) -> bytes:
+    """
+    Build a cache entry once for all identical concurrent reads.
+
+    The key includes calc_version, so requests on either side of a write
+    never share a result. Errors raised by build reach every waiter.
+    """
+    try:
+        return calculation_reads.do((user.id, user.calc_version, cache_key), build)
+    except SingleFlightTimeout:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Timed out waiting for an identical request",
+            headers={"Retry-After": "1"},
+        )
 
 
 @router.post("/", response_model=schemas.CalculationRead, status_code=201)
@@ -29,6 +66,7 @@ def create_calculation(
 
 @router.get("/", response_model=list[schemas.CalculationRead])
 def read_calculations(
+    request: Request,
     current_user_email: str = Depends(security.get_current_user_email),
     db: Session = Depends(get_db),
 ):
@@ -40,14 +78,135 @@ def read_calculations(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
         )
-    
-    calculations = crud.get_user_calculations(db, user.id)
-    return calculations
+
+    # Answer conditional requests before querying any calculation rows
+    etag = etags.calculations_etag(user.id, user.calc_version)
+    if etags.is_not_modified(request, etag):
+        return etags.not_modified_response(etag)
+
+    # Serve the serialized list from the per-user cache when it is current
+    cache_key = calculation_cache.list_key()
+    body = calculation_cache.get(user.id, cache_key, user.calc_version)
+    if body is None:
+        def build() -> bytes:
+            rows = crud.get_user_calculation_rows(db, user.id)
+            with timing.phase("serialize"):
+                body = _calculation_list_adapter.dump_json(
+                    _calculation_list_adapter.validate_python(rows, from_attributes=True)
+                )
+            calculation_cache.set(user.id, cache_key, user.calc_version, body)
+            return body
+
+        body = _coalesced(user, cache_key, build)
+    return _json_response(body, etag)
+
+
+@router.get("/changes", response_model=schemas.CalculationChanges)
+def read_calculation_changes(
+    since: int = Query(0, ge=0, description="seq from the previous sync; 0 for a full list"),
+    current_user_email: str = Depends(security.get_current_user_email),
+    db: Session = Depends(get_db),
+):
+    """
+    Delta sync: calculations created, updated or deleted after `since`, in
+    the order they were written. Answers 410 when `since` can no longer be
+    served (tombstones compacted, or a seq this server never issued); the
+    client then syncs again from since=0.
+    """
+    user = crud.get_user_by_email(db, current_user_email)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+        )
+    if since > user.calc_version or 0 < since < user.sync_floor:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail=f"Changes since {since} are no longer available; sync again from since=0",
+        )
+
+    rows, tombstones = crud.get_calculation_changes(db, user.id, since)
+    changes = [
+        {"op": "upsert", "id": row.id, "seq": row.seq or 0, "calculation": row}
+        for row in rows
+    ]
+    if tombstones:
+        changes.extend({"op": "delete", "id": calc_id, "seq": seq} for calc_id, seq in tombstones)
+        changes.sort(key=lambda change: change["seq"])  # stable: upserts of a seq stay in id order
+    seq = max([user.calc_version, *(change["seq"] for change in changes)])
+    return {"seq": seq, "full": since == 0, "changes": changes}
+
+
+@router.post("/events/ticket", response_model=schemas.StreamTicket)
+def create_events_ticket(current_user_email: str = Depends(security.get_current_user_email)):
+    """
+    Ticket for opening the event stream with EventSource, which cannot send
+    an Authorization header. It expires after STREAM_TICKET_TTL seconds and
+    is rejected by every other endpoint.
+    """
+    return {
+        "ticket": security.create_stream_ticket(current_user_email),
+        "expires_in": security.STREAM_TICKET_TTL,
+    }
+
+
+@router.get("/events")
+async def calculation_events(
+    current_user_email: str = Depends(security.get_stream_user_email),
+    db: Session = Depends(get_db),
+):
+    """
+    Live create/update/delete events for the logged-in user's calculations,
+    as Server-Sent Events (see app/events.py for the payloads). EventSource
+    clients authenticate with ?ticket= from POST /api/calculations/events/ticket.
+    """
+    user = await run_in_threadpool(crud.get_user_by_email, db, current_user_email)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+        )
+    user_id = user.id
+    # The stream may stay open for hours; don't hold a pooled connection for it
+    db.close()
+    # Subscribe before responding so a full hub is a 503, not an empty stream
+    try:
+        subscription = event_hub.subscribe(user_id)
+    except TooManySubscribers:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many open event streams",
+            headers={"Retry-After": "5"},
+        )
+
+    async def stream():
+        try:
+            # Events from here on are delivered; clients load the list after "ready"
+            yield "event: ready\ndata: {}\n\n"
+            while True:
+                item = await subscription.get(EVENTS_HEARTBEAT)
+                if item is None:
+                    yield ": keepalive\n\n"
+                    continue
+                event_id, event = item
+                yield f"id: {event_id}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            event_hub.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # The generator's finally only runs if it was started; this covers a
+        # response that ends before its first chunk (unsubscribe is idempotent)
+        background=BackgroundTask(event_hub.unsubscribe, subscription),
+    )
 
 
 @router.get("/{calc_id}", response_model=schemas.CalculationRead)
 def read_calculation(
     calc_id: int,
+    request: Request,
     current_user_email: str = Depends(security.get_current_user_email),
     db: Session = Depends(get_db),
 ):
@@ -59,14 +218,69 @@ def read_calculation(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
         )
-    
-    calculation = crud.get_calculation_by_id_and_user(db, calc_id, user.id)
-    if not calculation:
+
+    # The row hasn't been looked up yet, so "*" can't match here
+    etag = etags.calculations_etag(user.id, user.calc_version, calc_id)
+    if etags.is_not_modified(request, etag, exists=False):
+        return etags.not_modified_response(etag)
+
+    cache_key = calculation_cache.calc_key(calc_id)
+    body = calculation_cache.get(user.id, cache_key, user.calc_version)
+    if body is None:
+        def build() -> bytes:
+            calculation = crud.get_calculation_row_by_id_and_user(db, calc_id, user.id)
+            if not calculation:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Calculation not found or you don't have permission to access it",
+                )
+            with timing.phase("serialize"):
+                body = _calculation_adapter.dump_json(
+                    _calculation_adapter.validate_python(calculation, from_attributes=True)
+                )
+            calculation_cache.set(user.id, cache_key, user.calc_version, body)
+            return body
+
+        body = _coalesced(user, cache_key, build)
+    if etags.is_not_modified(request, etag):
+        return etags.not_modified_response(etag)
+    return _json_response(body, etag)
+
+
+@router.get("/{calc_id}/operands")
+def read_calculation_operands(
+    calc_id: int,
+    request: Request,
+    current_user_email: str = Depends(security.get_current_user_email),
+    db: Session = Depends(get_db),
+):
+    """
+    Read the operands of an array calculation (Sum, Product, Mean, Min, Max).
+
+    Returns {"operands": [...]} or, when the client accepts
+    application/octet-stream, the packed little-endian float64 values.
+    Large arrays are streamed.
+    """
+    user = crud.get_user_by_email(db, current_user_email)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+        )
+
+    row = crud.get_calculation_operands(db, calc_id, user.id)
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Calculation not found or you don't have permission to access it",
         )
-    return calculation
+    if row.operands is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{row.type} calculations have no operand array",
+        )
+    binary = BINARY_MEDIA_TYPE in request.headers.get("accept", "")
+    return array_response(unpack_operands(row.operands), "operands", binary)
 
 
 @router.put("/{calc_id}", response_model=schemas.CalculationRead)
@@ -0,0 +1,122 @@
+# app/routers/compute_router.py
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+
+from app import schemas, security
+from app.schemas.compute import COMPUTE_MAX_BATCH
+from app.services.factory import CalculationFactory
+from app.streaming import BINARY_MEDIA_TYPE, array_response
+
+router = APIRouter(prefix="/api/compute", tags=["compute"])
+
+# Bytes per row in the packed format: float64 a, float64 b, uint8 type code
+_PACKED_ROW_SIZE = 8 + 8 + 1
+# Generous JSON bytes per row (three full-precision values, separators and
+# pretty-printing) plus room for the keys and brackets
+_JSON_ROW_SIZE = 128
+_JSON_OVERHEAD = 1024
+
+
+def _max_body_size(binary: bool) -> int:
+    """Largest body a COMPUTE_MAX_BATCH batch can need"""
+    if binary:
+        return COMPUTE_MAX_BATCH * _PACKED_ROW_SIZE
+    return COMPUTE_MAX_BATCH * _JSON_ROW_SIZE + _JSON_OVERHEAD
+
+
+def _too_large(limit: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Request body too large (max {limit} bytes)")
+
+
+async def _read_body(request: Request, limit: int) -> bytes:
+    """
+    Read the body, rejecting it with 413 as soon as it exceeds `limit`: up
+    front from Content-Length, otherwise while it streams in, so an oversized
+    upload is never buffered whole.
+    """
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > limit:
+        raise _too_large(limit)
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            raise _too_large(limit)
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _unpack_binary(body: bytes) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Split a packed body into columns.
+
+    Layout (little-endian): n float64 `a` values, then n float64 `b` values,
+    then n uint8 type codes (index into CalculationFactory.TYPE_CODES).
+    """
+    n, remainder = divmod(len(body), _PACKED_ROW_SIZE)
+    if remainder:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Packed body length must be a multiple of {_PACKED_ROW_SIZE} bytes",
+        )
+    if n > COMPUTE_MAX_BATCH:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Batch too large: {n} rows (max {COMPUTE_MAX_BATCH})",
+        )
+    a = np.frombuffer(body, dtype="<f8", count=n, offset=0)
+    b = np.frombuffer(body, dtype="<f8", count=n, offset=8 * n)
+    codes = np.frombuffer(body, dtype=np.uint8, count=n, offset=16 * n)
+
+    # Validate the whole batch in one pass, as ComputeRequest does for JSON
+    if n and codes.max() >= len(CalculationFactory.TYPE_CODES):
+        raise HTTPException(
+            status_code=422,
+            detail=f"Invalid type code; must be 0-{len(CalculationFactory.TYPE_CODES) - 1}",
+        )
+    divide_code = CalculationFactory.TYPE_CODES.index(schemas.CalcType.Divide)
+    zero_rows = np.flatnonzero((codes == divide_code) & (b == 0))
+    if zero_rows.size:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Divisor (b) cannot be zero for Divide operation (rows {zero_rows[:10].tolist()})",
+        )
+    return a, b, codes
+
+
+def _compute(body: bytes, binary: bool) -> np.ndarray:
+    if binary:
+        a, b, types = _unpack_binary(body)
+    else:
+        try:
+            batch = schemas.ComputeRequest.model_validate_json(body)
+        except ValidationError as exc:
+            raise RequestValidationError(exc.errors())
+        a, b, types = batch.a, batch.b, batch.type
+    # Zero divisors were rejected above, so "nan" never masks a real error here
+    return CalculationFactory.execute_many(types, a, b, errors="nan")
+
+
+@router.post("", response_model=schemas.ComputeResponse)
+async def compute(
+    request: Request,
+    current_user_email: str = Depends(security.get_current_user_email),
+):
+    """
+    Compute a batch of calculations without storing anything.
+
+    Accepts either JSON columns ({"a": [...], "b": [...], "type": [...]}) or,
+    with Content-Type application/octet-stream, the packed layout described
+    in _unpack_binary. The response uses the same format as the request:
+    {"results": [...]} or packed little-endian float64 results. Large batches
+    are streamed. No database session is opened.
+    """
+    binary = request.headers.get("content-type", "").startswith(BINARY_MEDIA_TYPE)
+    body = await _read_body(request, _max_body_size(binary))
+    # Parsing, validation and the vectorized pass are CPU-bound; keep them off the event loop
+    results = await run_in_threadpool(_compute, body, binary)
+    return array_response(results, "results", binary)
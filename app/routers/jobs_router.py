@@ -0,0 +1,97 @@
+# app/routers/jobs_router.py
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from app import schemas, crud, security, timing
+from app.database import get_db
+from app.services import jobs
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"], route_class=timing.TimedRoute)
+
+
+def _current_user(current_user_email: str, db: Session):
+    user = crud.get_user_by_email(db, current_user_email)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+        )
+    return user
+
+
+def _user_job(db: Session, job_id: int, user_id: int):
+    job = jobs.get_job_by_id_and_user(db, job_id, user_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found or you don't have permission to access it",
+        )
+    return job
+
+
+@router.post("/", response_model=schemas.JobRead, status_code=202)
+def create_job(
+    job_in: schemas.JobCreate,
+    current_user_email: str = Depends(security.get_current_user_email),
+    db: Session = Depends(get_db),
+):
+    """Queue a background compute, import or export job"""
+    user = _current_user(current_user_email, db)
+    return jobs.submit_job(db, user.id, job_in)
+
+
+@router.get("/", response_model=list[schemas.JobRead])
+def read_jobs(
+    current_user_email: str = Depends(security.get_current_user_email),
+    db: Session = Depends(get_db),
+):
+    """List the logged-in user's jobs"""
+    user = _current_user(current_user_email, db)
+    return jobs.get_user_jobs(db, user.id)
+
+
+@router.get("/{job_id}", response_model=schemas.JobRead)
+def read_job(
+    job_id: int,
+    current_user_email: str = Depends(security.get_current_user_email),
+    db: Session = Depends(get_db),
+):
+    """Read a job's status, progress and ETA"""
+    user = _current_user(current_user_email, db)
+    return _user_job(db, job_id, user.id)
+
+
+@router.post("/{job_id}/cancel", response_model=schemas.JobRead)
+def cancel_job(
+    job_id: int,
+    current_user_email: str = Depends(security.get_current_user_email),
+    db: Session = Depends(get_db),
+):
+    """Cancel a queued or running job"""
+    user = _current_user(current_user_email, db)
+    job = _user_job(db, job_id, user.id)
+    return jobs.cancel_job(db, job)
+
+
+@router.get("/{job_id}/result")
+def read_job_result(
+    job_id: int,
+    current_user_email: str = Depends(security.get_current_user_email),
+    db: Session = Depends(get_db),
+):
+    """
+    Download a finished job's output: packed little-endian float64 results
+    for compute jobs, CSV for export jobs.
+    """
+    user = _current_user(current_user_email, db)
+    job = _user_job(db, job_id, user.id)
+    if job.status != "succeeded" or not job.result_path or not os.path.exists(job.result_path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job has no result",
+        )
+    media_type = "text/csv" if job.kind == "export" else "application/octet-stream"
+    return FileResponse(job.result_path, media_type=media_type, filename=os.path.basename(job.result_path))
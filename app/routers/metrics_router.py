@@ -0,0 +1,16 @@
+# app/routers/metrics_router.py
+from fastapi import APIRouter
+from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
+
+from app import metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def read_metrics():
+    """Prometheus scrape endpoint (summed over all workers in multiprocess mode)"""
+    # Multiprocess mode reads every worker's snapshot file; keep that off the event loop
+    snapshot = await run_in_threadpool(metrics.collect)
+    return Response(content=metrics.render(snapshot), media_type=metrics.CONTENT_TYPE)
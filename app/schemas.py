@@ -8,6 +8,8 @@ from app.schemas.calculation import (
     CalcType,
 )
 from app.schemas.token import Token
+from app.schemas.compute import ComputeRequest, ComputeResponse
+from app.schemas.job import JobCreate, JobRead
 
 __all__ = [
     "UserCreate",
@@ -19,4 +21,8 @@ __all__ = [
     "CalculationUpdate",
     "CalcType",
     "Token",
+    "ComputeRequest",
+    "ComputeResponse",
+    "JobCreate",
+    "JobRead",
 ]
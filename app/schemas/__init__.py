@@ -1,5 +1,8 @@
 from .user import UserCreate, UserRegister, UserRead, UserLogin
 from .calculation import CalculationCreate, CalculationRead, CalculationUpdate, CalcType
-from .token import Token
+from .token import Token, StreamTicket
+from .compute import ComputeRequest, ComputeResponse
+from .job import JobCreate, JobRead
+from .sync import CalculationChange, CalculationChanges
 
-__all__ = ["UserCreate", "UserRegister", "UserRead", "UserLogin", "CalculationCreate", "CalculationRead", "CalculationUpdate", "CalcType", "Token"]
+__all__ = ["UserCreate", "UserRegister", "UserRead", "UserLogin", "CalculationCreate", "CalculationRead", "CalculationUpdate", "CalcType", "Token", "StreamTicket", "ComputeRequest", "ComputeResponse", "JobCreate", "JobRead", "CalculationChange", "CalculationChanges"]
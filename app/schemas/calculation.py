@@ -1,8 +1,11 @@
-from pydantic import BaseModel, model_validator, computed_field, ConfigDict
+from pydantic import BaseModel, model_validator, computed_field, ConfigDict, Field
 from enum import Enum
 from pydantic import BaseModel
 from typing import Optional
 
+from app.services.expression import compile_expression, evaluate_expression
+from app.services.reductions import ARRAY_MAX_OPERANDS, is_array_type
+
 
 class CalcType(str, Enum):
     """Enum for calculation types"""
@@ -10,13 +13,77 @@ class CalcType(str, Enum):
     Sub = "Sub"
     Multiply = "Multiply"
     Divide = "Divide"
+    Expression = "Expression"
+    # Array-valued reductions over `operands`
+    Sum = "Sum"
+    Product = "Product"
+    Mean = "Mean"
+    Min = "Min"
+    Max = "Max"
+
+
+def calculate_result(
+    type: CalcType | str,
+    a: float | None,
+    b: float | None,
+    expression: str | None = None,
+    reduced: float | None = None,
+) -> float:
+    """Result of one calculation row; shared by CalculationRead and crud recomputation"""
+    if is_array_type(type):
+        # Reductions are evaluated once when the operands are written
+        if reduced is None:
+            raise ValueError(f"{type} calculation has no operands")
+        return reduced
+    elif type == CalcType.Add:
+        return a + b
+    elif type == CalcType.Sub:
+        return a - b
+    elif type == CalcType.Multiply:
+        return a * b
+    elif type == CalcType.Divide:
+        if b == 0:
+            raise ValueError("Cannot divide by zero")
+        return a / b
+    elif type == CalcType.Expression:
+        return evaluate_expression(expression or "", a=a, b=b)
+    else:
+        raise ValueError(f"Unknown operation type: {type}")
 
 
 class CalculationCreate(BaseModel):
-    """Schema for creating a calculation"""
-    a: float
-    b: float
+    """
+    Schema for creating a calculation.
+    An operand may be taken from another calculation's result by giving
+    a_ref_id / b_ref_id instead of a / b. Array types (Sum, Product, Mean,
+    Min, Max) take `operands` instead of a and b.
+    """
+    a: Optional[float] = None
+    b: Optional[float] = None
     type: CalcType
+    expression: Optional[str] = None
+    a_ref_id: Optional[int] = None
+    b_ref_id: Optional[int] = None
+    operands: Optional[list[float]] = None
+
+    @model_validator(mode='after')
+    def check_operands(self):
+        """Validate that each operand is given as a value or a reference"""
+        if is_array_type(self.type):
+            if not self.operands:
+                raise ValueError(f"operands are required for {self.type.value} operation")
+            if len(self.operands) > ARRAY_MAX_OPERANDS:
+                raise ValueError(f"Too many operands (max {ARRAY_MAX_OPERANDS})")
+            if any(v is not None for v in (self.a, self.b, self.a_ref_id, self.b_ref_id)):
+                raise ValueError(f"a, b and references are not allowed for {self.type.value} operation")
+            return self
+        if self.operands is not None:
+            raise ValueError("operands are only allowed for array operations")
+        if self.a is None and self.a_ref_id is None:
+            raise ValueError("Either a or a_ref_id must be provided")
+        if self.b is None and self.b_ref_id is None:
+            raise ValueError("Either b or b_ref_id must be provided")
+        return self
 
     @model_validator(mode='after')
     def check_divide_by_zero(self):
@@ -25,13 +92,36 @@ class CalculationCreate(BaseModel):
             raise ValueError("Divisor (b) cannot be zero for Divide operation")
         return self
 
+    @model_validator(mode='after')
+    def check_expression(self):
+        """Validate that Expression rows carry a formula that compiles and evaluates"""
+        if self.type == CalcType.Expression:
+            if not self.expression:
+                raise ValueError("Expression is required for Expression operation")
+            if self.a is None or self.b is None:
+                # Referenced operands are resolved later; only check the formula compiles
+                compile_expression(self.expression)
+            else:
+                evaluate_expression(self.expression, a=self.a, b=self.b)
+        elif self.expression is not None:
+            raise ValueError("Expression is only allowed for Expression operation")
+        return self
+
 
 class CalculationRead(BaseModel):
-    """Schema for reading a calculation with computed result"""
+    """
+    Schema for reading a calculation with computed result.
+    Array operands are not inlined; fetch them from the operands endpoint.
+    """
     id: int
-    a: float
-    b: float
+    a: float | None = None
+    b: float | None = None
     type: CalcType
+    expression: str | None = None
+    a_ref_id: int | None = None
+    b_ref_id: int | None = None
+    operand_count: int | None = None
+    reduced: float | None = Field(default=None, exclude=True)
     user_id: int | None = None
 
     model_config = ConfigDict(from_attributes=True)
@@ -40,19 +130,7 @@ class CalculationRead(BaseModel):
     @property
     def result(self) -> float:
         """Compute result on-demand based on operation type"""
-        if self.type == CalcType.Add:
-            return self.a + self.b
-        elif self.type == CalcType.Sub:
-            return self.a - self.b
-        elif self.type == CalcType.Multiply:
-            return self.a * self.b
-        elif self.type == CalcType.Divide:
-            if self.b == 0:
-                raise ValueError("Cannot divide by zero")
-            return self.a / self.b
-        else:
-            raise ValueError(f"Unknown operation type: {self.type}")
-
+        return calculate_result(self.type, self.a, self.b, self.expression, self.reduced)
 
 
 class CalculationUpdate(BaseModel):
@@ -63,4 +141,16 @@ class CalculationUpdate(BaseModel):
     a: Optional[float] = None
     b: Optional[float] = None
     type: Optional[CalcType] = None
+    expression: Optional[str] = None
+    # Set to another calculation's id to follow its result, or null to detach
+    a_ref_id: Optional[int] = None
+    b_ref_id: Optional[int] = None
+    operands: Optional[list[float]] = None
+
+    @model_validator(mode='after')
+    def check_expression(self):
+        """Validate that a provided formula compiles"""
+        if self.expression is not None:
+            compile_expression(self.expression)
+        return self
 
@@ -0,0 +1,44 @@
+import os
+
+import numpy as np
+from pydantic import BaseModel, model_validator
+
+from app.services.factory import CalculationFactory
+
+from .calculation import CalcType
+
+COMPUTE_MAX_BATCH = int(os.getenv("COMPUTE_MAX_BATCH", "1000000"))
+
+
+class ComputeRequest(BaseModel):
+    """
+    Columnar batch for stateless computation.
+    Row i is `a[i] <type[i]> b[i]`.
+    """
+    a: list[float]
+    b: list[float]
+    type: list[CalcType]
+
+    @model_validator(mode='after')
+    def check_batch(self):
+        """Validate the whole batch at once: equal lengths, size cap, no zero divisors"""
+        n = len(self.a)
+        if len(self.b) != n or len(self.type) != n:
+            raise ValueError("a, b and type must have the same length")
+        if n > COMPUTE_MAX_BATCH:
+            raise ValueError(f"Batch too large: {n} rows (max {COMPUTE_MAX_BATCH})")
+        if not set(self.type) <= set(CalculationFactory.TYPE_CODES):
+            raise ValueError("Only Add, Sub, Multiply and Divide rows are supported in batch compute")
+        b = np.asarray(self.b, dtype=np.float64)
+        divide = np.fromiter((t is CalcType.Divide for t in self.type), dtype=bool, count=n)
+        zero_rows = np.flatnonzero(divide & (b == 0))
+        if zero_rows.size:
+            raise ValueError(
+                f"Divisor (b) cannot be zero for Divide operation (rows {zero_rows[:10].tolist()})"
+            )
+        return self
+
+
+class ComputeResponse(BaseModel):
+    """Results aligned with the request rows; non-finite results are null"""
+    results: list[float | None]
@@ -0,0 +1,43 @@
+from datetime import datetime
+from typing import Literal, Optional
+
+from pydantic import BaseModel, ConfigDict, model_validator
+
+from .compute import ComputeRequest
+
+
+class JobCreate(BaseModel):
+    """
+    Schema for submitting a background job.
+
+    compute: evaluate `data` and store the results as a downloadable file
+    import:  insert `data` rows as calculations owned by the user
+    export:  write the user's calculations with results to a CSV file
+    """
+    kind: Literal["compute", "import", "export"]
+    data: Optional[ComputeRequest] = None
+
+    @model_validator(mode='after')
+    def check_data(self):
+        """Validate that data is given exactly for the kinds that need it"""
+        if self.kind in ("compute", "import") and self.data is None:
+            raise ValueError(f"data is required for {self.kind} jobs")
+        if self.kind == "export" and self.data is not None:
+            raise ValueError("data is not allowed for export jobs")
+        return self
+
+
+class JobRead(BaseModel):
+    """Schema for reading a job's state and progress"""
+    id: int
+    kind: str
+    status: str
+    total: int
+    processed: int
+    eta_seconds: float | None = None
+    error: str | None = None
+    created_at: datetime | None = None
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    model_config = ConfigDict(from_attributes=True)
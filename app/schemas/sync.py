@@ -0,0 +1,28 @@
+from typing import Literal, Optional
+
+from pydantic import BaseModel
+
+from .calculation import CalculationRead
+
+
+class CalculationChange(BaseModel):
+    """
+    One entry of the delta sync feed. "upsert" carries the calculation as it
+    is now; "delete" only its id. Apply entries in order.
+    """
+    op: Literal["upsert", "delete"]
+    id: int
+    seq: int
+    calculation: Optional[CalculationRead] = None
+
+
+class CalculationChanges(BaseModel):
+    """
+    Response of GET /api/calculations/changes.
+
+    Pass `seq` as ?since= on the next sync. When `full` is true (since=0) the
+    changes are the complete list and replace any local state.
+    """
+    seq: int
+    full: bool
+    changes: list[CalculationChange]
@@ -3,3 +3,9 @@ from pydantic import BaseModel
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
+
+
+class StreamTicket(BaseModel):
+    """Short-lived ?ticket= value for GET /api/calculations/events"""
+    ticket: str
+    expires_in: int
@@ -1,15 +1,27 @@
+import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer
 from fastapi.security.http import HTTPAuthorizationCredentials
 
+from app import metrics, timing
+
 # Configuration
 SECRET_KEY = "change-me-to-a-long-random-secret"  # move to env later if you want
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
+# Stream tickets stand in for the access token in event stream URLs, which
+# end up in access logs and browser history; they only open the stream
+STREAM_TICKET_SCOPE = "calculation-events"
+STREAM_TICKET_TTL = int(os.getenv("STREAM_TICKET_TTL", "30"))
+# Decoded payloads of recently seen valid tokens; 0 disables the cache
+JWT_DECODE_CACHE_SIZE = int(os.getenv("JWT_DECODE_CACHE_SIZE", "1024"))
 
 # Use PBKDF2-SHA256 instead of bcrypt to avoid backend issues
 pwd_context = CryptContext(
@@ -19,12 +31,19 @@ pwd_context = CryptContext(
 
 # Security scheme for bearer token
 security = HTTPBearer()
+# Event streams also accept ?ticket=, since EventSource cannot send headers
+_optional_security = HTTPBearer(auto_error=False)
+
+_decode_cache: OrderedDict[str, dict] = OrderedDict()
+_decode_cache_lock = threading.Lock()
 
 def hash_password(plain_password: str) -> str:
-    return pwd_context.hash(plain_password)
+    with metrics.PASSWORD_HASH_DURATION.time("hash"):
+        return pwd_context.hash(plain_password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    with metrics.PASSWORD_HASH_DURATION.time("verify"):
+        return pwd_context.verify(plain_password, hashed_password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
@@ -33,16 +52,59 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+def create_stream_ticket(email: str) -> str:
+    """Short-lived token that only authenticates GET /api/calculations/events"""
+    return create_access_token(
+        {"sub": email, "scope": STREAM_TICKET_SCOPE}, expires_delta=timedelta(seconds=STREAM_TICKET_TTL)
+    )
+
 def decode_token(token: str) -> dict:
     """
     Decode a JWT token and return the payload.
     Returns empty dict if token is invalid.
+
+    Valid tokens are kept in a small LRU cache so repeat requests skip the
+    signature check; a cached payload is still rejected once it expires.
     """
+    with _decode_cache_lock:
+        payload = _decode_cache.get(token)
+        if payload is not None:
+            _decode_cache.move_to_end(token)
+    if payload is not None:
+        if payload.get("exp", 0) > time.time():
+            metrics.JWT_DECODE_CACHE.inc("hit")
+            return dict(payload)
+        with _decode_cache_lock:
+            _decode_cache.pop(token, None)
+        return {}
+
+    metrics.JWT_DECODE_CACHE.inc("miss")
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
         return {}
+    if JWT_DECODE_CACHE_SIZE > 0 and "exp" in payload:
+        with _decode_cache_lock:
+            _decode_cache[token] = payload
+            if len(_decode_cache) > JWT_DECODE_CACHE_SIZE:
+                _decode_cache.popitem(last=False)
+    return dict(payload)
+
+
+def _email_from_token(token: str, scope: str | None = None) -> str:
+    """Email of a valid token issued for `scope` (None for access tokens)"""
+    with timing.phase("auth"):
+        payload = decode_token(token)
+    email = payload.get("sub")
+
+    if not email or payload.get("scope") != scope:
+        metrics.AUTH_FAILURES.inc("invalid_token")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return email
 
 
 def get_current_user_email(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
@@ -50,14 +112,25 @@ def get_current_user_email(credentials: HTTPAuthorizationCredentials = Depends(s
     Extract and verify the current user's email from the JWT token.
     Raises HTTPException if token is invalid.
     """
-    token = credentials.credentials
-    payload = decode_token(token)
-    email = payload.get("sub")
-    
-    if not email:
+    return _email_from_token(credentials.credentials)
+
+
+def get_stream_user_email(
+    ticket: str | None = Query(None),
+    credentials: HTTPAuthorizationCredentials | None = Depends(_optional_security),
+) -> str:
+    """
+    Like get_current_user_email, but EventSource clients, which cannot send
+    headers, pass a stream ticket (create_stream_ticket) as ?ticket= instead.
+    Access tokens are never accepted in the query string.
+    """
+    if credentials is not None:
+        return _email_from_token(credentials.credentials)
+    if not ticket:
+        metrics.AUTH_FAILURES.inc("invalid_token")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials",
+            detail="Not authenticated",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return email
+    return _email_from_token(ticket, scope=STREAM_TICKET_SCOPE)
@@ -0,0 +1,163 @@
+"""
+Synthetic data for production-scale runs.
+
+    python -m app.seed --users 10000 --calculations 100 --seed 42
+
+Inserts N users and on average M calculations per user. Per-user counts
+follow a Zipf-like skew, so a handful of users own a large share of the rows,
+as in production. Everything is derived from the seed, so the same arguments
+always produce the same rows.
+
+Every user gets the same precomputed password hash (SEED_PASSWORD) so no
+time is spent in PBKDF2. Calculations are generated as NumPy columns and
+written in batches straight through the DB-API cursor: executemany on SQLite
+(with synchronous writes off for the duration), COPY on PostgreSQL. The
+target is DATABASE_URL unless --database-url is given.
+"""
+import argparse
+import csv
+import io
+import time
+
+import numpy as np
+from sqlalchemy import create_engine, insert, select, text
+from sqlalchemy.engine import Engine
+
+from app import models, security
+from app.database import Base, engine as default_engine
+
+SEED_PASSWORD = "seed-password"
+SEED_EMAIL_DOMAIN = "seed.example.com"
+SEED_BATCH_ROWS = 50000
+OPERATIONS = ("Add", "Sub", "Multiply", "Divide")
+
+
+def calculation_counts(users: int, per_user: float, skew: float, rng: np.random.Generator) -> np.ndarray:
+    """
+    Split users * per_user calculations across users with a Zipf-like skew.
+
+    User i (in a seeded random order) gets weight 1 / rank**skew; skew=0
+    spreads rows evenly, larger values concentrate them on a few users.
+    """
+    total = int(round(users * per_user))
+    if users == 0:
+        return np.zeros(0, dtype=np.int64)
+    weights = 1.0 / np.arange(1, users + 1, dtype=np.float64) ** skew
+    weights = rng.permutation(weights)
+    return rng.multinomial(total, weights / weights.sum())
+
+
+def _insert_users(engine: Engine, users: int, seed: int) -> list[int]:
+    password_hash = security.hash_password(SEED_PASSWORD)
+    prefix = f"seed{seed}-"
+    rows = [
+        {"username": f"{prefix}{i}", "email": f"{prefix}{i}@{SEED_EMAIL_DOMAIN}", "password_hash": password_hash}
+        for i in range(users)
+    ]
+    with engine.begin() as conn:
+        for start in range(0, len(rows), SEED_BATCH_ROWS):
+            conn.execute(insert(models.User), rows[start:start + SEED_BATCH_ROWS])
+        id_by_name = dict(conn.execute(
+            select(models.User.username, models.User.id).where(models.User.username.like(f"{prefix}%"))
+        ).all())
+    return [id_by_name[f"{prefix}{i}"] for i in range(users)]
+
+
+def _copy_calculations(cursor, batch) -> None:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(batch)
+    buffer.seek(0)
+    cursor.copy_expert("COPY calculations (a, b, type, user_id) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def _insert_calculations(engine: Engine, user_ids: np.ndarray, rng: np.random.Generator) -> None:
+    total = user_ids.size
+    a = np.round(rng.uniform(-1000, 1000, total), 3)
+    b = np.round(rng.uniform(1, 1000, total), 3)  # never zero, so every Divide row is valid
+    types = np.asarray(OPERATIONS)[rng.integers(0, len(OPERATIONS), total)]
+    postgres = engine.dialect.name == "postgresql"
+
+    raw = engine.raw_connection()
+    cursor = raw.cursor()
+    synchronous = None
+    try:
+        if engine.dialect.name == "sqlite":
+            synchronous = cursor.execute("PRAGMA synchronous").fetchone()[0]
+            cursor.execute("PRAGMA synchronous = OFF")
+        for start in range(0, total, SEED_BATCH_ROWS):
+            end = start + SEED_BATCH_ROWS
+            batch = zip(a[start:end].tolist(), b[start:end].tolist(), types[start:end].tolist(), user_ids[start:end].tolist())
+            if postgres:
+                _copy_calculations(cursor, batch)
+            else:
+                cursor.executemany(
+                    "INSERT INTO calculations (a, b, type, user_id) VALUES (?, ?, ?, ?)"
+                    if engine.dialect.paramstyle == "qmark" else
+                    "INSERT INTO calculations (a, b, type, user_id) VALUES (%s, %s, %s, %s)",
+                    list(batch),
+                )
+        raw.commit()
+    finally:
+        # The connection goes back to the engine's pool; later writes on it
+        # must not inherit the unsynchronized bulk-load setting
+        if synchronous is not None:
+            raw.rollback()
+            cursor.execute(f"PRAGMA synchronous = {int(synchronous)}")
+        raw.close()
+
+
+def seed(
+    engine: Engine = default_engine,
+    users: int = 100,
+    calculations: float = 100,
+    skew: float = 1.1,
+    seed: int = 0,
+) -> dict:
+    """
+    Insert synthetic users and calculations.
+
+    Args:
+        engine: Target database; tables are created if missing
+        users: Number of users to add
+        calculations: Mean calculations per user
+        skew: Zipf exponent of the per-user distribution (0 = uniform)
+        seed: Random seed; also namespaces usernames so seeds can be combined
+
+    Returns:
+        dict with users, calculations, max_per_user and seconds
+    """
+    started = time.perf_counter()
+    Base.metadata.create_all(bind=engine)
+    rng = np.random.default_rng(seed)
+    counts = calculation_counts(users, calculations, skew, rng)
+    user_ids = _insert_users(engine, users, seed)
+    _insert_calculations(engine, np.repeat(np.asarray(user_ids, dtype=np.int64), counts), rng)
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE calculations"))
+    return {
+        "users": users,
+        "calculations": int(counts.sum()),
+        "max_per_user": int(counts.max()) if users else 0,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m app.seed", description="Insert synthetic users and calculations")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--calculations", type=float, default=100, help="Mean calculations per user")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent for per-user counts (0 = uniform)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database-url", help="Defaults to DATABASE_URL")
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate all tables first")
+    args = parser.parse_args()
+
+    target = create_engine(args.database_url) if args.database_url else default_engine
+    if args.reset:
+        Base.metadata.drop_all(bind=target)
+    result = seed(target, users=args.users, calculations=args.calculations, skew=args.skew, seed=args.seed)
+    print(
+        f"Inserted {result['users']} users and {result['calculations']} calculations "
+        f"(heaviest user: {result['max_per_user']}) in {result['seconds']:.1f}s"
+    )
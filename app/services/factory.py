@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
 from enum import Enum
 
+import numpy as np
+
 
 class CalcType(str, Enum):
     """Enum for calculation types"""
@@ -18,6 +20,11 @@ class Operation(ABC):
         """Execute the operation and return the result"""
         pass
 
+    @abstractmethod
+    def execute_array(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Execute the operation element-wise over float64 arrays"""
+        pass
+
 
 class Add(Operation):
     """Addition operation"""
@@ -25,6 +32,9 @@ class Add(Operation):
     def execute(self, a: float, b: float) -> float:
         return a + b
 
+    def execute_array(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        return np.add(a, b)
+
 
 class Sub(Operation):
     """Subtraction operation"""
@@ -32,6 +42,9 @@ class Sub(Operation):
     def execute(self, a: float, b: float) -> float:
         return a - b
 
+    def execute_array(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        return np.subtract(a, b)
+
 
 class Multiply(Operation):
     """Multiplication operation"""
@@ -39,6 +52,9 @@ class Multiply(Operation):
     def execute(self, a: float, b: float) -> float:
         return a * b
 
+    def execute_array(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        return np.multiply(a, b)
+
 
 class Divide(Operation):
     """Division operation"""
@@ -48,6 +64,12 @@ class Divide(Operation):
             raise ValueError("Cannot divide by zero")
         return a / b
 
+    def execute_array(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Zero divisors yield NaN; callers decide whether that is an error"""
+        out = np.full(a.shape, np.nan)
+        np.divide(a, b, out=out, where=b != 0)
+        return out
+
 
 class CalculationFactory:
     """Factory to get the correct Operation instance"""
@@ -59,6 +81,13 @@ class CalculationFactory:
         CalcType.Divide: Divide,
     }
 
+    # Operations are stateless, so one shared instance per type is enough.
+    # CalcType is a str enum, so plain strings like "Add" hit this dict too.
+    _instances = {calc_type: operation() for calc_type, operation in _operations.items()}
+
+    # Stable integer code per type, for compact batch encodings (index = code)
+    TYPE_CODES = (CalcType.Add, CalcType.Sub, CalcType.Multiply, CalcType.Divide)
+
     @classmethod
     def get_operation(cls, operation_type: CalcType | str) -> Operation:
         """
@@ -83,7 +112,7 @@ class CalculationFactory:
         if operation_type not in cls._operations:
             raise ValueError(f"Invalid operation type: {operation_type}")
 
-        return cls._operations[operation_type]()
+        return cls._instances[operation_type]
 
     @classmethod
     def execute(cls, operation_type: CalcType | str, a: float, b: float) -> float:
@@ -98,5 +127,60 @@ class CalculationFactory:
         Returns:
             Result of the operation
         """
-        operation = cls.get_operation(operation_type)
+        operation = cls._instances.get(operation_type)
+        if operation is None:
+            operation = cls.get_operation(operation_type)
         return operation.execute(a, b)
+
+    @classmethod
+    def execute_many(cls, types, a, b, errors: str = "raise") -> np.ndarray:
+        """
+        Execute a batch of operations with NumPy array arithmetic.
+
+        Inputs are grouped by CalcType and each group is evaluated in one
+        vectorized call, so the cost is one pass per type instead of one
+        Python call per row.
+
+        Args:
+            types: Sequence of CalcType enums or strings, one per row. A NumPy
+                unicode array, or an integer array of indexes into TYPE_CODES,
+                is used as-is without conversion.
+            a: Sequence/array of first operands
+            b: Sequence/array of second operands
+            errors: "raise" to raise ValueError on any zero divisor (like
+                execute), or "nan" to return NaN for those rows
+
+        Returns:
+            float64 array of results, aligned with the inputs
+
+        Raises:
+            ValueError: On unknown types, mismatched lengths, or a zero
+                divisor when errors="raise"
+        """
+        if errors not in ("raise", "nan"):
+            raise ValueError(f"Invalid errors mode: {errors}. Must be 'raise' or 'nan'")
+        a = np.asarray(a, dtype=np.float64)
+        b = np.asarray(b, dtype=np.float64)
+        if isinstance(types, np.ndarray) and types.dtype.kind in "Uiu":
+            type_keys = types
+        else:
+            type_keys = np.asarray([getattr(t, "value", t) for t in types], dtype=str)
+        if not (a.shape == b.shape == type_keys.shape) or a.ndim != 1:
+            raise ValueError("types, a and b must be one-dimensional and of equal length")
+
+        by_code = type_keys.dtype.kind != "U"
+        out = np.empty(a.shape, dtype=np.float64)
+        matched = np.zeros(a.shape, dtype=bool)
+        for code, calc_type in enumerate(cls.TYPE_CODES):
+            mask = type_keys == (code if by_code else calc_type.value)
+            if not mask.any():
+                continue
+            matched |= mask
+            out[mask] = cls._instances[calc_type].execute_array(a[mask], b[mask])
+            if errors == "raise" and calc_type == CalcType.Divide and not b[mask].all():
+                raise ValueError("Cannot divide by zero")
+
+        if not matched.all():
+            invalid = type_keys[~matched][0]
+            raise ValueError(f"Invalid operation type: {invalid}. Must be one of {list(CalcType)}")
+        return out
@@ -0,0 +1,101 @@
+"""
+Dependency graph between calculations.
+
+A calculation may take its a and/or b operand from another calculation's
+result (a_ref_id / b_ref_id). Those references form a DAG per user. When a
+node changes, only the nodes reachable from it need recomputing, in
+topological order so every node sees its parents' new results.
+"""
+import os
+from collections import deque
+
+GRAPH_MAX_FANOUT = int(os.getenv("GRAPH_MAX_FANOUT", "1000"))
+
+
+class CycleError(ValueError):
+    """Raised when a reference would make the graph cyclic"""
+
+
+class FanOutError(ValueError):
+    """Raised when an update would recompute more nodes than allowed"""
+
+
+class DependencyGraph:
+    """
+    Parent/child adjacency built from (id, a_ref_id, b_ref_id) rows.
+
+    Only rows that have at least one reference need to be passed in; nodes
+    without references appear implicitly as parents.
+    """
+
+    def __init__(self, edges=()):
+        self.parents: dict[int, set[int]] = {}
+        self.children: dict[int, set[int]] = {}
+        for node_id, a_ref_id, b_ref_id in edges:
+            self.set_parents(node_id, {ref for ref in (a_ref_id, b_ref_id) if ref is not None})
+
+    def set_parents(self, node_id: int, parents: set[int]) -> None:
+        """Replace a node's incoming edges"""
+        for old in self.parents.get(node_id, ()):
+            self.children[old].discard(node_id)
+        self.parents[node_id] = set(parents)
+        for parent in parents:
+            self.children.setdefault(parent, set()).add(node_id)
+
+    def descendants(self, node_id: int) -> set[int]:
+        """All nodes reachable from node_id (excluding itself)"""
+        seen: set[int] = set()
+        stack = [node_id]
+        while stack:
+            for child in self.children.get(stack.pop(), ()):
+                if child not in seen:
+                    seen.add(child)
+                    stack.append(child)
+        return seen
+
+    def check_parents(self, node_id: int, parents: set[int]) -> None:
+        """
+        Raise CycleError if making `parents` the inputs of node_id would
+        close a cycle, i.e. if any of them is node_id or depends on it.
+        """
+        if not parents:
+            return
+        if node_id in parents or parents & self.descendants(node_id):
+            raise CycleError("Reference would create a dependency cycle")
+
+    def downstream_order(self, node_id: int, max_nodes: int = GRAPH_MAX_FANOUT) -> list[int]:
+        """
+        Nodes affected by a change to node_id, in topological order.
+
+        Args:
+            node_id: The node that changed (not included in the result)
+            max_nodes: Fan-out cap; FanOutError is raised above it
+
+        Raises:
+            FanOutError: If more than max_nodes nodes depend on node_id
+            CycleError: If the affected subgraph is not acyclic
+        """
+        affected = self.descendants(node_id)
+        if len(affected) > max_nodes:
+            raise FanOutError(
+                f"Update would recompute {len(affected)} dependent calculations (max {max_nodes})"
+            )
+
+        # Kahn's algorithm restricted to the affected subgraph
+        indegree = {
+            node: len(self.parents.get(node, set()) & affected)
+            for node in affected
+        }
+        ready = deque(sorted(node for node, degree in indegree.items() if degree == 0))
+        order = []
+        while ready:
+            node = ready.popleft()
+            order.append(node)
+            for child in sorted(self.children.get(node, ())):
+                if child in indegree:
+                    indegree[child] -= 1
+                    if indegree[child] == 0:
+                        ready.append(child)
+        if len(order) != len(affected):
+            raise CycleError("Dependency cycle detected")
+        return order
@@ -0,0 +1,132 @@
+"""
+Group commit for calculation inserts.
+
+With GROUP_COMMIT_ENABLED=1, crud.create_calculation validates the new row on
+the request's own session as before but hands the INSERT to GroupCommitter.
+The first caller to arrive opens a batch and waits up to GROUP_COMMIT_WINDOW_MS
+(or until GROUP_COMMIT_MAX_ROWS rows have joined); concurrent callers join the
+open batch. The leader then writes every row with one multi-row INSERT ...
+RETURNING, bumps each owner's calc_version and commits once, so one fsync
+covers the whole batch.
+
+Every caller blocks until that commit has finished and gets its own id back;
+a request is still only answered after its row is durable. If the batch
+fails, its rows are retried one transaction each, so a bad row only fails
+its own request.
+"""
+import os
+import threading
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from app import models
+from app.cache import calculation_cache
+
+GROUP_COMMIT_ENABLED = os.getenv("GROUP_COMMIT_ENABLED", "0") == "1"
+GROUP_COMMIT_WINDOW_MS = float(os.getenv("GROUP_COMMIT_WINDOW_MS", "5"))
+GROUP_COMMIT_MAX_ROWS = int(os.getenv("GROUP_COMMIT_MAX_ROWS", "100"))
+
+
+class _Batch:
+    __slots__ = ("rows", "ids", "errors", "full", "done")
+
+    def __init__(self):
+        self.rows: list[dict] = []
+        self.ids: list[int | None] = []
+        self.errors: list[Exception | None] = []
+        self.full = threading.Event()
+        self.done = threading.Event()
+
+
+class GroupCommitter:
+    """
+    Batches concurrent calculation inserts into shared transactions.
+
+    Args:
+        window: Seconds the first row of a batch waits for others
+        max_rows: Rows that close a batch early
+    """
+
+    def __init__(self, window: float = GROUP_COMMIT_WINDOW_MS / 1000, max_rows: int = GROUP_COMMIT_MAX_ROWS):
+        self.window = window
+        self.max_rows = max_rows
+        self._open: dict[object, _Batch] = {}
+        self._lock = threading.Lock()
+
+    def insert(self, bind, row: dict) -> int:
+        """
+        Insert one calculation row and return its id once committed.
+
+        Rows are batched per bind (engine or connection), so callers using
+        different databases never share a transaction.
+
+        Raises:
+            Exception: Whatever the row's own insert raised
+        """
+        with self._lock:
+            batch = self._open.get(bind)
+            leader = batch is None
+            if leader:
+                batch = self._open[bind] = _Batch()
+            index = len(batch.rows)
+            batch.rows.append(row)
+            if len(batch.rows) >= self.max_rows:
+                del self._open[bind]
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._open.get(bind) is batch:
+                    del self._open[bind]
+            self._flush(bind, batch)
+        else:
+            batch.done.wait()
+
+        if batch.errors[index] is not None:
+            raise batch.errors[index]
+        return batch.ids[index]
+
+    def _flush(self, bind, batch: _Batch) -> None:
+        try:
+            try:
+                batch.ids = self._write(bind, batch.rows)
+                batch.errors = [None] * len(batch.rows)
+            except Exception:
+                batch.ids, batch.errors = [], []
+                for row in batch.rows:
+                    try:
+                        batch.ids.extend(self._write(bind, [row]))
+                        batch.errors.append(None)
+                    except Exception as exc:
+                        batch.ids.append(None)
+                        batch.errors.append(exc)
+            for user_id in {row["user_id"] for row in batch.rows}:
+                calculation_cache.invalidate(user_id)
+        finally:
+            batch.done.set()
+
+    @staticmethod
+    def _write(bind, rows: list[dict]) -> list[int]:
+        """One calc_version bump per owner, one INSERT for all rows, one commit"""
+        with Session(bind=bind) as session:
+            owners = {row["user_id"] for row in rows} - {None}
+            versions = {}
+            if owners:
+                versions = dict(session.execute(
+                    update(models.User)
+                    .where(models.User.id.in_(owners))
+                    .values(calc_version=models.User.calc_version + 1)
+                    .returning(models.User.id, models.User.calc_version)
+                    .execution_options(synchronize_session=False)
+                ).all())
+            ids = list(session.scalars(
+                insert(models.Calculation).returning(models.Calculation.id, sort_by_parameter_order=True),
+                [{**row, "seq": versions.get(row["user_id"])} for row in rows],
+            ))
+            session.commit()
+        return ids
+
+
+group_committer = GroupCommitter()
@@ -0,0 +1,410 @@
+"""
+Background jobs for workloads too large for a request.
+
+Jobs are rows in the `jobs` table, so the queue lives in the application's
+own database (SQLite locally) and needs no outside broker. A JobRunner thread
+in each app process claims queued jobs with an atomic UPDATE, splits them
+into chunks and evaluates the chunks through CalculationFactory on a
+ProcessPoolExecutor. Progress, ETA and cancellation are tracked on the row.
+
+A claimed job holds a lease: its heartbeat_at is refreshed after every chunk.
+If the worker dies, the pool crashes or the process restarts, the heartbeat
+goes stale, and after JOBS_LEASE_SECONDS any runner requeues the job (up to
+JOBS_MAX_ATTEMPTS claims) or fails it. Import jobs that already wrote rows
+are failed rather than rerun, so no calculation is inserted twice.
+
+Input arrays and result files live under JOBS_DIR on local disk. An input
+file is removed as soon as its job reaches a terminal state.
+"""
+import contextlib
+import csv
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas
+from app.database import SessionLocal
+from app.schemas.calculation import calculate_result
+from app.services.factory import CalculationFactory
+
+logger = logging.getLogger(__name__)
+
+JOBS_DIR = os.getenv("JOBS_DIR", "./jobs")
+JOBS_ENABLED = os.getenv("JOBS_ENABLED", "1") == "1"
+JOBS_WORKERS = int(os.getenv("JOBS_WORKERS", "0")) or None  # None = one per CPU
+JOBS_CHUNK_ROWS = int(os.getenv("JOBS_CHUNK_ROWS", "50000"))
+JOBS_POLL_INTERVAL = float(os.getenv("JOBS_POLL_INTERVAL", "1.0"))
+JOBS_LEASE_SECONDS = float(os.getenv("JOBS_LEASE_SECONDS", "300"))
+JOBS_MAX_ATTEMPTS = int(os.getenv("JOBS_MAX_ATTEMPTS", "3"))
+
+_TYPE_CODE = {calc_type: code for code, calc_type in enumerate(CalculationFactory.TYPE_CODES)}
+
+
+def _compute_chunk(codes: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Worker-process entry point: one vectorized pass over a chunk"""
+    return CalculationFactory.execute_many(codes, a, b, errors="nan")
+
+
+def _input_path(job_id: int) -> str:
+    return os.path.join(JOBS_DIR, f"job-{job_id}-input.npz")
+
+
+def _remove_input(job_id: int) -> None:
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(_input_path(job_id))
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# ---------- API-side helpers ----------
+
+def submit_job(db: Session, user_id: int, job_in: schemas.JobCreate) -> models.Job:
+    """Persist a queued job (and its input arrays) and wake the local runner"""
+    job = models.Job(
+        user_id=user_id,
+        kind=job_in.kind,
+        status="queued",
+        total=len(job_in.data.a) if job_in.data else 0,
+        processed=0,
+    )
+    db.add(job)
+    db.flush()
+    if job_in.data is not None:
+        os.makedirs(JOBS_DIR, exist_ok=True)
+        np.savez(
+            _input_path(job.id),
+            a=np.asarray(job_in.data.a, dtype=np.float64),
+            b=np.asarray(job_in.data.b, dtype=np.float64),
+            codes=np.fromiter((_TYPE_CODE[t] for t in job_in.data.type), dtype=np.uint8, count=job.total),
+        )
+    db.commit()
+    db.refresh(job)
+    job_runner.wake()
+    return job
+
+
+def get_user_jobs(db: Session, user_id: int) -> list[models.Job]:
+    return db.query(models.Job).filter(models.Job.user_id == user_id).order_by(models.Job.id).all()
+
+
+def get_job_by_id_and_user(db: Session, job_id: int, user_id: int) -> models.Job | None:
+    return db.query(models.Job).filter(models.Job.id == job_id, models.Job.user_id == user_id).first()
+
+
+def cancel_job(db: Session, job: models.Job) -> models.Job:
+    """
+    Cancel a job. Queued jobs stop immediately; running jobs are flagged and
+    stop after their current chunk.
+    """
+    if job.status == "queued":
+        cancelled = db.execute(
+            update(models.Job)
+            .where(models.Job.id == job.id, models.Job.status == "queued")
+            .values(status="cancelled", finished_at=_now())
+        ).rowcount
+        db.commit()
+        if cancelled:
+            _remove_input(job.id)
+    elif job.status == "running":
+        db.execute(
+            update(models.Job)
+            .where(models.Job.id == job.id, models.Job.status == "running")
+            .values(status="cancelling")
+        )
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+# ---------- Runner ----------
+
+class JobCancelled(Exception):
+    """Raised inside a handler when the job was cancelled between chunks"""
+
+
+class JobRunner:
+    """
+    Claims and runs queued jobs.
+
+    Args:
+        session_factory: Creates the runner's own DB sessions
+        executor_factory: Builds the chunk executor; defaults to a spawn-based
+            ProcessPoolExecutor (spawn avoids forking a threaded server)
+        chunk_rows: Rows per chunk / progress update
+    """
+
+    def __init__(self, session_factory=SessionLocal, executor_factory=None, chunk_rows: int = JOBS_CHUNK_ROWS):
+        self.session_factory = session_factory
+        self.executor_factory = executor_factory or self._default_executor
+        self.chunk_rows = chunk_rows
+        self._executor = None
+        self._thread = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    @staticmethod
+    def _default_executor():
+        return ProcessPoolExecutor(max_workers=JOBS_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = self.executor_factory()
+        return self._executor
+
+    def start(self) -> None:
+        """Recover jobs stranded by a previous process, then start polling"""
+        if self._thread is not None:
+            return
+        try:
+            with self.session_factory() as db:
+                self._recover_expired(db)
+        except Exception:
+            # Don't take the app down; _claim_next retries on every poll
+            logger.exception("Job lease recovery failed")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="job-runner", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def wake(self) -> None:
+        """Tell the polling thread a job was just queued"""
+        self._wake.set()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_pending()
+            except Exception:
+                logger.exception("Job runner iteration failed")
+            self._wake.wait(JOBS_POLL_INTERVAL)
+            self._wake.clear()
+
+    def run_pending(self) -> int:
+        """Run queued jobs until none are left; returns how many were run"""
+        count = 0
+        while not self._stop.is_set():
+            job_id = self._claim_next()
+            if job_id is None:
+                return count
+            self._run(job_id)
+            count += 1
+        return count
+
+    def _recover_expired(self, db: Session) -> None:
+        """Requeue or fail running jobs whose lease expired with their worker"""
+        cutoff = _now() - timedelta(seconds=JOBS_LEASE_SECONDS)
+        expired = db.execute(
+            select(models.Job.id, models.Job.kind, models.Job.status, models.Job.processed, models.Job.attempts)
+            .where(models.Job.status.in_(("running", "cancelling")), models.Job.heartbeat_at < cutoff)
+        ).all()
+        for job in expired:
+            if job.status == "cancelling":
+                values = {"status": "cancelled", "finished_at": _now()}
+            elif job.attempts >= JOBS_MAX_ATTEMPTS:
+                values = {"status": "failed", "finished_at": _now(), "error": "Worker lost; attempts exhausted"}
+            elif job.kind == "import" and job.processed:
+                values = {
+                    "status": "failed",
+                    "finished_at": _now(),
+                    "error": f"Worker lost after importing {job.processed} rows; resubmit the rest",
+                }
+            else:
+                values = {"status": "queued", "processed": 0, "eta_seconds": None, "started_at": None}
+            # The heartbeat condition makes this a no-op if the job came back to life
+            moved = db.execute(
+                update(models.Job)
+                .where(models.Job.id == job.id, models.Job.status == job.status, models.Job.heartbeat_at < cutoff)
+                .values(heartbeat_at=None, **values)
+            ).rowcount
+            db.commit()
+            if moved:
+                logger.warning("Job %s lease expired; now %s", job.id, values["status"])
+                if values["status"] != "queued":
+                    _remove_input(job.id)
+
+    def _claim_next(self) -> int | None:
+        """Atomically move the oldest queued job to running (safe across workers)"""
+        with self.session_factory() as db:
+            self._recover_expired(db)
+            while True:
+                job_id = db.execute(
+                    select(models.Job.id).where(models.Job.status == "queued").order_by(models.Job.id).limit(1)
+                ).scalar()
+                if job_id is None:
+                    return None
+                claimed = db.execute(
+                    update(models.Job)
+                    .where(models.Job.id == job_id, models.Job.status == "queued")
+                    .values(
+                        status="running",
+                        started_at=_now(),
+                        heartbeat_at=_now(),
+                        attempts=models.Job.attempts + 1,
+                    )
+                ).rowcount
+                db.commit()
+                if claimed:
+                    return job_id
+
+    def _run(self, job_id: int) -> None:
+        handlers = {"compute": self._run_compute, "import": self._run_import, "export": self._run_export}
+        with self.session_factory() as db:
+            job = db.get(models.Job, job_id)
+            started = time.monotonic()
+            try:
+                handlers[job.kind](db, job, started)
+            except JobCancelled:
+                self._finish(db, job_id, "cancelled")
+            except Exception as exc:
+                logger.exception("Job %s failed", job_id)
+                db.rollback()
+                self._finish(db, job_id, "failed", error=str(exc)[:500])
+            else:
+                self._finish(db, job_id, "succeeded", eta_seconds=0.0)
+
+    @staticmethod
+    def _finish(db: Session, job_id: int, status: str, **values) -> None:
+        # A cancel that raced the last chunk still wins
+        finished = db.execute(
+            update(models.Job)
+            .where(models.Job.id == job_id, models.Job.status == "cancelling")
+            .values(status="cancelled", finished_at=_now())
+        ).rowcount
+        finished += db.execute(
+            update(models.Job)
+            .where(models.Job.id == job_id, models.Job.status == "running")
+            .values(status=status, finished_at=_now(), **values)
+        ).rowcount
+        db.commit()
+        # Nothing matched if the lease expired and the job was requeued, which
+        # still needs the input
+        if finished:
+            _remove_input(job_id)
+
+    @staticmethod
+    def _progress(db: Session, job: models.Job, processed: int, started: float) -> None:
+        """Record progress and ETA, then raise JobCancelled if a cancel arrived"""
+        elapsed = time.monotonic() - started
+        job.processed = processed
+        job.eta_seconds = elapsed / processed * (job.total - processed) if processed else None
+        job.heartbeat_at = _now()
+        db.commit()
+        if job.status == "cancelling":
+            raise JobCancelled()
+
+    def _chunks(self, total: int):
+        return [(start, min(start + self.chunk_rows, total)) for start in range(0, total, self.chunk_rows)]
+
+    def _run_compute(self, db: Session, job: models.Job, started: float) -> None:
+        data = np.load(_input_path(job.id))
+        codes, a, b = data["codes"], data["a"], data["b"]
+        results = np.empty(job.total, dtype="<f8")
+        chunks = self._chunks(job.total)
+        # Submit every chunk up front so all worker processes stay busy
+        futures = [self.executor.submit(_compute_chunk, codes[s:e], a[s:e], b[s:e]) for s, e in chunks]
+        try:
+            for (start, end), future in zip(chunks, futures):
+                results[start:end] = future.result()
+                self._progress(db, job, end, started)
+        except JobCancelled:
+            for future in futures:
+                future.cancel()
+            raise
+
+        path = os.path.join(JOBS_DIR, f"job-{job.id}-result.f64")
+        results.tofile(path)
+        job.result_path = path
+        db.commit()
+
+    def _run_import(self, db: Session, job: models.Job, started: float) -> None:
+        data = np.load(_input_path(job.id))
+        codes, a, b = data["codes"], data["a"], data["b"]
+        type_names = [calc_type.value for calc_type in CalculationFactory.TYPE_CODES]
+        for start, end in self._chunks(job.total):
+            # Evaluating the chunk validates it before anything is written
+            results = self.executor.submit(_compute_chunk, codes[start:end], a[start:end], b[start:end]).result()
+            if np.isnan(results).any():
+                raise ValueError(f"Rows {start}-{end} contain invalid calculations")
+            rows = [
+                {"a": float(x), "b": float(y), "type": type_names[code]}
+                for x, y, code in zip(a[start:end], b[start:end], codes[start:end])
+            ]
+            crud.bulk_insert_calculations(db, rows, job.user_id)
+            self._progress(db, job, end, started)
+
+    def _run_export(self, db: Session, job: models.Job, started: float) -> None:
+        owner = models.Calculation.user_id == job.user_id
+        job.total = db.query(models.Calculation).filter(owner).count()
+        db.commit()
+
+        os.makedirs(JOBS_DIR, exist_ok=True)
+        path = os.path.join(JOBS_DIR, f"job-{job.id}-export.csv")
+        processed = 0
+        last_id = 0
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["id", "a", "b", "type", "expression", "result"])
+            while True:
+                # Keyset pagination keeps each chunk an index range scan
+                rows = db.execute(
+                    select(
+                        models.Calculation.id,
+                        models.Calculation.a,
+                        models.Calculation.b,
+                        models.Calculation.type,
+                        models.Calculation.expression,
+                        models.Calculation.reduced,
+                    )
+                    .where(owner, models.Calculation.id > last_id)
+                    .order_by(models.Calculation.id)
+                    .limit(self.chunk_rows)
+                ).all()
+                if not rows:
+                    break
+                binary = [i for i, row in enumerate(rows) if row.type in _TYPE_CODE]
+                results = [None] * len(rows)
+                if binary:
+                    computed = self.executor.submit(
+                        _compute_chunk,
+                        np.fromiter((_TYPE_CODE[rows[i].type] for i in binary), dtype=np.uint8, count=len(binary)),
+                        np.fromiter((rows[i].a for i in binary), dtype=np.float64, count=len(binary)),
+                        np.fromiter((rows[i].b for i in binary), dtype=np.float64, count=len(binary)),
+                    ).result()
+                    for i, value in zip(binary, computed.tolist()):
+                        results[i] = value
+                for i, row in enumerate(rows):
+                    if results[i] is None:
+                        try:
+                            results[i] = calculate_result(row.type, row.a, row.b, row.expression, row.reduced)
+                        except ValueError:
+                            results[i] = ""
+                    writer.writerow([row.id, row.a, row.b, row.type, row.expression or "", results[i]])
+                processed += len(rows)
+                last_id = rows[-1].id
+                self._progress(db, job, processed, started)
+
+        job.result_path = path
+        db.commit()
+
+
+job_runner = JobRunner()
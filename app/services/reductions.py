@@ -0,0 +1,55 @@
+"""
+Array-valued calculations.
+
+Sum, Product, Mean, Min and Max rows keep their operands as one packed
+little-endian float64 blob instead of one row per pair. The reduction is
+evaluated with a single NumPy call when the operands are written, and the
+scalar is stored next to the blob so list reads never have to load it.
+"""
+import math
+import os
+
+import numpy as np
+
+ARRAY_MAX_OPERANDS = int(os.getenv("ARRAY_MAX_OPERANDS", "1000000"))
+
+# Keyed by CalcType value; CalcType is a str enum so members hit these keys too
+REDUCTIONS = {
+    "Sum": np.sum,
+    "Product": np.prod,
+    "Mean": np.mean,
+    "Min": np.min,
+    "Max": np.max,
+}
+
+OPERAND_DTYPE = np.dtype("<f8")
+
+
+def is_array_type(calc_type) -> bool:
+    return calc_type in REDUCTIONS
+
+
+def pack_operands(values) -> bytes:
+    """Pack a sequence/array of floats into the stored blob format"""
+    return np.asarray(values, dtype=OPERAND_DTYPE).tobytes()
+
+
+def unpack_operands(blob: bytes) -> np.ndarray:
+    """Zero-copy view of a stored blob as a float64 array"""
+    return np.frombuffer(blob, dtype=OPERAND_DTYPE)
+
+
+def reduce_operands(calc_type, values: np.ndarray) -> float:
+    """
+    Apply the reduction for calc_type.
+
+    Raises:
+        ValueError: If there are no operands or the result is not finite
+    """
+    if values.size == 0:
+        raise ValueError(f"{calc_type} requires at least one operand")
+    with np.errstate(all="ignore"):
+        result = float(REDUCTIONS[calc_type](values))
+    if not math.isfinite(result):
+        raise ValueError(f"{calc_type} result is not a finite number")
+    return result
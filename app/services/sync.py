@@ -0,0 +1,94 @@
+"""
+Delta sync support: tombstone compaction.
+
+Every calculation write stamps the rows it touches with the owner's new
+calc_version (`seq`), and every delete leaves a CalculationTombstone with its
+seq, so GET /api/calculations/changes?since=<seq> can answer from the
+(user_id, seq) indexes alone.
+
+Tombstones only need to live as long as clients may go without syncing.
+TombstoneCompactor deletes the ones older than TOMBSTONE_RETENTION_DAYS every
+TOMBSTONE_COMPACT_INTERVAL seconds and raises each affected user's
+sync_floor to the highest seq it removed. A client whose `since` is below
+that floor may have missed a delete, so /changes answers 410 and the client
+starts over from since=0.
+"""
+import logging
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+TOMBSTONE_RETENTION_DAYS = float(os.getenv("TOMBSTONE_RETENTION_DAYS", "30"))
+TOMBSTONE_COMPACT_INTERVAL = float(os.getenv("TOMBSTONE_COMPACT_INTERVAL", "3600"))  # seconds; 0 disables
+
+
+def compact_tombstones(db: Session, retention: timedelta = timedelta(days=TOMBSTONE_RETENTION_DAYS)) -> int:
+    """
+    Delete tombstones older than `retention` and raise the owners' sync_floor.
+
+    Returns:
+        Number of tombstones deleted
+    """
+    cutoff = datetime.now(timezone.utc) - retention
+    expired = models.CalculationTombstone.deleted_at < cutoff
+    floors = db.execute(
+        select(models.CalculationTombstone.user_id, func.max(models.CalculationTombstone.seq))
+        .where(expired)
+        .group_by(models.CalculationTombstone.user_id)
+    ).all()
+    for user_id, seq in floors:
+        db.execute(
+            update(models.User)
+            .where(models.User.id == user_id, models.User.sync_floor < seq)
+            .values(sync_floor=seq)
+            .execution_options(synchronize_session=False)
+        )
+    deleted = db.execute(
+        delete(models.CalculationTombstone).where(expired).execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return deleted
+
+
+class TombstoneCompactor:
+    """Background thread running compact_tombstones every `interval` seconds"""
+
+    def __init__(self, session_factory=SessionLocal, interval: float = TOMBSTONE_COMPACT_INTERVAL):
+        self.session_factory = session_factory
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="tombstone-compactor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                with self.session_factory() as db:
+                    deleted = compact_tombstones(db)
+                if deleted:
+                    logger.info("Compacted %d calculation tombstones", deleted)
+            except Exception:
+                logger.exception("Tombstone compaction failed")
+
+
+tombstone_compactor = TombstoneCompactor()
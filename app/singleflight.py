@@ -0,0 +1,93 @@
+"""
+Single-flight coalescing of identical concurrent reads.
+
+When several requests need the same value at the same moment (a dashboard
+opening many tabs, every client refreshing after a deploy or a cache
+invalidation), SingleFlight.do() lets the first one compute it and makes the
+others wait for that result instead of repeating the queries and
+serialization. Keys must identify the value exactly; the calculation routes
+use (user id, calc_version, cache key), so a read that starts after a write
+never joins a computation that began before it.
+
+If the computation raises, every waiter gets the same exception. A waiter
+that is still waiting after SINGLEFLIGHT_TIMEOUT seconds gives up with
+SingleFlightTimeout. The shared value is only handed to requests that were
+already waiting; nothing is kept once the call finishes (that is the cache's
+job).
+"""
+import os
+import threading
+
+from app.metrics import SINGLEFLIGHT_CALLS
+
+SINGLEFLIGHT_TIMEOUT = float(os.getenv("SINGLEFLIGHT_TIMEOUT", "5.0"))
+
+
+class SingleFlightTimeout(Exception):
+    """Raised to a waiter whose shared computation did not finish in time"""
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Run at most one computation per key at a time and share its result"""
+
+    def __init__(self, timeout: float = SINGLEFLIGHT_TIMEOUT):
+        self.timeout = timeout
+        self._calls: dict[object, _Call] = {}
+        self._lock = threading.Lock()
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def do(self, key, fn, timeout: float | None = None):
+        """
+        Return fn(), computed once for all concurrent callers with this key.
+
+        Args:
+            key: Hashable identity of the value
+            fn: Zero-argument callable computing it
+            timeout: Longest to wait for another caller's computation
+
+        Raises:
+            SingleFlightTimeout: If the shared computation took too long
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if leader:
+            SINGLEFLIGHT_CALLS.inc("leader")
+            try:
+                call.result = fn()
+                return call.result
+            except BaseException as exc:
+                call.error = exc
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if not call.done.wait(self.timeout if timeout is None else timeout):
+            SINGLEFLIGHT_CALLS.inc("timeout")
+            raise SingleFlightTimeout(f"shared computation for {key!r} did not finish in time")
+        SINGLEFLIGHT_CALLS.inc("shared")
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+
+calculation_reads = SingleFlight()
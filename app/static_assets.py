@@ -0,0 +1,251 @@
+"""
+Precompressed static assets served from memory.
+
+Build step (run once per deploy, e.g. in the Dockerfile):
+
+    python -m app.static_assets [source_dir] [build_dir]
+
+For every file in source_dir this writes .gz and .br variants at maximum
+compression. StaticAssets then serves those bytes straight from memory,
+negotiating Accept-Encoding per request, so no request ever reads from disk
+or compresses anything. Responses carry a content-hash ETag and are
+revalidated; the pages only link to each other by their fixed URLs, so there
+are no fingerprinted names to cache forever.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import sys
+from dataclasses import dataclass, field
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+STATIC_DIR = os.getenv("STATIC_DIR", "static")
+STATIC_BUILD_DIR = os.getenv("STATIC_BUILD_DIR", "build/static")
+
+# Revalidate on every use; unchanged assets cost a 304 through the ETag
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+# Encodings in server preference order, with the file suffix used by the build
+_ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+# Each encoded variant is a different representation, so it gets its own strong ETag
+_ETAG_SUFFIXES = {"identity": "", "br": "-br", "gzip": "-gz"}
+
+
+def _content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()[:12]
+
+
+def _decompress(encoding: str, data: bytes) -> bytes:
+    if encoding == "gzip":
+        return gzip.decompress(data)
+    return brotli.decompress(data)
+
+
+def _compress(content: bytes) -> dict[str, bytes]:
+    """Compress content with every available encoding at maximum level"""
+    variants = {"gzip": gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(content, quality=11)
+    return variants
+
+
+def _source_files(source_dir: str) -> list[str]:
+    """Relative paths of all files under source_dir, using forward slashes"""
+    names = []
+    for root, _dirs, files in os.walk(source_dir):
+        for filename in files:
+            full = os.path.join(root, filename)
+            names.append(os.path.relpath(full, source_dir).replace(os.sep, "/"))
+    return sorted(names)
+
+
+def build(source_dir: str = STATIC_DIR, build_dir: str = STATIC_BUILD_DIR) -> dict[str, list[str]]:
+    """
+    Write precompressed variants of every static file.
+
+    Args:
+        source_dir: Directory holding the original assets
+        build_dir: Output directory (created if missing)
+
+    Returns:
+        {name: [encodings written]}
+    """
+    built = {}
+    for name in _source_files(source_dir):
+        with open(os.path.join(source_dir, name), "rb") as f:
+            content = f.read()
+        out_path = os.path.join(build_dir, name)
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+
+        encodings = []
+        for encoding, data in _compress(content).items():
+            # Only keep variants that actually save bytes
+            if len(data) >= len(content):
+                continue
+            with open(out_path + _ENCODING_SUFFIXES[encoding], "wb") as f:
+                f.write(data)
+            encodings.append(encoding)
+        built[name] = encodings
+    return built
+
+
+@dataclass
+class _Asset:
+    """One static file held in memory with its encoded variants"""
+    media_type: str
+    digest: str
+    variants: dict[str, bytes] = field(default_factory=dict)  # encoding -> body
+
+    def etag(self, encoding: str) -> str:
+        return f'"{self.digest}{_ETAG_SUFFIXES[encoding]}"'
+
+
+def _parse_accept_encoding(header: str) -> dict[str, float]:
+    """Parse an Accept-Encoding header into {coding: qvalue}"""
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def choose_encoding(header: str | None, available) -> str:
+    """
+    Pick the best encoding for a response.
+
+    Args:
+        header: Raw Accept-Encoding request header (or None)
+        available: Encodings that exist for the asset besides identity
+
+    Returns:
+        "br", "gzip" or "identity"
+    """
+    if not header:
+        return "identity"
+    accepted = _parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    for encoding in _ENCODING_SUFFIXES:
+        if encoding in available and accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return "identity"
+
+
+class StaticAssets:
+    """
+    ASGI app serving static files from memory.
+
+    Uses the precompressed build output when it decompresses to the current
+    source file; anything missing or stale is compressed once at startup
+    instead.
+    """
+
+    def __init__(self, directory: str = STATIC_DIR, build_dir: str = STATIC_BUILD_DIR):
+        self.directory = directory
+        self.build_dir = build_dir
+        self._assets: dict[str, _Asset] = {}
+        self._load()
+
+    def _prebuilt(self, name: str, content: bytes) -> dict[str, bytes] | None:
+        """Build output for `name`, or None if any of it is missing or stale"""
+        variants = {}
+        for encoding, suffix in _ENCODING_SUFFIXES.items():
+            if encoding == "br" and brotli is None:
+                continue
+            path = os.path.join(self.build_dir, name + suffix)
+            if not os.path.exists(path):
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+            try:
+                if _decompress(encoding, data) != content:
+                    return None
+            except Exception:
+                return None
+            variants[encoding] = data
+        return variants or None
+
+    def _load(self) -> None:
+        for name in _source_files(self.directory):
+            with open(os.path.join(self.directory, name), "rb") as f:
+                content = f.read()
+            media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            if media_type.startswith("text/"):
+                media_type += "; charset=utf-8"
+
+            asset = _Asset(media_type=media_type, digest=_content_hash(content), variants={"identity": content})
+            variants = self._prebuilt(name, content)
+            if variants is None:
+                variants = {
+                    encoding: data for encoding, data in _compress(content).items() if len(data) < len(content)
+                }
+            asset.variants.update(variants)
+            self._assets[name] = asset
+
+    async def __call__(self, scope, receive, send):
+        assert scope["type"] == "http"
+        method = scope["method"]
+        if method not in ("GET", "HEAD"):
+            await self._send(send, 405, [(b"allow", b"GET, HEAD")], b"Method Not Allowed")
+            return
+
+        path = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        name = path.lstrip("/")
+        asset = self._assets.get(name)
+        if asset is None:
+            await self._send(send, 404, [], b"Not Found")
+            return
+
+        headers = {}
+        for key, value in scope["headers"]:
+            headers[key.decode("latin-1").lower()] = value.decode("latin-1")
+
+        encoding = choose_encoding(headers.get("accept-encoding"), asset.variants)
+        etag = asset.etag(encoding)
+        response_headers = [
+            (b"etag", etag.encode()),
+            (b"cache-control", REVALIDATE_CACHE_CONTROL.encode()),
+            (b"vary", b"Accept-Encoding"),
+        ]
+
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+            await self._send(send, 304, response_headers, b"")
+            return
+
+        body = asset.variants[encoding]
+        response_headers.append((b"content-type", asset.media_type.encode()))
+        if encoding != "identity":
+            response_headers.append((b"content-encoding", encoding.encode()))
+        await self._send(send, 200, response_headers, body, head=method == "HEAD")
+
+    @staticmethod
+    async def _send(send, status_code: int, headers: list, body: bytes, head: bool = False) -> None:
+        # A 304's Content-Length would describe the full representation; leave it out
+        if status_code != 304:
+            headers = headers + [(b"content-length", str(len(body)).encode())]
+        await send({"type": "http.response.start", "status": status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": b"" if head else body})
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    result = build(*args)
+    print(f"Built {len(result)} static assets into {args[1] if len(args) > 1 else STATIC_BUILD_DIR}")
@@ -0,0 +1,51 @@
+"""
+Chunked responses for large float64 arrays.
+
+Used by the compute endpoint for batch results and by the calculations API
+for array operands. Arrays up to STREAM_CHUNK_ROWS values are sent as one
+body; larger ones are streamed so the full JSON text never sits in memory.
+"""
+import json
+
+import numpy as np
+from fastapi.responses import Response, StreamingResponse
+
+BINARY_MEDIA_TYPE = "application/octet-stream"
+# Arrays larger than this are streamed back in chunks of this many values
+STREAM_CHUNK_ROWS = 65536
+
+
+def json_chunks(values: np.ndarray, key: str):
+    """Yield a {key: [...]} document in pieces, nulls for non-finite values"""
+    yield b'{"' + key.encode() + b'":['
+    for start in range(0, values.size, STREAM_CHUNK_ROWS):
+        chunk = values[start:start + STREAM_CHUNK_ROWS]
+        if np.isfinite(chunk).all():
+            items = chunk.tolist()
+        else:
+            items = chunk.astype(object)
+            items[~np.isfinite(chunk)] = None
+            items = items.tolist()
+        text = json.dumps(items)[1:-1]
+        yield (("," if start else "") + text).encode()
+    yield b"]}"
+
+
+def binary_chunks(values: np.ndarray):
+    data = values.astype("<f8", copy=False)
+    for start in range(0, data.size, STREAM_CHUNK_ROWS):
+        yield data[start:start + STREAM_CHUNK_ROWS].tobytes()
+
+
+def array_response(values: np.ndarray, key: str, binary: bool) -> Response:
+    """
+    Serialize a float64 array as JSON ({key: [...]}) or packed little-endian
+    float64, streaming it when it is larger than one chunk.
+    """
+    if binary:
+        if values.size <= STREAM_CHUNK_ROWS:
+            return Response(content=values.astype("<f8", copy=False).tobytes(), media_type=BINARY_MEDIA_TYPE)
+        return StreamingResponse(binary_chunks(values), media_type=BINARY_MEDIA_TYPE)
+    if values.size <= STREAM_CHUNK_ROWS:
+        return Response(content=b"".join(json_chunks(values, key)), media_type="application/json")
+    return StreamingResponse(json_chunks(values, key), media_type="application/json")
@@ -0,0 +1,211 @@
+"""
+Per-request phase timings for the Server-Timing header and structured logs.
+
+ServerTimingMiddleware (app/middleware/timing.py) opens a RequestTimings for
+each request in a context variable. Code on the request path adds to it with
+
+    with timing.phase("auth"):
+        ...
+
+and SQL statements are timed and counted by SQLAlchemy engine events into
+the "db" phase (QueryCounter collects them outside requests, e.g. in
+tests). Routes built with TimedRoute record their endpoint as "handler";
+the gap between the endpoint returning and the response starting is
+reported as "response" (response_model validation, computed `result`, JSON
+encoding).
+
+The middleware and SQL events are only installed when SERVER_TIMING=1.
+Otherwise phase() and the TimedRoute wrapper cost one context variable
+lookup each.
+"""
+import contextlib
+import contextvars
+import functools
+import inspect
+import os
+import time
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING", "0") == "1"
+
+_current: contextvars.ContextVar["RequestTimings | None"] = contextvars.ContextVar("request_timings", default=None)
+_null_phase = contextlib.nullcontext()
+
+
+class RequestTimings:
+    """Accumulated seconds and call counts per phase for one request"""
+
+    __slots__ = ("started", "phases", "handler_finished")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: dict[str, list] = {}
+        self.handler_finished: float | None = None
+
+    def add(self, name: str, seconds: float) -> None:
+        entry = self.phases.get(name)
+        if entry is None:
+            self.phases[name] = [seconds, 1]
+        else:
+            entry[0] += seconds
+            entry[1] += 1
+
+    def as_dict(self) -> dict:
+        """{phase: {"ms": ..., "count": ...}}"""
+        return {name: {"ms": round(total * 1000, 3), "count": count} for name, (total, count) in self.phases.items()}
+
+    @property
+    def queries(self) -> int:
+        """SQL statements run so far in this request"""
+        entry = self.phases.get("db")
+        return entry[1] if entry else 0
+
+    def header(self, total: float) -> str:
+        """Server-Timing header value, durations in milliseconds"""
+        parts = []
+        for name, (seconds, count) in self.phases.items():
+            part = f"{name};dur={seconds * 1000:.3f}"
+            if name == "db":
+                part += f';desc="{count} queries"'
+            elif count > 1:
+                part += f';desc="{count}x"'
+            parts.append(part)
+        parts.append(f"total;dur={total * 1000:.3f}")
+        return ", ".join(parts)
+
+
+def start() -> tuple[RequestTimings, contextvars.Token]:
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def finish(token: contextvars.Token) -> None:
+    _current.reset(token)
+
+
+def current() -> RequestTimings | None:
+    return _current.get()
+
+
+class _Phase:
+    __slots__ = ("timings", "name", "started")
+
+    def __init__(self, timings: RequestTimings, name: str):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timings.add(self.name, time.perf_counter() - self.started)
+        return False
+
+
+def phase(name: str):
+    """Context manager timing a block into `name` for the current request"""
+    timings = _current.get()
+    if timings is None:
+        return _null_phase
+    return _Phase(timings, name)
+
+
+# ---------- SQL statements ----------
+
+# Active QueryCounters; process-wide because the app may run statements on
+# threads that don't share the caller's context (e.g. under TestClient)
+_query_counters: list["QueryCounter"] = []
+
+
+class QueryCounter:
+    """
+    Collect every SQL statement executed while the block is active.
+
+        with QueryCounter() as queries:
+            ...
+        queries.count, queries.statements
+    """
+
+    def __init__(self):
+        self.statements: list[str] = []
+        self.seconds = 0.0
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __enter__(self):
+        install_sql_timing()
+        _query_counters.append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _query_counters.remove(self)
+        return False
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    timings = _current.get()
+    if timings is not None:
+        timings.add("db", elapsed)
+    for counter in _query_counters:
+        counter.statements.append(statement)
+        counter.seconds += elapsed
+
+
+def install_sql_timing() -> None:
+    """Time (and count) every statement on every Engine into the "db" phase"""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ---------- Routes ----------
+
+def _timed_endpoint(endpoint):
+    """Wrap an endpoint so its run is the "handler" phase; keeps sync/async and signature"""
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def timed(*args, **kwargs):
+            timings = _current.get()
+            if timings is None:
+                return await endpoint(*args, **kwargs)
+            with _Phase(timings, "handler"):
+                result = await endpoint(*args, **kwargs)
+            timings.handler_finished = time.perf_counter()
+            return result
+    else:
+        @functools.wraps(endpoint)
+        def timed(*args, **kwargs):
+            timings = _current.get()
+            if timings is None:
+                return endpoint(*args, **kwargs)
+            with _Phase(timings, "handler"):
+                result = endpoint(*args, **kwargs)
+            timings.handler_finished = time.perf_counter()
+            return result
+    return timed
+
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute whose endpoint is timed as the "handler" phase. Sync endpoints
+    are also tracked by the threadpool monitor (app.monitor).
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        wrapped = _timed_endpoint(endpoint)
+        if not inspect.iscoroutinefunction(endpoint):
+            from app.monitor import thread_tracker
+
+            wrapped = thread_tracker.wrap(wrapped, path)
+        super().__init__(path, wrapped, **kwargs)
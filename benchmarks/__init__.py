@@ -0,0 +1,11 @@
+"""
+Microbenchmarks for the application's hot paths.
+
+    python -m benchmarks run --output bench.json
+    python -m benchmarks compare baseline.json bench.json --threshold 0.10
+
+`run` times every registered benchmark against fixed, seeded fixtures and
+writes the results as JSON. `compare` reports the change in median time per
+benchmark and exits non-zero if any benchmark slowed down by more than the
+threshold.
+"""
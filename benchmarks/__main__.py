@@ -0,0 +1,63 @@
+import argparse
+import json
+import sys
+
+from . import runner
+from .suite import BENCHMARKS
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Hot-path microbenchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the suite and write JSON results")
+    run.add_argument("-o", "--output", help="Write results to this file (default: stdout)")
+    run.add_argument("-k", "--filter", action="append", help="Only run benchmarks whose name contains this")
+    run.add_argument("--repeat", type=int, default=runner.DEFAULT_REPEAT)
+    run.add_argument("--min-time", type=float, default=runner.MIN_SAMPLE_SECONDS)
+
+    cmp = commands.add_parser("compare", help="Compare results against a baseline")
+    cmp.add_argument("baseline")
+    cmp.add_argument("current")
+    cmp.add_argument("--threshold", type=float, default=runner.DEFAULT_THRESHOLD,
+                     help="Relative slowdown that counts as a regression (default 0.10)")
+
+    commands.add_parser("list", help="List benchmark names")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        print("\n".join(BENCHMARKS))
+        return 0
+
+    if args.command == "run":
+        results = runner.run_suite(
+            BENCHMARKS,
+            only=args.filter,
+            repeat=args.repeat,
+            min_time=args.min_time,
+            log=lambda line: print(line, file=sys.stderr),
+        )
+        text = json.dumps(results, indent=2)
+        if args.output:
+            with open(args.output, "w") as f:
+                f.write(text + "\n")
+        else:
+            print(text)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    rows = runner.compare(baseline, current, threshold=args.threshold)
+    print(runner.format_comparison(rows))
+    regressions = [row["name"] for row in rows if row["status"] == "regression"]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""
+Deterministic fixtures shared by the benchmarks.
+
+Everything runs against a private in-memory SQLite database seeded from a
+fixed random seed, so two runs on the same machine see identical data.
+"""
+import random
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import models, security
+from app.database import Base
+
+SEED = 1234
+USER_EMAIL = "bench@example.com"
+USER_PASSWORD = "benchmark-password"
+CALCULATIONS_PER_USER = 1000
+OPERATIONS = ("Add", "Sub", "Multiply", "Divide")
+
+
+def make_session():
+    """Fresh in-memory database with the schema created; returns a Session"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+
+def seed(db, calculations: int = CALCULATIONS_PER_USER) -> models.User:
+    """Insert one user with `calculations` seeded rows and return the user"""
+    rng = random.Random(SEED)
+    user = models.User(
+        username="bench",
+        email=USER_EMAIL,
+        password_hash=security.hash_password(USER_PASSWORD),
+    )
+    db.add(user)
+    db.flush()
+    db.add_all(
+        models.Calculation(
+            a=round(rng.uniform(-1000, 1000), 3),
+            b=round(rng.uniform(1, 1000), 3),  # never zero, so Divide rows stay valid
+            type=rng.choice(OPERATIONS),
+            user_id=user.id,
+        )
+        for _ in range(calculations)
+    )
+    db.commit()
+    db.refresh(user)
+    return user
@@ -0,0 +1,147 @@
+"""
+Timing, JSON output and baseline comparison.
+"""
+import datetime
+import gc
+import platform
+import statistics
+import sys
+import time
+from importlib import metadata
+
+# Each timed sample runs the benchmark enough times to last at least this long
+MIN_SAMPLE_SECONDS = 0.05
+DEFAULT_REPEAT = 7
+DEFAULT_THRESHOLD = 0.10
+FORMAT_VERSION = 1
+
+
+def _calibrate(fn, min_time: float) -> int:
+    """Smallest loop count (1, 2, 5, 10, 20, ...) whose sample lasts min_time"""
+    loops = 1
+    while True:
+        for factor in (1, 2, 5):
+            number = loops * factor
+            if _time_loops(fn, number) >= min_time:
+                return number
+        loops *= 10
+
+
+def _time_loops(fn, number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return time.perf_counter() - start
+
+
+def measure(fn, repeat: int = DEFAULT_REPEAT, min_time: float = MIN_SAMPLE_SECONDS) -> dict:
+    """
+    Time fn and return per-call statistics in seconds.
+
+    Args:
+        fn: Zero-argument callable to time
+        repeat: Number of samples
+        min_time: Minimum duration of one sample
+
+    Returns:
+        dict with loops, repeat, min, median, mean, stdev and ops_per_sec
+    """
+    fn()  # warm caches, lazy imports and the JIT-free fast paths
+    loops = _calibrate(fn, min_time)
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        samples = [_time_loops(fn, loops) / loops for _ in range(repeat)]
+    finally:
+        if gc_enabled:
+            gc.enable()
+    median = statistics.median(samples)
+    return {
+        "loops": loops,
+        "repeat": repeat,
+        "min": min(samples),
+        "median": median,
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if repeat > 1 else 0.0,
+        "ops_per_sec": 1 / median if median else None,
+    }
+
+
+def _environment() -> dict:
+    packages = {}
+    for name in ("fastapi", "pydantic", "sqlalchemy", "numpy", "passlib", "python-jose"):
+        try:
+            packages[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            packages[name] = None
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "packages": packages,
+    }
+
+
+def run_suite(benchmarks: dict, only=None, repeat: int = DEFAULT_REPEAT, min_time: float = MIN_SAMPLE_SECONDS, log=None) -> dict:
+    """
+    Run registered benchmarks and return the JSON-ready result document.
+
+    Args:
+        benchmarks: name -> setup function (see suite.BENCHMARKS)
+        only: Optional substrings; only benchmarks whose name contains one run
+        log: Optional callable receiving one progress line per benchmark
+    """
+    results = {}
+    for name, setup in benchmarks.items():
+        if only and not any(part in name for part in only):
+            continue
+        results[name] = measure(setup(), repeat=repeat, min_time=min_time)
+        if log:
+            log(f"{name:45} {results[name]['median'] * 1e6:12.2f} us/op")
+    return {
+        "version": FORMAT_VERSION,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "environment": _environment(),
+        "benchmarks": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD) -> list[dict]:
+    """
+    Compare median times of the benchmarks present in both documents.
+
+    A benchmark is a "regression" when its median grew by more than
+    `threshold` (0.10 = 10%), an "improvement" when it shrank by more than
+    that, and "ok" otherwise. Benchmarks missing from either side are
+    reported as "added" / "removed".
+    """
+    rows = []
+    old, new = baseline["benchmarks"], current["benchmarks"]
+    for name in sorted(old.keys() | new.keys()):
+        if name not in old:
+            rows.append({"name": name, "status": "added", "baseline": None, "current": new[name]["median"], "change": None})
+            continue
+        if name not in new:
+            rows.append({"name": name, "status": "removed", "baseline": old[name]["median"], "current": None, "change": None})
+            continue
+        before, after = old[name]["median"], new[name]["median"]
+        change = after / before - 1 if before else 0.0
+        if change > threshold:
+            status = "regression"
+        elif change < -threshold:
+            status = "improvement"
+        else:
+            status = "ok"
+        rows.append({"name": name, "status": status, "baseline": before, "current": after, "change": change})
+    return rows
+
+
+def format_comparison(rows: list[dict]) -> str:
+    lines = [f"{'benchmark':45} {'baseline':>12} {'current':>12} {'change':>9}  status"]
+    for row in rows:
+        before = f"{row['baseline'] * 1e6:10.2f}us" if row["baseline"] is not None else "-"
+        after = f"{row['current'] * 1e6:10.2f}us" if row["current"] is not None else "-"
+        change = f"{row['change']:+8.1%}" if row["change"] is not None else "-"
+        lines.append(f"{row['name']:45} {before:>12} {after:>12} {change:>9}  {row['status']}")
+    return "\n".join(lines)
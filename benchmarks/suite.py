@@ -0,0 +1,100 @@
+"""
+Benchmark registry.
+
+Each benchmark is a setup function registered with @benchmark. Setup builds
+whatever fixtures it needs and returns the zero-argument callable to time,
+so fixture cost never ends up in the measurement.
+"""
+from pydantic import TypeAdapter
+
+from app import crud, schemas, security
+from app.services.factory import CalculationFactory
+
+from . import fixtures
+
+BENCHMARKS = {}
+
+
+def benchmark(name: str):
+    """Register a setup function under `name`"""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+@benchmark("factory.execute")
+def factory_execute():
+    return lambda: CalculationFactory.execute(schemas.CalcType.Multiply, 12.5, 3.0)
+
+
+@benchmark("schemas.CalculationRead.serialize_list")
+def calculation_read_list():
+    db = fixtures.make_session()
+    user = fixtures.seed(db)
+    rows = crud.get_user_calculation_rows(db, user.id)
+    adapter = TypeAdapter(list[schemas.CalculationRead])
+    return lambda: adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+
+@benchmark("security.create_access_token")
+def create_access_token():
+    return lambda: security.create_access_token({"sub": fixtures.USER_EMAIL})
+
+
+@benchmark("security.decode_token")
+def decode_token():
+    token = security.create_access_token({"sub": fixtures.USER_EMAIL})
+
+    def run():
+        # Time the full JWT verification, not a decode cache hit
+        security._decode_cache.clear()
+        security.decode_token(token)
+    return run
+
+
+@benchmark("security.decode_token_cached")
+def decode_token_cached():
+    token = security.create_access_token({"sub": fixtures.USER_EMAIL})
+    security.decode_token(token)
+    return lambda: security.decode_token(token)
+
+
+@benchmark("security.verify_password")
+def verify_password():
+    hashed = security.hash_password(fixtures.USER_PASSWORD)
+    return lambda: security.verify_password(fixtures.USER_PASSWORD, hashed)
+
+
+@benchmark("crud.get_user_by_email")
+def get_user_by_email():
+    db = fixtures.make_session()
+    fixtures.seed(db, calculations=0)
+    return lambda: crud.get_user_by_email(db, fixtures.USER_EMAIL)
+
+
+@benchmark("crud.get_user_calculations")
+def get_user_calculations():
+    db = fixtures.make_session()
+    user = fixtures.seed(db)
+
+    def run():
+        crud.get_user_calculations(db, user.id)
+        # Don't let the identity map turn later iterations into cache hits
+        db.expunge_all()
+    return run
+
+
+@benchmark("crud.get_user_calculation_rows")
+def get_user_calculation_rows():
+    db = fixtures.make_session()
+    user = fixtures.seed(db)
+    return lambda: crud.get_user_calculation_rows(db, user.id)
+
+
+@benchmark("crud.get_calculation_row_by_id_and_user")
+def get_calculation_row_by_id_and_user():
+    db = fixtures.make_session()
+    user = fixtures.seed(db)
+    calc_id = fixtures.CALCULATIONS_PER_USER // 2
+    return lambda: crud.get_calculation_row_by_id_and_user(db, calc_id, user.id)
@@ -0,0 +1,19 @@
+"""
+HTTP load generator for the calculator API.
+
+    python -m loadtest --concurrency 20 --duration 30
+    python -m loadtest --rate 50 --duration 30 --serve --workers 4
+    python -m loadtest --url http://localhost:8000 --concurrency 50 -o run.json
+
+Virtual users run the scripted journey in journeys.py (register, login,
+create, list, read, update, delete) through an async httpx client, either in
+closed loop (--concurrency users back to back) or open loop (--rate journey
+starts per second, Poisson arrivals). Throughput and p50/p95/p99 latency are
+reported per route.
+
+The app can run in-process over httpx's ASGI transport (default), under a
+uvicorn subprocess started by the harness (--serve, with --workers), or
+anywhere else (--url). --database-url selects the database for the first two,
+so SQLite and Postgres runs use the same command. Pre-fill that database
+with `python -m app.seed` to test against production-sized tables.
+"""
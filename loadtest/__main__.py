@@ -0,0 +1,84 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import platform
+import sys
+import time
+import uuid
+
+import httpx
+
+from . import harness
+from .journeys import JOURNEYS
+from .stats import Recorder, format_summary
+
+
+async def _run(args, base_url: str | None) -> dict:
+    recorder = Recorder()
+    connections = args.concurrency if args.rate is None else args.max_in_flight
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    if base_url is None:
+        client = harness.in_process_client(args.database_url, limits)
+    else:
+        client = httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout)
+
+    journey = JOURNEYS[args.journey]
+    run_id = uuid.uuid4().hex[:8]
+    dropped = 0
+    start = time.monotonic()
+    async with client:
+        if args.rate is None:
+            await harness.closed_loop(client, journey, recorder, concurrency=args.concurrency,
+                                      duration=args.duration, seed=args.seed, run_id=run_id)
+        else:
+            dropped = await harness.open_loop(client, journey, recorder, rate=args.rate, duration=args.duration,
+                                              seed=args.seed, run_id=run_id, max_in_flight=args.max_in_flight)
+    summary = recorder.summary(time.monotonic() - start)
+    summary["dropped_arrivals"] = dropped
+    return summary
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m loadtest", description="Load test the calculator API")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="Base URL of an already running server")
+    target.add_argument("--serve", action="store_true", help="Start the app under uvicorn for the run")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers with --serve")
+    parser.add_argument("--database-url", help="DATABASE_URL for the in-process or --serve app")
+    parser.add_argument("--journey", choices=sorted(JOURNEYS), default="calculator")
+    shape = parser.add_mutually_exclusive_group()
+    shape.add_argument("--concurrency", type=int, default=10, help="Closed loop: concurrent virtual users")
+    shape.add_argument("--rate", type=float, help="Open loop: journey starts per second")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="Open loop: cap on running journeys")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to generate load")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout against a server")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", help="Free-form tag stored with the results (e.g. postgres-4w)")
+    parser.add_argument("-o", "--output", help="Also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    with contextlib.ExitStack() as stack:
+        base_url = args.url
+        if args.serve:
+            base_url = stack.enter_context(harness.uvicorn_server(args.database_url, args.workers))
+        summary = asyncio.run(_run(args, base_url))
+
+    print(format_summary(summary))
+    if summary["dropped_arrivals"]:
+        print(f"{summary['dropped_arrivals']} arrivals dropped at --max-in-flight {args.max_in_flight}", file=sys.stderr)
+    if args.output:
+        config = {key: value for key, value in vars(args).items() if key != "output"}
+        config["target"] = "url" if args.url else "uvicorn" if args.serve else "in-process"
+        result = {
+            "config": config,
+            "environment": {"python": sys.version.split()[0], "platform": platform.platform()},
+            "summary": summary,
+        }
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Load shapes and app targets.
+"""
+import asyncio
+import contextlib
+import itertools
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+from .stats import Recorder
+
+SERVER_START_TIMEOUT = 30.0
+
+
+async def closed_loop(client, journey, recorder: Recorder, *, concurrency: int, duration: float, seed: int, run_id: str) -> None:
+    """`concurrency` virtual users each run journeys back to back until the deadline"""
+    deadline = time.monotonic() + duration
+    user_numbers = itertools.count()
+
+    async def virtual_user(worker: int) -> None:
+        rng = random.Random(f"{seed}-{worker}")
+        while time.monotonic() < deadline:
+            await journey(client, recorder, rng, next(user_numbers), run_id)
+
+    await asyncio.gather(*(virtual_user(worker) for worker in range(concurrency)))
+
+
+async def open_loop(client, journey, recorder: Recorder, *, rate: float, duration: float, seed: int, run_id: str,
+                    max_in_flight: int) -> int:
+    """
+    Start journeys at Poisson arrivals of `rate` per second regardless of how
+    fast earlier ones finish, so queueing in the server shows up as latency.
+    Arrivals beyond max_in_flight running journeys are dropped and counted.
+
+    Returns:
+        Number of dropped arrivals
+    """
+    rng = random.Random(seed)
+    running: set[asyncio.Task] = set()
+    dropped = 0
+    start = time.monotonic()
+    next_at = start
+    for user_no in itertools.count():
+        next_at += rng.expovariate(rate)
+        if next_at - start >= duration:
+            break
+        await asyncio.sleep(max(0.0, next_at - time.monotonic()))
+        if len(running) >= max_in_flight:
+            dropped += 1
+            continue
+        task = asyncio.create_task(journey(client, recorder, random.Random(rng.random()), user_no, run_id))
+        running.add(task)
+        task.add_done_callback(running.discard)
+    await asyncio.gather(*running)
+    return dropped
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def uvicorn_server(database_url: str | None, workers: int):
+    """Run the app under a uvicorn subprocess and yield its base URL"""
+    port = _free_port()
+    env = dict(os.environ)
+    if database_url:
+        env["DATABASE_URL"] = database_url
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + SERVER_START_TIMEOUT
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with status {process.returncode}")
+            try:
+                if httpx.get(f"{url}/openapi.json", timeout=1.0).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError("uvicorn did not become ready in time")
+            time.sleep(0.2)
+        yield url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def in_process_client(database_url: str | None, limits: httpx.Limits) -> httpx.AsyncClient:
+    """AsyncClient wired straight to the ASGI app (no sockets, no server)"""
+    if database_url:
+        # app.database reads DATABASE_URL at import time
+        os.environ["DATABASE_URL"] = database_url
+    from app.main import app
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", limits=limits)
@@ -0,0 +1,63 @@
+"""
+Scripted user journeys.
+
+A journey is an async function (client, recorder, rng, user_no). Requests go
+through `timed`, which records latency under a route template such as
+"PUT /api/calculations/{id}" so every id lands in the same bucket.
+"""
+import time
+
+import httpx
+
+from .stats import Recorder
+
+PASSWORD = "loadtest-password"
+OPERATIONS = ("Add", "Sub", "Multiply", "Divide")
+
+
+async def timed(client: httpx.AsyncClient, recorder: Recorder, route: str, method: str, url: str, **kwargs):
+    """Send one request and record it; returns the response or None on a transport error"""
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+    except httpx.HTTPError:
+        recorder.record(route, 0, time.perf_counter() - start)
+        return None
+    recorder.record(route, response.status_code, time.perf_counter() - start)
+    return response
+
+
+async def calculator_journey(client: httpx.AsyncClient, recorder: Recorder, rng, user_no: int, run_id: str, calculations: int = 3) -> None:
+    """register -> login -> create N -> list -> read -> update -> delete"""
+    email = f"load-{run_id}-{user_no}@example.com"
+    response = await timed(client, recorder, "POST /register", "POST", "/register",
+                           json={"email": email, "password": PASSWORD})
+    if response is None or response.status_code != 200:
+        return
+    response = await timed(client, recorder, "POST /login", "POST", "/login",
+                           json={"email": email, "password": PASSWORD})
+    if response is None or response.status_code != 200:
+        return
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    ids = []
+    for _ in range(calculations):
+        response = await timed(
+            client, recorder, "POST /api/calculations/", "POST", "/api/calculations/",
+            json={"a": rng.uniform(-100, 100), "b": rng.uniform(1, 100), "type": rng.choice(OPERATIONS)},
+            headers=headers,
+        )
+        if response is not None and response.status_code == 201:
+            ids.append(response.json()["id"])
+
+    await timed(client, recorder, "GET /api/calculations/", "GET", "/api/calculations/", headers=headers)
+    for calc_id in ids:
+        await timed(client, recorder, "GET /api/calculations/{id}", "GET", f"/api/calculations/{calc_id}", headers=headers)
+        await timed(client, recorder, "PUT /api/calculations/{id}", "PUT", f"/api/calculations/{calc_id}",
+                    json={"a": rng.uniform(-100, 100)}, headers=headers)
+    for calc_id in ids:
+        await timed(client, recorder, "DELETE /api/calculations/{id}", "DELETE", f"/api/calculations/{calc_id}",
+                    headers=headers)
+
+
+JOURNEYS = {"calculator": calculator_journey}
@@ -0,0 +1,69 @@
+"""
+Per-route latency recording and reporting.
+"""
+import math
+from collections import defaultdict
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return math.nan
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class Recorder:
+    """Collects (route, status, latency) samples from every virtual user"""
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.statuses: dict[str, dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, route: str, status: int, seconds: float) -> None:
+        """status 0 means the request failed before a response arrived"""
+        self.latencies[route].append(seconds)
+        self.statuses[route][status] += 1
+        if status == 0 or status >= 400:
+            self.errors[route] += 1
+
+    def summary(self, elapsed: float) -> dict:
+        """Per-route and overall counts, throughput and latency percentiles"""
+        routes = {}
+        for route in sorted(self.latencies):
+            routes[route] = self._route_summary(self.latencies[route], self.errors[route], elapsed)
+            routes[route]["statuses"] = {str(code): count for code, count in sorted(self.statuses[route].items())}
+        everything = [value for values in self.latencies.values() for value in values]
+        return {
+            "elapsed_seconds": elapsed,
+            "total": self._route_summary(everything, sum(self.errors.values()), elapsed),
+            "routes": routes,
+        }
+
+    @staticmethod
+    def _route_summary(latencies: list[float], errors: int, elapsed: float) -> dict:
+        ordered = sorted(latencies)
+        summary = {
+            "requests": len(ordered),
+            "errors": errors,
+            "throughput_rps": len(ordered) / elapsed if elapsed else 0.0,
+            "mean_ms": sum(ordered) / len(ordered) * 1000 if ordered else math.nan,
+            "max_ms": ordered[-1] * 1000 if ordered else math.nan,
+        }
+        for pct in PERCENTILES:
+            summary[f"p{pct}_ms"] = percentile(ordered, pct) * 1000
+        return summary
+
+
+def format_summary(summary: dict) -> str:
+    header = f"{'route':36} {'reqs':>7} {'errs':>5} {'rps':>8} " + " ".join(f"{f'p{p}':>8}" for p in PERCENTILES)
+    lines = [header]
+    rows = list(summary["routes"].items()) + [("TOTAL", summary["total"])]
+    for route, row in rows:
+        pcts = " ".join(f"{row[f'p{p}_ms']:8.1f}" for p in PERCENTILES)
+        lines.append(f"{route:36} {row['requests']:7d} {row['errors']:5d} {row['throughput_rps']:8.1f} {pcts}")
+    lines.append(f"(latencies in ms over {summary['elapsed_seconds']:.1f}s)")
+    return "\n".join(lines)
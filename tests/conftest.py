@@ -1,10 +1,14 @@
 import pytest
 import os
+from contextlib import contextmanager
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
+from app.cache import calculation_cache
 from app.database import Base, get_db
 from app.main import app
+from app.memory import measure_growth
+from app.timing import QueryCounter
 
 @pytest.fixture
 def test_db(db_session):
@@ -35,6 +39,8 @@ def db_session():
     """
     # Create all tables
     Base.metadata.create_all(bind=engine)
+    # Ids restart with every fresh database, so cached reads must not leak across tests
+    calculation_cache.clear()
     
     db = TestingSessionLocal()
     try:
@@ -45,6 +51,18 @@ def db_session():
         Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture(scope="function")
+def seeded_db(db_session):
+    """
+    db_session pre-filled by app.seed: 20 users with a skewed total of
+    1000 calculations. Deterministic, so tests may rely on the counts.
+    """
+    from app.seed import seed
+
+    seed(db_session.get_bind(), users=20, calculations=50, skew=1.1, seed=0)
+    return db_session
+
+
 @pytest.fixture(scope="function")
 def override_get_db(db_session):
     """Override the get_db dependency for API tests"""
@@ -61,3 +79,44 @@ def client(override_get_db):
     """Provide a test client with database override"""
     from fastapi.testclient import TestClient
     return TestClient(app)
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Fail the test when a block runs more SQL statements than declared.
+
+        with query_budget(2):
+            client.get("/api/calculations/", headers=auth_headers)
+    """
+    @contextmanager
+    def budget(limit: int):
+        with QueryCounter() as queries:
+            yield queries
+        if queries.count > limit:
+            pytest.fail(
+                f"Query budget exceeded: {queries.count} statements (budget {limit})\n"
+                + "\n".join(f"  {statement}" for statement in queries.statements)
+            )
+    return budget
+
+
+@pytest.fixture
+def assert_no_memory_growth():
+    """
+    Fail the test when repeated calls leave net traced allocations behind.
+
+        assert_no_memory_growth(lambda: client.get("/api/calculations/", headers=h))
+
+    Bounded caches (regex, sqlite statement cache) fill during the warmup or
+    stay well under max_bytes; a per-call leak of a few hundred bytes does not.
+    """
+    def check(fn, iterations: int = 100, warmup: int = 50, max_bytes: int = 64 * 1024):
+        growth, top = measure_growth(fn, iterations=iterations, warmup=warmup)
+        if growth > max_bytes:
+            pytest.fail(
+                f"Memory grew by {growth} bytes over {iterations} calls (limit {max_bytes})\n"
+                + "\n".join(f"  +{site['size_diff_bytes']} B {site['site'][0]}" for site in top)
+            )
+        return growth
+    return check
@@ -0,0 +1,71 @@
+"""
+Integration tests for the admin memory diagnostics and leak checks.
+"""
+import pytest
+
+from app import admin
+from app.memory import memory_tracker, measure_growth
+
+
+def _register(client, email):
+    response = client.post("/register", json={"email": email, "password": "strongpass123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def admin_headers(client, monkeypatch):
+    monkeypatch.setattr(admin, "ADMIN_EMAILS", frozenset({"ops@example.com"}))
+    yield _register(client, "ops@example.com")
+    memory_tracker.stop()
+
+
+class TestAdminMemory:
+    """Tests for tracemalloc snapshots, diffs and the process report"""
+
+    def test_requires_admin(self, client):
+        """Test that non-admin users are forbidden"""
+        headers = _register(client, "plain@example.com")
+        assert client.get("/admin/memory", headers=headers).status_code == 403
+
+    def test_report(self, client, admin_headers):
+        """Test that the report covers RSS and GC generations, with tracing off by default"""
+        report = client.get("/admin/memory", headers=admin_headers).json()
+        assert report["rss_bytes"] > 0
+        assert len(report["gc_generations"]) == 3
+        assert report["tracemalloc"] is None
+
+    def test_snapshot_requires_tracing(self, client, admin_headers):
+        """Test that snapshots are refused while tracemalloc is stopped"""
+        assert client.post("/admin/memory/snapshots", headers=admin_headers).status_code == 409
+
+    def test_diff_reports_growing_sites(self, client, admin_headers):
+        """Test that allocations made between two snapshots show up in the diff"""
+        client.post("/admin/memory/tracemalloc/start?frames=1", headers=admin_headers)
+        base = client.post("/admin/memory/snapshots", headers=admin_headers).json()["id"]
+        retained = [bytearray(1024) for _ in range(256)]  # noqa: F841 - kept alive on purpose
+
+        diff = client.get(f"/admin/memory/diff?base={base}&limit=5", headers=admin_headers).json()
+        assert diff["current"] == base + 1
+        assert any("test_admin_memory.py" in entry["site"][0] for entry in diff["top_growth"])
+        assert sum(entry["size_diff_bytes"] for entry in diff["top_growth"]) >= 256 * 1024
+
+        listed = client.get("/admin/memory/snapshots", headers=admin_headers).json()["snapshots"]
+        assert [snapshot["id"] for snapshot in listed] == [base, base + 1]
+        assert client.get("/admin/memory/diff?base=999", headers=admin_headers).status_code == 404
+
+
+class TestMemoryGrowth:
+    """Leak checks over repeated requests"""
+
+    def test_detects_a_leak(self):
+        """Test that measure_growth reports a deliberate leak and its allocation site"""
+        leaked = []
+        growth, top = measure_growth(lambda: leaked.append(bytearray(4096)), iterations=50, warmup=0)
+        assert growth >= 50 * 4096
+        assert "test_admin_memory.py" in top[0]["site"][0]
+
+    def test_list_requests_do_not_grow(self, client, assert_no_memory_growth):
+        """Test that repeated list requests don't retain memory"""
+        headers = _register(client, "steady@example.com")
+        client.post("/api/calculations/", json={"a": 1, "b": 2, "type": "Add"}, headers=headers)
+        assert_no_memory_growth(lambda: client.get("/api/calculations/", headers=headers))
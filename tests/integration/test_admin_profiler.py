@@ -0,0 +1,121 @@
+"""
+Integration tests for the admin-gated sampling profiler.
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app import admin, profiler
+
+
+@pytest.fixture(autouse=True)
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler, "PROFILER_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _register(client, email):
+    response = client.post("/register", json={"email": email, "password": "strongpass123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def admin_headers(client, monkeypatch):
+    monkeypatch.setattr(admin, "ADMIN_EMAILS", frozenset({"ops@example.com"}))
+    return _register(client, "ops@example.com")
+
+
+class TestAdminProfiler:
+    """Tests for single-request and time-window profiling"""
+
+    def test_requires_admin(self, client):
+        headers = _register(client, "plain@example.com")
+        assert client.post("/admin/profile/token", headers=headers).status_code == 403
+        assert client.get("/admin/profiles").status_code in (401, 403)
+
+    def test_signed_header_profiles_one_request(self, client, admin_headers, profile_dir):
+        """Test that a request with a valid X-Profile header writes collapsed stacks"""
+        token = client.post("/admin/profile/token", headers=admin_headers).json()
+
+        response = client.get("/api/calculations/", headers={**admin_headers, token["header"]: token["value"]})
+        assert response.status_code == 200
+        profile_id = response.headers["X-Profile-Id"]
+
+        names = client.get("/admin/profiles", headers=admin_headers).json()["profiles"]
+        assert f"{profile_id}.folded" in names
+        content = client.get(f"/admin/profiles/{profile_id}.folded", headers=admin_headers).text
+        for line in content.splitlines():
+            stack, _, count = line.rpartition(" ")
+            assert ";" in stack and int(count) > 0
+
+    def test_invalid_signature_is_ignored(self, client, admin_headers):
+        response = client.get("/api/calculations/", headers={**admin_headers, "X-Profile": "9999999999.forged"})
+        assert response.status_code == 200
+        assert "X-Profile-Id" not in response.headers
+
+    def test_window_profile_is_written_when_it_closes(self, client, admin_headers, profile_dir):
+        response = client.post("/admin/profile?seconds=0.05", headers=admin_headers)
+        assert response.status_code == 202
+        path = profile_dir / f"{response.json()['id']}.folded"
+        for _ in range(100):
+            if path.exists():
+                break
+            time.sleep(0.02)
+        assert path.exists()
+
+    def test_window_length_is_capped(self, client, admin_headers):
+        response = client.post(f"/admin/profile?seconds={profiler.PROFILER_MAX_SECONDS + 1}", headers=admin_headers)
+        assert response.status_code == 422
+
+
+class TestProfileToken:
+    """Tests for the signed X-Profile value"""
+
+    def test_round_trip_and_expiry(self):
+        assert profiler.verify_profile_token(profiler.create_profile_token())
+        assert not profiler.verify_profile_token(profiler.create_profile_token(ttl=-1))
+        assert not profiler.verify_profile_token("garbage")
+
+
+def _unrelated_work(stop: threading.Event) -> None:
+    while not stop.is_set():
+        time.sleep(0.001)
+
+
+def _served_work() -> None:
+    with profiler.request_thread():
+        time.sleep(0.1)
+
+
+class TestStackSampler:
+    """Tests for which threads a session samples"""
+
+    def test_request_session_only_samples_its_threads(self):
+        """Test that background threads only show up in the all-thread window profile"""
+        sampler = profiler.StackSampler(interval=0.002)
+        stop = threading.Event()
+        threading.Thread(target=_unrelated_work, args=(stop,), name="unrelated", daemon=True).start()
+
+        async def profiled_request():
+            session = sampler.begin("request", scoped=True)
+            token = profiler.set_request_session(session)
+            try:
+                await asyncio.to_thread(_served_work)
+            finally:
+                profiler.reset_request_session(token)
+            return session
+
+        window = sampler.begin("window")
+        try:
+            request = asyncio.run(profiled_request())
+        finally:
+            stop.set()
+        sampler.end(request)
+        sampler.end(window)
+
+        request_stacks = "\n".join(request.stacks)
+        assert "_served_work" in request_stacks
+        assert "_unrelated_work" not in request_stacks
+        assert "_unrelated_work" in "\n".join(window.stacks)
@@ -0,0 +1,158 @@
+"""
+Integration tests for admission control and load shedding.
+"""
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app import admission, metrics
+from app.middleware.admission import AdmissionMiddleware
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    metrics.REGISTRY.clear()
+    yield
+
+
+def _app(gates: dict[str, admission.AdmissionGate]) -> FastAPI:
+    app = FastAPI()
+    release = asyncio.Event()
+    app.state.release = release
+
+    @app.get("/api/slow")
+    async def slow():
+        await release.wait()
+        return {"ok": True}
+
+    @app.post("/api/write")
+    async def write():
+        return {"ok": True}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    app.add_middleware(AdmissionMiddleware, gates=gates)
+    return app
+
+
+def _gates(limit: int = 1, queue: int = 1, timeout: float = 5.0) -> dict[str, admission.AdmissionGate]:
+    return {name: admission.AdmissionGate(name, limit, queue, timeout) for name in ("auth", "read", "write")}
+
+
+async def _client(app: FastAPI) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+class TestRouteClass:
+    """Tests for request classification"""
+
+    @pytest.mark.parametrize("method,path,expected", [
+        ("POST", "/login", "auth"),
+        ("POST", "/users/register", "auth"),
+        ("GET", "/api/calculations/", "read"),
+        ("HEAD", "/calculations/1", "read"),
+        ("PUT", "/api/calculations/1", "write"),
+        ("GET", "/health", None),
+        ("GET", "/metrics", None),
+        ("GET", "/static/app.js", None),
+    ])
+    def test_classification(self, method, path, expected):
+        assert admission.route_class(method, path) == expected
+
+
+class TestAdmissionMiddleware:
+    """Tests for concurrency limits, queueing and shedding"""
+
+    def test_excess_requests_shed_with_retry_after(self):
+        """Test that requests beyond limit + queue get 503 immediately"""
+        gates = _gates(limit=1, queue=1)
+        app = _app(gates)
+
+        async def run():
+            async with await _client(app) as client:
+                running = asyncio.create_task(client.get("/api/slow"))
+                queued = asyncio.create_task(client.get("/api/slow"))
+                while gates["read"].queued < 1:
+                    await asyncio.sleep(0.005)
+                shed = await client.get("/api/slow")
+                app.state.release.set()
+                return shed, await running, await queued
+
+        shed, running, queued = asyncio.run(run())
+        assert shed.status_code == 503
+        assert shed.headers["retry-after"] == str(admission.ADMISSION_RETRY_AFTER)
+        assert shed.json() == {"detail": "Server is overloaded, retry later"}
+        assert running.status_code == 200
+        assert queued.status_code == 200  # handed the slot when the first finished
+        assert gates["read"].in_flight == 0
+        assert gates["read"].queued == 0
+
+    def test_queue_deadline_sheds_waiting_request(self):
+        gates = _gates(limit=1, queue=5, timeout=0.05)
+        app = _app(gates)
+
+        async def run():
+            async with await _client(app) as client:
+                running = asyncio.create_task(client.get("/api/slow"))
+                while gates["read"].in_flight < 1:
+                    await asyncio.sleep(0.005)
+                timed_out = await client.get("/api/slow")
+                app.state.release.set()
+                return timed_out, await running
+
+        timed_out, running = asyncio.run(run())
+        assert timed_out.status_code == 503
+        assert running.status_code == 200
+        text = metrics.render(metrics.REGISTRY.snapshot())
+        assert 'admission_shed_total{route_class="read",reason="timeout"} 1.0' in text
+
+    def test_classes_are_isolated_and_health_bypasses(self):
+        """Test that saturated reads don't block writes or health checks"""
+        gates = _gates(limit=1, queue=0)
+        app = _app(gates)
+
+        async def run():
+            async with await _client(app) as client:
+                running = asyncio.create_task(client.get("/api/slow"))
+                while gates["read"].in_flight < 1:
+                    await asyncio.sleep(0.005)
+                results = (
+                    await client.get("/api/slow"),
+                    await client.post("/api/write"),
+                    await client.get("/health"),
+                )
+                app.state.release.set()
+                await running
+                return results
+
+        read, write, health = asyncio.run(run())
+        assert read.status_code == 503
+        assert write.status_code == 200
+        assert health.status_code == 200
+
+    def test_cancelled_waiter_leaves_queue(self):
+        gate = admission.AdmissionGate("read", limit=1, queue=1, timeout=5)
+
+        async def run():
+            assert await gate.acquire() is None
+            waiting = asyncio.create_task(gate.acquire())
+            await asyncio.sleep(0.01)
+            waiting.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiting
+            gate.release()
+
+        asyncio.run(run())
+        assert gate.in_flight == 0
+        assert gate.queued == 0
+
+
+class TestHealthEndpoint:
+    def test_health(self, client):
+        response = client.get("/health")
+        assert response.status_code == 200
+        assert response.json() == {"status": "ok"}
@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
+from app import crud
 from app.models import Calculation, User
-from app.schemas import CalcType
+from app.schemas import CalcType, CalculationRead
 from app.services.factory import CalculationFactory
 
 
@@ -131,3 +132,51 @@ class TestCalculationDatabase:
         # Assert all are associated with user
         assert len(user.calculations) == 3
         assert all(calc.user_id == user.id for calc in user.calculations)
+
+
+class TestCalculationReadRows:
+    """Integration tests for the column-projected read-only crud queries"""
+
+    def test_user_calculation_rows_skip_identity_map(self, db_session: Session):
+        """Test that row queries return plain rows without loading ORM entities"""
+        user = User(username="rowuser", email="rows@example.com", password_hash="hashed")
+        db_session.add(user)
+        db_session.commit()
+        user_id = user.id
+        db_session.add_all([
+            Calculation(a=1.0, b=2.0, type=CalcType.Add.value, user_id=user_id),
+            Calculation(a=6.0, b=3.0, type=CalcType.Divide.value, user_id=user_id),
+        ])
+        db_session.commit()
+        db_session.expunge_all()
+
+        rows = crud.get_user_calculation_rows(db_session, user_id)
+
+        assert len(rows) == 2
+        assert len(db_session.identity_map) == 0
+        assert {(row.a, row.b, row.type) for row in rows} == {(1.0, 2.0, "Add"), (6.0, 3.0, "Divide")}
+
+    def test_calculation_row_serializes_with_result(self, db_session: Session):
+        """Test that a row validates into CalculationRead with computed result"""
+        calc = Calculation(a=9.0, b=3.0, type=CalcType.Divide.value)
+        db_session.add(calc)
+        db_session.commit()
+
+        row = crud.get_calculation_row_by_id(db_session, calc.id)
+        read = CalculationRead.model_validate(row)
+
+        assert read.id == calc.id
+        assert read.result == 3.0
+
+    def test_calculation_row_by_id_and_user_checks_owner(self, db_session: Session):
+        """Test that the owner-scoped row query does not return other users' rows"""
+        user = User(username="owner", email="owner@example.com", password_hash="hashed")
+        db_session.add(user)
+        db_session.commit()
+        calc = Calculation(a=1.0, b=1.0, type=CalcType.Add.value, user_id=user.id)
+        db_session.add(calc)
+        db_session.commit()
+
+        assert crud.get_calculation_row_by_id_and_user(db_session, calc.id, user.id) is not None
+        assert crud.get_calculation_row_by_id_and_user(db_session, calc.id, user.id + 1) is None
+        assert len(crud.get_all_calculation_rows(db_session)) == 1
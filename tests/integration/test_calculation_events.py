@@ -0,0 +1,206 @@
+"""
+Integration tests for GET /api/calculations/events (Server-Sent Events).
+"""
+import asyncio
+import json
+
+import pytest
+from anyio import to_thread
+
+from app import security
+from app.events import RESET, EventHub, TooManySubscribers, event_hub
+from app.main import app
+
+
+def _register(client, email: str) -> str:
+    response = client.post("/register", json={"email": email, "password": "strongpass123"})
+    return response.json()["access_token"]
+
+
+def _parse(chunks: list[bytes]) -> list[tuple[str, dict]]:
+    """(event name, data) pairs from a Server-Sent Events body"""
+    events = []
+    for block in b"".join(chunks).decode().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if line and not line.startswith(":"))
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+async def _open_stream(path: str, headers: list | None = None):
+    """Drive the app directly so the endless body can be read while it is open"""
+    chunks: list[bytes] = []
+    start: dict = {}
+    disconnect = asyncio.Event()
+
+    async def receive():
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            start.update(message)
+        elif message.get("body"):
+            chunks.append(message["body"])
+
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "root_path": "", "headers": headers or [], "client": ("test", 1), "server": ("test", 80),
+    }
+    task = asyncio.create_task(app(scope, receive, send))
+    return task, start, chunks, disconnect
+
+
+async def _wait_for(predicate, timeout: float = 5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+class TestCalculationEvents:
+    """Live create/update/delete events for the calculations page"""
+
+    def test_writes_stream_as_deltas(self, client):
+        token = _register(client, "live@example.com")
+        other = _register(client, "other@example.com")
+        headers = {"Authorization": f"Bearer {token}"}
+        ticket = client.post("/api/calculations/events/ticket", headers=headers).json()["ticket"]
+
+        async def run():
+            task, start, chunks, disconnect = await _open_stream(f"/api/calculations/events?ticket={ticket}")
+            await _wait_for(lambda: chunks)
+
+            def writes():
+                created = client.post("/api/calculations/", json={"a": 2, "b": 3, "type": "Add"}, headers=headers).json()
+                client.post(
+                    "/api/calculations/", json={"a": 1, "b": 1, "type": "Add"},
+                    headers={"Authorization": f"Bearer {other}"},
+                )
+                client.put(f"/api/calculations/{created['id']}", json={"b": 5}, headers=headers)
+                client.delete(f"/api/calculations/{created['id']}", headers=headers)
+                return created["id"]
+
+            calc_id = await to_thread.run_sync(writes)
+            await _wait_for(lambda: len(_parse(chunks)) >= 4)
+            disconnect.set()
+            await task
+            return start, _parse(chunks), calc_id
+
+        start, events, calc_id = asyncio.run(run())
+        assert start["status"] == 200
+        assert dict(start["headers"])[b"content-type"].startswith(b"text/event-stream")
+        assert [name for name, _ in events] == ["ready", "created", "updated", "deleted"]
+        assert events[1][1]["calculation"]["result"] == 5.0
+        assert events[2][1]["calculation"]["result"] == 7.0
+        assert events[3][1] == {"type": "deleted", "id": calc_id, "seq": events[2][1]["seq"] + 1}
+        assert event_hub.subscribers == 0  # unsubscribed on disconnect
+
+    def test_update_streams_recomputed_dependents(self, client):
+        token = _register(client, "chain@example.com")
+        headers = {"Authorization": f"Bearer {token}"}
+        parent = client.post("/api/calculations/", json={"a": 1, "b": 1, "type": "Add"}, headers=headers).json()
+        child = client.post(
+            "/api/calculations/", json={"a_ref_id": parent["id"], "b": 10, "type": "Multiply"}, headers=headers,
+        ).json()
+
+        async def run():
+            task, _, chunks, disconnect = await _open_stream(
+                "/api/calculations/events", headers=[(b"authorization", f"Bearer {token}".encode())],
+            )
+            await _wait_for(lambda: chunks)
+            await to_thread.run_sync(
+                lambda: client.put(f"/api/calculations/{parent['id']}", json={"a": 4}, headers=headers)
+            )
+            await _wait_for(lambda: len(_parse(chunks)) >= 3)
+            disconnect.set()
+            await task
+            return _parse(chunks)
+
+        events = asyncio.run(run())
+        updated = {data["calculation"]["id"]: data["calculation"]["result"] for name, data in events if name == "updated"}
+        assert updated == {parent["id"]: 5.0, child["id"]: 50.0}
+
+    def test_requires_token(self, client):
+        assert client.get("/api/calculations/events").status_code == 401
+        assert client.get("/api/calculations/events?ticket=bogus").status_code == 401
+
+    def test_full_hub_answers_503(self, client, monkeypatch):
+        """Test that hitting the subscriber limit is backpressure, not an empty 200 stream"""
+        token = _register(client, "full@example.com")
+        monkeypatch.setattr(event_hub, "max_subscribers", 0)
+        response = client.get("/api/calculations/events", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "5"
+        assert event_hub.subscribers == 0
+
+    def test_access_token_not_accepted_in_query(self, client):
+        """Test that only stream tickets may appear in the URL"""
+        token = _register(client, "query@example.com")
+        assert client.get(f"/api/calculations/events?ticket={token}").status_code == 401
+        assert client.get(f"/api/calculations/events?token={token}").status_code == 401
+
+    def test_ticket_only_opens_the_stream(self, client):
+        token = _register(client, "ticket@example.com")
+        response = client.post("/api/calculations/events/ticket", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200
+        assert response.json()["expires_in"] == security.STREAM_TICKET_TTL
+        ticket = response.json()["ticket"]
+        assert client.get("/api/calculations/", headers={"Authorization": f"Bearer {ticket}"}).status_code == 401
+
+    def test_expired_ticket_is_rejected(self, client, monkeypatch):
+        token = _register(client, "expired@example.com")
+        monkeypatch.setattr(security, "STREAM_TICKET_TTL", -1)
+        ticket = client.post(
+            "/api/calculations/events/ticket", headers={"Authorization": f"Bearer {token}"}
+        ).json()["ticket"]
+        assert client.get(f"/api/calculations/events?ticket={ticket}").status_code == 401
+
+
+class TestEventHub:
+    """Tests for the in-process pub/sub hub"""
+
+    def test_publish_reaches_only_the_owner(self):
+        hub = EventHub()
+
+        async def run():
+            mine, theirs = hub.subscribe(1), hub.subscribe(2)
+            hub.publish(1, {"type": "deleted", "id": 3})
+            hub.publish(None, {"type": "deleted", "id": 4})
+            return await mine.get(1), await theirs.get(0.05)
+
+        mine, theirs = asyncio.run(run())
+        assert mine[1] == {"type": "deleted", "id": 3}
+        assert theirs is None
+
+    def test_slow_subscriber_gets_reset(self):
+        """Test that an overflowing queue is replaced by a single reset"""
+        hub = EventHub()
+
+        async def run():
+            subscription = hub.subscribe(1)
+            subscription.queue = asyncio.Queue(2)
+            for calc_id in range(5):
+                hub.publish(1, {"type": "deleted", "id": calc_id})
+            await asyncio.sleep(0)
+            first = await subscription.get(1)
+            return first, await subscription.get(0.05)
+
+        first, rest = asyncio.run(run())
+        assert first[1] is RESET
+        assert rest is None
+
+    def test_subscriber_limit(self):
+        hub = EventHub(max_subscribers=1)
+
+        async def run():
+            subscription = hub.subscribe(1)
+            with pytest.raises(TooManySubscribers):
+                hub.subscribe(1)
+            hub.unsubscribe(subscription)
+            hub.subscribe(1)
+
+        asyncio.run(run())
+        assert hub.subscribers == 1
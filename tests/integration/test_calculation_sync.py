@@ -0,0 +1,121 @@
+"""
+Integration tests for delta sync (GET /api/calculations/changes) and
+tombstone compaction.
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import models
+from app.services.sync import compact_tombstones
+
+
+@pytest.fixture
+def auth_headers(client):
+    response = client.post(
+        "/register",
+        json={"email": "sync@example.com", "password": "strongpass123"},
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _create(client, auth_headers, a: float, b: float = 1.0) -> dict:
+    return client.post("/api/calculations/", json={"a": a, "b": b, "type": "Add"}, headers=auth_headers).json()
+
+
+def _changes(client, auth_headers, since: int):
+    return client.get("/api/calculations/changes", params={"since": since}, headers=auth_headers)
+
+
+class TestDeltaSync:
+    """Tests for the change feed"""
+
+    def test_full_sync_then_deltas(self, client, auth_headers):
+        first = _create(client, auth_headers, 1)
+        second = _create(client, auth_headers, 2)
+
+        full = _changes(client, auth_headers, 0).json()
+        assert full["full"] is True
+        assert [change["id"] for change in full["changes"]] == [first["id"], second["id"]]
+        assert full["changes"][0]["calculation"]["result"] == 2.0
+        since = full["seq"]
+
+        assert _changes(client, auth_headers, since).json() == {"seq": since, "full": False, "changes": []}
+
+        client.put(f"/api/calculations/{first['id']}", json={"a": 10}, headers=auth_headers)
+        client.delete(f"/api/calculations/{second['id']}", headers=auth_headers)
+        third = _create(client, auth_headers, 3)
+
+        delta = _changes(client, auth_headers, since).json()
+        assert delta["full"] is False
+        assert [(change["op"], change["id"]) for change in delta["changes"]] == [
+            ("upsert", first["id"]),
+            ("delete", second["id"]),
+            ("upsert", third["id"]),
+        ]
+        assert delta["changes"][0]["calculation"]["result"] == 11.0
+        assert delta["changes"][1]["calculation"] is None
+        seqs = [change["seq"] for change in delta["changes"]]
+        assert seqs == sorted(seqs) and seqs[0] > since
+        assert delta["seq"] == seqs[-1]
+
+    def test_changes_are_per_user(self, client, auth_headers):
+        other = client.post("/register", json={"email": "other-sync@example.com", "password": "strongpass123"})
+        other_headers = {"Authorization": f"Bearer {other.json()['access_token']}"}
+        _create(client, other_headers, 1)
+
+        assert _changes(client, auth_headers, 0).json()["changes"] == []
+
+    def test_recomputed_dependents_are_changes(self, client, auth_headers):
+        parent = _create(client, auth_headers, 1)
+        child = client.post(
+            "/api/calculations/", json={"a_ref_id": parent["id"], "b": 2, "type": "Multiply"}, headers=auth_headers,
+        ).json()
+        since = _changes(client, auth_headers, 0).json()["seq"]
+
+        client.put(f"/api/calculations/{parent['id']}", json={"a": 4}, headers=auth_headers)
+
+        changes = _changes(client, auth_headers, since).json()["changes"]
+        assert {change["id"]: change["calculation"]["result"] for change in changes} == {
+            parent["id"]: 5.0,
+            child["id"]: 10.0,
+        }
+
+    def test_unknown_seq_is_gone(self, client, auth_headers):
+        _create(client, auth_headers, 1)
+        response = _changes(client, auth_headers, 99)
+        assert response.status_code == 410
+
+    def test_changes_query_budget(self, client, auth_headers, query_budget):
+        """Test that the feed costs the same statements regardless of history"""
+        for a in range(20):
+            _create(client, auth_headers, a)
+        since = _changes(client, auth_headers, 0).json()["seq"]
+        _create(client, auth_headers, 100)
+
+        with query_budget(3):  # user, changed rows, tombstones
+            changes = _changes(client, auth_headers, since).json()["changes"]
+        assert len(changes) == 1
+
+
+class TestTombstoneCompaction:
+    """Tests for tombstone retention"""
+
+    def test_compaction_raises_sync_floor(self, client, auth_headers, db_session):
+        calc = _create(client, auth_headers, 1)
+        since = _changes(client, auth_headers, 0).json()["seq"]
+        client.delete(f"/api/calculations/{calc['id']}", headers=auth_headers)
+        tombstone = db_session.query(models.CalculationTombstone).one()
+        assert tombstone.calc_id == calc["id"]
+
+        assert compact_tombstones(db_session, retention=timedelta(days=1)) == 0
+        tombstone.deleted_at = datetime.now(timezone.utc) - timedelta(days=2)
+        db_session.commit()
+        assert compact_tombstones(db_session, retention=timedelta(days=1)) == 1
+
+        assert db_session.query(models.CalculationTombstone).count() == 0
+        assert _changes(client, auth_headers, since).status_code == 410
+        # A client that synced after the compacted delete is unaffected
+        latest = _changes(client, auth_headers, 0).json()
+        assert latest["changes"] == []
+        assert _changes(client, auth_headers, latest["seq"]).status_code == 200
@@ -0,0 +1,466 @@
+"""
+Integration tests for the authenticated /api/calculations endpoints.
+"""
+import numpy as np
+import pytest
+
+from app import streaming
+from app.cache import calculation_cache
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Register a user through /register and return bearer auth headers"""
+    response = client.post(
+        "/register",
+        json={"email": "apiuser@example.com", "password": "strongpass123"},
+    )
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _create(client, auth_headers, a=6.0, b=3.0, type="Add"):
+    response = client.post(
+        "/api/calculations/",
+        json={"a": a, "b": b, "type": type},
+        headers=auth_headers,
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
+class TestCalculationETags:
+    """Tests for ETag / If-None-Match handling on calculation reads"""
+
+    def test_list_returns_etag(self, client, auth_headers):
+        """Test that the list endpoint sets a strong ETag"""
+        _create(client, auth_headers)
+        response = client.get("/api/calculations/", headers=auth_headers)
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+        assert etag.startswith('"') and not etag.startswith("W/")
+        assert response.headers["Cache-Control"] == "private, no-cache"
+
+    def test_list_if_none_match_returns_304(self, client, auth_headers):
+        """Test that a matching If-None-Match gets an empty 304"""
+        _create(client, auth_headers)
+        etag = client.get("/api/calculations/", headers=auth_headers).headers["ETag"]
+
+        response = client.get(
+            "/api/calculations/",
+            headers={**auth_headers, "If-None-Match": etag},
+        )
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+
+    @pytest.mark.parametrize("write", ["create", "update", "delete"])
+    def test_writes_change_etag(self, client, auth_headers, write):
+        """Test that every write invalidates the previous ETag"""
+        calc = _create(client, auth_headers)
+        etag = client.get("/api/calculations/", headers=auth_headers).headers["ETag"]
+
+        if write == "create":
+            _create(client, auth_headers)
+        elif write == "update":
+            client.put(f"/api/calculations/{calc['id']}", json={"a": 1.0}, headers=auth_headers)
+        else:
+            client.delete(f"/api/calculations/{calc['id']}", headers=auth_headers)
+
+        response = client.get(
+            "/api/calculations/",
+            headers={**auth_headers, "If-None-Match": etag},
+        )
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+    def test_single_calculation_etag(self, client, auth_headers):
+        """Test conditional GET on a single calculation"""
+        calc = _create(client, auth_headers)
+        first = client.get(f"/api/calculations/{calc['id']}", headers=auth_headers)
+        assert first.status_code == 200
+
+        response = client.get(
+            f"/api/calculations/{calc['id']}",
+            headers={**auth_headers, "If-None-Match": f"W/{first.headers['ETag']}"},
+        )
+        assert response.status_code == 304
+
+    def test_wildcard_only_matches_existing_calculation(self, client, auth_headers):
+        """Test that If-None-Match: * never turns a 404 into a 304"""
+        calc = _create(client, auth_headers)
+        wildcard = {**auth_headers, "If-None-Match": "*"}
+
+        assert client.get(f"/api/calculations/{calc['id']}", headers=wildcard).status_code == 304
+        assert client.get(f"/api/calculations/{calc['id'] + 1000}", headers=wildcard).status_code == 404
+
+
+class TestCalculationReadCache:
+    """Tests for the per-user read cache behind the GET endpoints"""
+
+    def test_repeated_list_is_served_from_cache(self, client, auth_headers):
+        """Test that a second identical read is a cache hit"""
+        _create(client, auth_headers)
+        first = client.get("/api/calculations/", headers=auth_headers)
+        hits = calculation_cache.stats.hits
+        second = client.get("/api/calculations/", headers=auth_headers)
+
+        assert calculation_cache.stats.hits == hits + 1
+        assert second.json() == first.json()
+        assert second.json()[0]["result"] == 9.0
+
+    def test_ignored_query_parameters_share_the_cached_list(self, client, auth_headers):
+        """Test that cache-busting parameters don't create new cache entries"""
+        _create(client, auth_headers)
+        client.get("/api/calculations/", headers=auth_headers)
+        hits = calculation_cache.stats.hits
+        client.get("/api/calculations/?_=1700000000", headers=auth_headers)
+        client.get("/api/calculations/?x=1&y=2", headers=auth_headers)
+
+        assert calculation_cache.stats.hits == hits + 2
+
+    def test_write_invalidates_cached_list(self, client, auth_headers):
+        """Test that a create is visible on the next read"""
+        _create(client, auth_headers)
+        client.get("/api/calculations/", headers=auth_headers)
+        _create(client, auth_headers, a=1.0, b=1.0)
+
+        response = client.get("/api/calculations/", headers=auth_headers)
+        assert len(response.json()) == 2
+
+    def test_update_visible_through_single_read_cache(self, client, auth_headers):
+        """Test that a cached single calculation reflects an update"""
+        calc = _create(client, auth_headers)
+        client.get(f"/api/calculations/{calc['id']}", headers=auth_headers)
+        client.put(f"/api/calculations/{calc['id']}", json={"type": "Multiply"}, headers=auth_headers)
+
+        response = client.get(f"/api/calculations/{calc['id']}", headers=auth_headers)
+        assert response.json()["result"] == 18.0
+
+
+class TestExpressionCalculations:
+    """Tests for the Expression calculation type through the API"""
+
+    def test_create_expression_calculation(self, client, auth_headers):
+        """Test that an Expression row stores its formula and computes a result"""
+        response = client.post(
+            "/api/calculations/",
+            json={"a": 3.0, "b": 4.0, "type": "Expression", "expression": "sqrt(a**2 + b**2)"},
+            headers=auth_headers,
+        )
+        assert response.status_code == 201
+        data = response.json()
+        assert data["expression"] == "sqrt(a**2 + b**2)"
+        assert data["result"] == 5.0
+
+        listed = client.get("/api/calculations/", headers=auth_headers).json()
+        assert listed[0]["result"] == 5.0
+
+    def test_create_expression_requires_formula(self, client, auth_headers):
+        """Test that Expression without a formula is rejected"""
+        response = client.post(
+            "/api/calculations/",
+            json={"a": 3.0, "b": 4.0, "type": "Expression"},
+            headers=auth_headers,
+        )
+        assert response.status_code == 422
+
+    def test_create_expression_rejects_unsafe_formula(self, client, auth_headers):
+        """Test that formulas outside the whitelist are rejected"""
+        response = client.post(
+            "/api/calculations/",
+            json={"a": 1.0, "b": 1.0, "type": "Expression", "expression": "__import__('os')"},
+            headers=auth_headers,
+        )
+        assert response.status_code == 422
+
+    def test_update_to_expression_without_formula_rejected(self, client, auth_headers):
+        """Test that a partial update cannot leave an Expression without a formula"""
+        calc = _create(client, auth_headers)
+        response = client.put(
+            f"/api/calculations/{calc['id']}",
+            json={"type": "Expression"},
+            headers=auth_headers,
+        )
+        assert response.status_code == 422
+
+    def test_update_away_from_expression_clears_formula(self, client, auth_headers):
+        """Test that switching back to a binary type drops the formula"""
+        response = client.post(
+            "/api/calculations/",
+            json={"a": 3.0, "b": 4.0, "type": "Expression", "expression": "a * b"},
+            headers=auth_headers,
+        )
+        calc_id = response.json()["id"]
+        updated = client.put(f"/api/calculations/{calc_id}", json={"type": "Add"}, headers=auth_headers)
+        assert updated.json()["expression"] is None
+        assert updated.json()["result"] == 7.0
+
+
+class TestCalculationReferences:
+    """Tests for calculations that use other calculations as operands"""
+
+    def test_create_with_reference_uses_parent_result(self, client, auth_headers):
+        """Test that a_ref_id resolves to the referenced result"""
+        parent = _create(client, auth_headers, a=2.0, b=3.0, type="Add")
+        response = client.post(
+            "/api/calculations/",
+            json={"a_ref_id": parent["id"], "b": 10.0, "type": "Multiply"},
+            headers=auth_headers,
+        )
+        assert response.status_code == 201
+        assert response.json()["a"] == 5.0
+        assert response.json()["result"] == 50.0
+
+    def test_update_recomputes_chain(self, client, auth_headers):
+        """Test that changing an input updates every downstream node"""
+        first = _create(client, auth_headers, a=1.0, b=1.0, type="Add")
+        second = client.post(
+            "/api/calculations/",
+            json={"a_ref_id": first["id"], "b": 2.0, "type": "Multiply"},
+            headers=auth_headers,
+        ).json()
+        third = client.post(
+            "/api/calculations/",
+            json={"a_ref_id": second["id"], "b_ref_id": first["id"], "type": "Sub"},
+            headers=auth_headers,
+        ).json()
+        assert third["result"] == 2.0
+
+        client.put(f"/api/calculations/{first['id']}", json={"a": 4.0}, headers=auth_headers)
+
+        updated = client.get(f"/api/calculations/{third['id']}", headers=auth_headers).json()
+        # first = 5, second = 10, third = 10 - 5
+        assert updated["a"] == 10.0
+        assert updated["b"] == 5.0
+        assert updated["result"] == 5.0
+
+    def test_cycle_is_rejected(self, client, auth_headers):
+        """Test that pointing a node at its own descendant fails"""
+        first = _create(client, auth_headers)
+        second = client.post(
+            "/api/calculations/",
+            json={"a_ref_id": first["id"], "b": 1.0, "type": "Add"},
+            headers=auth_headers,
+        ).json()
+        response = client.put(
+            f"/api/calculations/{first['id']}",
+            json={"a_ref_id": second["id"]},
+            headers=auth_headers,
+        )
+        assert response.status_code == 422
+        assert "cycle" in response.json()["detail"]
+
+    def test_cycle_through_several_hops_is_rejected(self, client, auth_headers):
+        """Test that a cycle is found through the whole ancestor chain"""
+        first = _create(client, auth_headers)
+        previous = first
+        for _ in range(3):
+            previous = client.post(
+                "/api/calculations/",
+                json={"a_ref_id": previous["id"], "b": 1.0, "type": "Add"},
+                headers=auth_headers,
+            ).json()
+        response = client.put(
+            f"/api/calculations/{first['id']}",
+            json={"b_ref_id": previous["id"]},
+            headers=auth_headers,
+        )
+        assert response.status_code == 422
+        assert "cycle" in response.json()["detail"]
+
+    def test_plain_edit_leaves_unrelated_chains_alone(self, client, auth_headers):
+        """Test that an edit without references or dependents recomputes nothing else"""
+        parent = _create(client, auth_headers, a=1.0, b=1.0, type="Add")
+        child = client.post(
+            "/api/calculations/",
+            json={"a_ref_id": parent["id"], "b": 1.0, "type": "Add"},
+            headers=auth_headers,
+        ).json()
+        loner = _create(client, auth_headers, a=1.0, b=1.0, type="Add")
+
+        response = client.put(f"/api/calculations/{loner['id']}", json={"a": 7.0}, headers=auth_headers)
+        assert response.json()["result"] == 8.0
+        assert client.get(f"/api/calculations/{child['id']}", headers=auth_headers).json()["result"] == 3.0
+
+    def test_downstream_divide_by_zero_rejects_update(self, client, auth_headers):
+        """Test that an update making a dependent invalid is rolled back"""
+        divisor = _create(client, auth_headers, a=2.0, b=1.0, type="Sub")
+        dependent = client.post(
+            "/api/calculations/",
+            json={"a": 10.0, "b_ref_id": divisor["id"], "type": "Divide"},
+            headers=auth_headers,
+        ).json()
+
+        response = client.put(f"/api/calculations/{divisor['id']}", json={"a": 1.0}, headers=auth_headers)
+        assert response.status_code == 422
+
+        unchanged = client.get(f"/api/calculations/{dependent['id']}", headers=auth_headers).json()
+        assert unchanged["result"] == 10.0
+
+    def test_reference_to_other_users_calculation_rejected(self, client, auth_headers):
+        """Test that references are scoped to the owner"""
+        other = client.post("/calculations/", json={"a": 1.0, "b": 1.0, "type": "Add"}).json()
+        response = client.post(
+            "/api/calculations/",
+            json={"a_ref_id": other["id"], "b": 1.0, "type": "Add"},
+            headers=auth_headers,
+        )
+        assert response.status_code == 422
+
+    def test_delete_detaches_dependents(self, client, auth_headers):
+        """Test that deleting a parent keeps dependents with their last value"""
+        parent = _create(client, auth_headers, a=2.0, b=2.0, type="Multiply")
+        child = client.post(
+            "/api/calculations/",
+            json={"a_ref_id": parent["id"], "b": 1.0, "type": "Add"},
+            headers=auth_headers,
+        ).json()
+
+        client.delete(f"/api/calculations/{parent['id']}", headers=auth_headers)
+
+        detached = client.get(f"/api/calculations/{child['id']}", headers=auth_headers).json()
+        assert detached["a_ref_id"] is None
+        assert detached["result"] == 5.0
+
+
+class TestArrayCalculations:
+    """Tests for Sum/Product/Mean/Min/Max calculations over packed operands"""
+
+    def _create_array(self, client, auth_headers, operands, type="Sum"):
+        response = client.post(
+            "/api/calculations/",
+            json={"type": type, "operands": operands},
+            headers=auth_headers,
+        )
+        assert response.status_code == 201
+        return response.json()
+
+    def test_create_returns_reduction_without_operands(self, client, auth_headers):
+        """Test that reads carry the count and result but not the array"""
+        calc = self._create_array(client, auth_headers, [1.0, 2.0, 3.0, 4.0], type="Mean")
+        assert calc["result"] == 2.5
+        assert calc["operand_count"] == 4
+        assert calc["a"] is None and "operands" not in calc
+
+        listed = client.get("/api/calculations/", headers=auth_headers).json()
+        assert listed[0]["result"] == 2.5
+
+    def test_operands_endpoint_json_and_binary(self, client, auth_headers):
+        """Test that operands come back as JSON or packed float64"""
+        values = [0.5, 1.5, -2.0]
+        calc = self._create_array(client, auth_headers, values)
+
+        response = client.get(f"/api/calculations/{calc['id']}/operands", headers=auth_headers)
+        assert response.json() == {"operands": values}
+
+        response = client.get(
+            f"/api/calculations/{calc['id']}/operands",
+            headers={**auth_headers, "Accept": "application/octet-stream"},
+        )
+        assert np.frombuffer(response.content, dtype="<f8").tolist() == values
+
+    def test_large_operands_are_streamed(self, client, auth_headers, monkeypatch):
+        """Test that arrays above the chunk size stream a valid document"""
+        monkeypatch.setattr(streaming, "STREAM_CHUNK_ROWS", 3)
+        values = [float(i) for i in range(10)]
+        calc = self._create_array(client, auth_headers, values)
+        response = client.get(f"/api/calculations/{calc['id']}/operands", headers=auth_headers)
+        assert response.json()["operands"] == values
+
+    def test_update_type_reuses_stored_operands(self, client, auth_headers):
+        """Test that switching reduction re-evaluates the stored array"""
+        calc = self._create_array(client, auth_headers, [3.0, 1.0, 2.0])
+        response = client.put(f"/api/calculations/{calc['id']}", json={"type": "Max"}, headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()["result"] == 3.0
+
+        response = client.put(
+            f"/api/calculations/{calc['id']}", json={"operands": [7.0, 9.0]}, headers=auth_headers
+        )
+        assert response.json()["result"] == 9.0
+        assert response.json()["operand_count"] == 2
+
+    def test_switch_to_binary_type_drops_operands(self, client, auth_headers):
+        """Test that a binary type needs a and b and clears the array"""
+        calc = self._create_array(client, auth_headers, [1.0, 2.0])
+        response = client.put(f"/api/calculations/{calc['id']}", json={"type": "Add"}, headers=auth_headers)
+        assert response.status_code == 422
+
+        response = client.put(
+            f"/api/calculations/{calc['id']}",
+            json={"type": "Add", "a": 1.0, "b": 2.0},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        assert response.json()["operand_count"] is None
+        response = client.get(f"/api/calculations/{calc['id']}/operands", headers=auth_headers)
+        assert response.status_code == 400
+
+    def test_array_result_can_be_referenced(self, client, auth_headers):
+        """Test that a reduction feeds a dependent calculation"""
+        total = self._create_array(client, auth_headers, [1.0, 2.0, 3.0])
+        dependent = client.post(
+            "/api/calculations/",
+            json={"a_ref_id": total["id"], "b": 2.0, "type": "Multiply"},
+            headers=auth_headers,
+        ).json()
+        assert dependent["result"] == 12.0
+
+        client.put(f"/api/calculations/{total['id']}", json={"operands": [5.0]}, headers=auth_headers)
+        updated = client.get(f"/api/calculations/{dependent['id']}", headers=auth_headers).json()
+        assert updated["result"] == 10.0
+
+
+class TestCoalescedReads:
+    """Identical concurrent reads share one query and serialization"""
+
+    def test_concurrent_identical_lists_run_one_query(self, client, auth_headers, db_session, monkeypatch):
+        import threading
+        import time
+
+        from sqlalchemy.orm import sessionmaker
+
+        from app import crud
+        from app.database import get_db
+        from app.main import app
+        from app.singleflight import calculation_reads
+
+        _create(client, auth_headers)
+
+        # Concurrent requests need their own sessions
+        sessions = sessionmaker(bind=db_session.get_bind())
+
+        def per_request_db():
+            db = sessions()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = per_request_db
+
+        original = crud.get_user_calculation_rows
+        queries = []
+
+        def slow_rows(db, user_id):
+            queries.append(user_id)
+            time.sleep(0.3)  # keep the leader in flight while the others arrive
+            return original(db, user_id)
+
+        monkeypatch.setattr(crud, "get_user_calculation_rows", slow_rows)
+        responses = []
+
+        def read():
+            responses.append(client.get("/api/calculations/", headers=auth_headers))
+
+        threads = [threading.Thread(target=read) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(queries) == 1
+        assert [response.status_code for response in responses] == [200] * 6
+        assert len({response.content for response in responses}) == 1
+        assert calculation_reads.in_flight() == 0
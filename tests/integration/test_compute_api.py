@@ -0,0 +1,128 @@
+"""
+Integration tests for the stateless POST /api/compute endpoint.
+"""
+import numpy as np
+import pytest
+
+from app import streaming
+from app.routers import compute_router
+from app.security import create_access_token
+
+
+@pytest.fixture
+def auth_headers():
+    """The endpoint only needs a valid token; no user row is looked up"""
+    return {"Authorization": f"Bearer {create_access_token({'sub': 'batch@example.com'})}"}
+
+
+def _pack(a, b, codes):
+    return (
+        np.asarray(a, dtype="<f8").tobytes()
+        + np.asarray(b, dtype="<f8").tobytes()
+        + np.asarray(codes, dtype=np.uint8).tobytes()
+    )
+
+
+class TestComputeEndpoint:
+    """Tests for JSON and packed binary batch computation"""
+
+    def test_json_batch(self, client, auth_headers):
+        """Test columnar JSON input returns aligned results"""
+        response = client.post(
+            "/api/compute",
+            json={"a": [1, 10, 3, 8], "b": [2, 4, 5, 2], "type": ["Add", "Sub", "Multiply", "Divide"]},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        assert response.json() == {"results": [3.0, 6.0, 15.0, 4.0]}
+
+    def test_json_divide_by_zero_rejected_for_batch(self, client, auth_headers):
+        """Test that the whole batch is rejected and the bad rows reported"""
+        response = client.post(
+            "/api/compute",
+            json={"a": [1, 2, 3], "b": [0, 0, 0], "type": ["Add", "Divide", "Divide"]},
+            headers=auth_headers,
+        )
+        assert response.status_code == 422
+        assert "rows [1, 2]" in response.text
+
+    def test_json_length_mismatch_rejected(self, client, auth_headers):
+        """Test that columns must have equal lengths"""
+        response = client.post(
+            "/api/compute",
+            json={"a": [1, 2], "b": [1], "type": ["Add", "Add"]},
+            headers=auth_headers,
+        )
+        assert response.status_code == 422
+
+    def test_binary_batch(self, client, auth_headers):
+        """Test packed binary input returns packed float64 results"""
+        response = client.post(
+            "/api/compute",
+            content=_pack([1, 10, 3, 8], [2, 4, 5, 2], [0, 1, 2, 3]),
+            headers={**auth_headers, "Content-Type": "application/octet-stream"},
+        )
+        assert response.status_code == 200
+        assert np.frombuffer(response.content, dtype="<f8").tolist() == [3.0, 6.0, 15.0, 4.0]
+
+    def test_binary_invalid_code_rejected(self, client, auth_headers):
+        """Test that unknown type codes are rejected"""
+        response = client.post(
+            "/api/compute",
+            content=_pack([1], [1], [9]),
+            headers={**auth_headers, "Content-Type": "application/octet-stream"},
+        )
+        assert response.status_code == 422
+
+    def test_large_batch_is_streamed(self, client, auth_headers, monkeypatch):
+        """Test that batches above the chunk size stream a valid document"""
+        monkeypatch.setattr(streaming, "STREAM_CHUNK_ROWS", 3)
+        n = 10
+        response = client.post(
+            "/api/compute",
+            json={"a": list(range(n)), "b": [1] * n, "type": ["Add"] * n},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        assert response.json()["results"] == [float(i + 1) for i in range(n)]
+
+    def test_requires_authentication(self, client):
+        """Test that the endpoint rejects anonymous requests"""
+        response = client.post("/api/compute", json={"a": [], "b": [], "type": []})
+        assert response.status_code in (401, 403)
+
+    def test_oversized_body_rejected_from_content_length(self, client, auth_headers, monkeypatch):
+        """Test that a body larger than the biggest allowed batch is a 413"""
+        monkeypatch.setattr(compute_router, "COMPUTE_MAX_BATCH", 2)
+        response = client.post(
+            "/api/compute",
+            content=_pack([1, 2, 3], [1, 1, 1], [0, 0, 0]),
+            headers={**auth_headers, "Content-Type": "application/octet-stream"},
+        )
+        assert response.status_code == 413
+
+    def test_oversized_streamed_body_rejected(self, client, auth_headers, monkeypatch):
+        """Test that a chunked body without Content-Length is cut off at the limit"""
+        monkeypatch.setattr(compute_router, "COMPUTE_MAX_BATCH", 2)
+
+        def chunks():
+            for _ in range(3):
+                yield _pack([1], [1], [0])
+
+        response = client.post(
+            "/api/compute",
+            content=chunks(),
+            headers={**auth_headers, "Content-Type": "application/octet-stream"},
+        )
+        assert response.status_code == 413
+
+    def test_json_at_the_batch_limit_is_accepted(self, client, auth_headers, monkeypatch):
+        """Test that the JSON size limit leaves room for a full batch"""
+        monkeypatch.setattr(compute_router, "COMPUTE_MAX_BATCH", 3)
+        value = -1.2345678901234567e-300
+        response = client.post(
+            "/api/compute",
+            json={"a": [value] * 3, "b": [value] * 3, "type": ["Multiply"] * 3},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
@@ -0,0 +1,137 @@
+"""
+Integration tests for group commit of calculation inserts.
+"""
+import threading
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.database import get_db
+from app.main import app
+from app.services import group_commit
+from app.services.group_commit import GroupCommitter
+
+
+@pytest.fixture
+def commits(db_session):
+    """Count transactions committed on the test engine"""
+    engine = db_session.get_bind()
+    count = [0]
+
+    def on_commit(conn):
+        count[0] += 1
+
+    event.listen(engine, "commit", on_commit)
+    yield count
+    event.remove(engine, "commit", on_commit)
+
+
+@pytest.fixture
+def per_request_db(db_session):
+    """Concurrent requests need their own sessions"""
+    sessions = sessionmaker(bind=db_session.get_bind())
+
+    def _get_db():
+        db = sessions()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = _get_db
+    yield
+
+
+def _in_threads(fn, count: int) -> list:
+    results = [None] * count
+
+    def run(index):
+        results[index] = fn(index)
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class TestGroupCommitter:
+    """Tests for batching inserts into shared transactions"""
+
+    def test_concurrent_inserts_share_one_commit(self, db_session, commits):
+        committer = GroupCommitter(window=0.2, max_rows=8)
+        engine = db_session.get_bind()
+
+        ids = _in_threads(
+            lambda index: committer.insert(engine, {"a": index, "b": 1.0, "type": "Add", "user_id": None}),
+            8,
+        )
+
+        assert commits[0] == 1
+        assert len(set(ids)) == 8
+        rows = {calc.id: calc.a for calc in db_session.query(models.Calculation)}
+        assert sorted(rows[calc_id] for calc_id in ids) == list(range(8))
+        assert [rows[calc_id] for calc_id in ids] == list(range(8))  # each caller got its own id
+
+    def test_bad_row_fails_only_its_caller(self, db_session):
+        """Test that a failed batch is retried row by row"""
+        committer = GroupCommitter(window=0.2, max_rows=3)
+        engine = db_session.get_bind()
+        rows = [
+            {"a": 1.0, "b": 1.0, "type": "Add", "user_id": None},
+            {"a": 2.0, "b": 1.0, "type": None, "user_id": None},  # violates NOT NULL
+            {"a": 3.0, "b": 1.0, "type": "Add", "user_id": None},
+        ]
+
+        def insert(index):
+            try:
+                return committer.insert(engine, rows[index])
+            except Exception as exc:
+                return exc
+
+        results = _in_threads(insert, 3)
+        assert isinstance(results[1], Exception)
+        assert all(isinstance(result, int) for result in (results[0], results[2]))
+        assert db_session.query(models.Calculation).count() == 2
+
+    def test_single_insert_commits_after_window(self, db_session):
+        committer = GroupCommitter(window=0.01, max_rows=100)
+        calc_id = committer.insert(db_session.get_bind(), {"a": 1.0, "b": 2.0, "type": "Add", "user_id": None})
+        assert db_session.get(models.Calculation, calc_id).b == 2.0
+
+
+class TestGroupCommitApi:
+    """POST /api/calculations/ with GROUP_COMMIT_ENABLED"""
+
+    def test_concurrent_creates_batched(self, client, db_session, per_request_db, commits, monkeypatch):
+        monkeypatch.setattr(group_commit, "GROUP_COMMIT_ENABLED", True)
+        monkeypatch.setattr(group_commit, "group_committer", GroupCommitter(window=0.3, max_rows=6))
+        token = client.post(
+            "/register", json={"email": "batch@example.com", "password": "strongpass123"},
+        ).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        etag = client.get("/api/calculations/", headers=headers).headers["etag"]
+        commits[0] = 0
+
+        responses = _in_threads(
+            lambda index: client.post(
+                "/api/calculations/", json={"a": index, "b": 2, "type": "Multiply"}, headers=headers,
+            ),
+            6,
+        )
+
+        assert [response.status_code for response in responses] == [201] * 6
+        assert [response.json()["result"] for response in responses] == [index * 2.0 for index in range(6)]
+        assert len({response.json()["id"] for response in responses}) == 6
+        assert commits[0] == 1
+        listing = client.get("/api/calculations/", headers=headers)
+        assert listing.headers["etag"] != etag
+        assert len(listing.json()) == 6
+
+    def test_validation_still_rejects_before_batching(self, client, monkeypatch):
+        monkeypatch.setattr(group_commit, "GROUP_COMMIT_ENABLED", True)
+        response = client.post("/calculations/", json={"a": 1, "b": 0, "type": "Divide"})
+        assert response.status_code == 422
@@ -0,0 +1,219 @@
+"""
+Integration tests for the background job endpoints and runner.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from sqlalchemy import update
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.services import jobs
+
+
+@pytest.fixture
+def runner(db_session, tmp_path, monkeypatch):
+    """A job runner on the test database, using threads instead of processes"""
+    monkeypatch.setattr(jobs, "JOBS_DIR", str(tmp_path))
+    monkeypatch.setattr(jobs.job_runner, "wake", lambda: None)
+    session_factory = sessionmaker(bind=db_session.get_bind(), autoflush=False)
+    job_runner = jobs.JobRunner(session_factory, executor_factory=lambda: ThreadPoolExecutor(2), chunk_rows=2)
+    yield job_runner
+    job_runner.stop()
+
+
+@pytest.fixture
+def auth_headers(client):
+    response = client.post(
+        "/register",
+        json={"email": "jobuser@example.com", "password": "strongpass123"},
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+class TestJobsApi:
+    """Tests for submitting, running, inspecting and cancelling jobs"""
+
+    def test_compute_job_runs_to_completion(self, client, auth_headers, runner):
+        """Test a compute job produces a downloadable packed result"""
+        response = client.post(
+            "/api/jobs/",
+            json={"kind": "compute", "data": {"a": [1, 2, 3, 4, 5], "b": [1, 1, 1, 1, 2], "type": ["Add", "Sub", "Multiply", "Divide", "Add"]}},
+            headers=auth_headers,
+        )
+        assert response.status_code == 202
+        job = response.json()
+        assert job["status"] == "queued"
+        assert job["total"] == 5
+
+        assert runner.run_pending() == 1
+
+        finished = client.get(f"/api/jobs/{job['id']}", headers=auth_headers).json()
+        assert finished["status"] == "succeeded"
+        assert finished["processed"] == 5
+        result = client.get(f"/api/jobs/{job['id']}/result", headers=auth_headers)
+        assert np.frombuffer(result.content, dtype="<f8").tolist() == [2.0, 1.0, 3.0, 4.0, 7.0]
+
+    def test_import_job_inserts_calculations(self, client, auth_headers, runner):
+        """Test an import job creates calculations for the user in chunks"""
+        response = client.post(
+            "/api/jobs/",
+            json={"kind": "import", "data": {"a": [1, 2, 3], "b": [4, 5, 6], "type": ["Add", "Add", "Multiply"]}},
+            headers=auth_headers,
+        )
+        runner.run_pending()
+
+        assert client.get(f"/api/jobs/{response.json()['id']}", headers=auth_headers).json()["status"] == "succeeded"
+        calculations = client.get("/api/calculations/", headers=auth_headers).json()
+        assert [c["result"] for c in calculations] == [5.0, 7.0, 18.0]
+
+    def test_export_job_writes_csv(self, client, auth_headers, runner):
+        """Test an export job writes every calculation with its result"""
+        client.post("/api/calculations/", json={"a": 6, "b": 3, "type": "Divide"}, headers=auth_headers)
+        client.post(
+            "/api/calculations/",
+            json={"a": 2, "b": 3, "type": "Expression", "expression": "a ** b"},
+            headers=auth_headers,
+        )
+        job = client.post("/api/jobs/", json={"kind": "export"}, headers=auth_headers).json()
+        runner.run_pending()
+
+        result = client.get(f"/api/jobs/{job['id']}/result", headers=auth_headers)
+        lines = result.text.strip().splitlines()
+        assert lines[0] == "id,a,b,type,expression,result"
+        assert lines[1].endswith(",Divide,,2.0")
+        assert lines[2].endswith(",Expression,a ** b,8.0")
+
+    def test_cancel_queued_job(self, client, auth_headers, runner):
+        """Test that a cancelled job is never run"""
+        job = client.post("/api/jobs/", json={"kind": "export"}, headers=auth_headers).json()
+        cancelled = client.post(f"/api/jobs/{job['id']}/cancel", headers=auth_headers).json()
+        assert cancelled["status"] == "cancelled"
+        assert runner.run_pending() == 0
+
+    def test_job_requires_data_for_compute(self, client, auth_headers):
+        """Test validation of the job payload"""
+        response = client.post("/api/jobs/", json={"kind": "compute"}, headers=auth_headers)
+        assert response.status_code == 422
+
+    def test_jobs_are_scoped_to_user(self, client, auth_headers):
+        """Test that other users cannot see a job"""
+        job = client.post("/api/jobs/", json={"kind": "export"}, headers=auth_headers).json()
+        other = client.post("/register", json={"email": "other@example.com", "password": "strongpass123"})
+        other_headers = {"Authorization": f"Bearer {other.json()['access_token']}"}
+        assert client.get(f"/api/jobs/{job['id']}", headers=other_headers).status_code == 404
+        assert client.get("/api/jobs/", headers=other_headers).json() == []
+
+
+def _strand(db_session, job_id: int, status: str = "running", **values) -> None:
+    """Leave a job as a dead worker would: claimed, with a stale heartbeat"""
+    stale = datetime.now(timezone.utc) - timedelta(seconds=jobs.JOBS_LEASE_SECONDS + 60)
+    db_session.execute(
+        update(models.Job).where(models.Job.id == job_id)
+        .values(status=status, heartbeat_at=stale, attempts=1, **values)
+    )
+    db_session.commit()
+
+
+class TestJobLeases:
+    """Tests for recovering jobs whose worker died"""
+
+    def _submit_compute(self, client, auth_headers):
+        return client.post(
+            "/api/jobs/",
+            json={"kind": "compute", "data": {"a": [1, 2], "b": [3, 4], "type": ["Add", "Add"]}},
+            headers=auth_headers,
+        ).json()
+
+    def test_expired_running_job_is_requeued_and_rerun(self, client, auth_headers, runner, db_session):
+        job = self._submit_compute(client, auth_headers)
+        _strand(db_session, job["id"], processed=1)
+
+        assert runner.run_pending() == 1
+        finished = client.get(f"/api/jobs/{job['id']}", headers=auth_headers).json()
+        assert finished["status"] == "succeeded"
+        assert finished["processed"] == 2
+
+    def test_live_lease_is_left_alone(self, client, auth_headers, runner, db_session):
+        job = self._submit_compute(client, auth_headers)
+        db_session.execute(
+            update(models.Job).where(models.Job.id == job["id"])
+            .values(status="running", heartbeat_at=datetime.now(timezone.utc))
+        )
+        db_session.commit()
+
+        assert runner.run_pending() == 0
+        assert client.get(f"/api/jobs/{job['id']}", headers=auth_headers).json()["status"] == "running"
+
+    def test_expired_job_fails_after_max_attempts(self, client, auth_headers, runner, db_session, monkeypatch):
+        monkeypatch.setattr(jobs, "JOBS_MAX_ATTEMPTS", 1)
+        job = self._submit_compute(client, auth_headers)
+        _strand(db_session, job["id"])
+
+        runner.start()
+        runner.stop()
+        failed = client.get(f"/api/jobs/{job['id']}", headers=auth_headers).json()
+        assert failed["status"] == "failed"
+        assert "attempts exhausted" in failed["error"]
+
+    def test_expired_partial_import_fails_instead_of_duplicating(self, client, auth_headers, runner, db_session):
+        job = client.post(
+            "/api/jobs/",
+            json={"kind": "import", "data": {"a": [1, 2], "b": [3, 4], "type": ["Add", "Add"]}},
+            headers=auth_headers,
+        ).json()
+        _strand(db_session, job["id"], processed=1)
+
+        assert runner.run_pending() == 0
+        assert client.get(f"/api/jobs/{job['id']}", headers=auth_headers).json()["status"] == "failed"
+
+    def test_expired_cancelling_job_is_cancelled(self, client, auth_headers, runner, db_session):
+        job = self._submit_compute(client, auth_headers)
+        _strand(db_session, job["id"], status="cancelling")
+
+        runner.run_pending()
+        assert client.get(f"/api/jobs/{job['id']}", headers=auth_headers).json()["status"] == "cancelled"
+
+
+class TestJobInputCleanup:
+    """Tests that input files are removed once a job is finished"""
+
+    def _submit(self, client, auth_headers):
+        job = client.post(
+            "/api/jobs/",
+            json={"kind": "compute", "data": {"a": [1, 2], "b": [3, 4], "type": ["Add", "Add"]}},
+            headers=auth_headers,
+        ).json()
+        assert os.path.exists(jobs._input_path(job["id"]))
+        return job
+
+    def test_input_removed_after_success(self, client, auth_headers, runner):
+        job = self._submit(client, auth_headers)
+        runner.run_pending()
+        assert client.get(f"/api/jobs/{job['id']}", headers=auth_headers).json()["status"] == "succeeded"
+        assert not os.path.exists(jobs._input_path(job["id"]))
+
+    def test_input_removed_after_failure(self, client, auth_headers, runner, monkeypatch):
+        def crash(db, job, started):
+            raise RuntimeError("worker pool crashed")
+
+        monkeypatch.setattr(runner, "_run_compute", crash)
+        job = self._submit(client, auth_headers)
+        runner.run_pending()
+        assert client.get(f"/api/jobs/{job['id']}", headers=auth_headers).json()["status"] == "failed"
+        assert not os.path.exists(jobs._input_path(job["id"]))
+
+    def test_input_removed_after_cancel(self, client, auth_headers, runner):
+        job = self._submit(client, auth_headers)
+        client.post(f"/api/jobs/{job['id']}/cancel", headers=auth_headers)
+        assert not os.path.exists(jobs._input_path(job["id"]))
+
+    def test_input_kept_when_requeued(self, client, auth_headers, runner, db_session):
+        job = self._submit(client, auth_headers)
+        _strand(db_session, job["id"])
+        with runner.session_factory() as db:
+            runner._recover_expired(db)
+        assert os.path.exists(jobs._input_path(job["id"]))
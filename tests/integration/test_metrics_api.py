@@ -0,0 +1,73 @@
+"""
+Integration tests for GET /metrics.
+"""
+import pytest
+
+from app import metrics, security
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    metrics.REGISTRY.clear()
+    security._decode_cache.clear()
+    yield
+
+
+@pytest.fixture
+def auth_headers(client):
+    response = client.post(
+        "/register",
+        json={"email": "metrics@example.com", "password": "strongpass123"},
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+class TestMetricsEndpoint:
+    """Tests for the Prometheus scrape endpoint"""
+
+    def test_request_metrics_per_route_template(self, client, auth_headers):
+        """Test that requests are counted under their route template"""
+        calc = client.post("/api/calculations/", json={"a": 1, "b": 2, "type": "Add"}, headers=auth_headers).json()
+        client.get(f"/api/calculations/{calc['id']}", headers=auth_headers)
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        text = response.text
+        assert 'http_requests_total{method="GET",route="/api/calculations/{calc_id}",status="200"} 1.0' in text
+        assert 'http_request_duration_seconds_count{method="POST",route="/api/calculations/"} 1' in text
+        assert 'http_requests_in_progress{method="GET"} 1.0' in text  # the scrape itself
+
+    def test_unmatched_routes_share_a_label(self, client):
+        client.get("/no-such-page-1")
+        client.get("/no-such-page-2")
+        assert 'http_requests_total{method="GET",route="unmatched",status="404"} 2.0' in client.get("/metrics").text
+
+    def test_password_and_jwt_cache_metrics(self, client, auth_headers):
+        """Test password hash timing and JWT decode cache hit/miss counts"""
+        client.get("/api/calculations/", headers=auth_headers)
+        client.get("/api/calculations/", headers=auth_headers)
+
+        text = client.get("/metrics").text
+        assert 'password_hash_duration_seconds_count{operation="hash"} 1' in text
+        assert 'jwt_decode_cache_total{result="miss"} 1.0' in text
+        assert 'jwt_decode_cache_total{result="hit"} 1.0' in text
+
+    def test_calculation_cache_metrics(self, client, auth_headers):
+        """Test cache hits, misses and invalidations are exported as counters"""
+        client.get("/api/calculations/", headers=auth_headers)
+        client.get("/api/calculations/", headers=auth_headers)
+        client.post("/api/calculations/", json={"a": 1, "b": 2, "type": "Add"}, headers=auth_headers)
+
+        text = client.get("/metrics").text
+        assert 'calc_cache_lookups_total{result="miss"} 1.0' in text
+        assert 'calc_cache_lookups_total{result="hit"} 1.0' in text
+        assert "calc_cache_invalidations_total 1.0" in text
+
+    def test_auth_failures_counted(self, client):
+        client.post("/login", json={"email": "nobody@example.com", "password": "wrongpass123"})
+        client.get("/api/calculations/", headers={"Authorization": "Bearer not-a-token"})
+
+        text = client.get("/metrics").text
+        assert 'auth_failures_total{reason="bad_credentials"} 1.0' in text
+        assert 'auth_failures_total{reason="invalid_token"} 1.0' in text
@@ -0,0 +1,138 @@
+"""
+Integration tests for the event-loop lag and threadpool monitor.
+"""
+import asyncio
+import json
+import logging
+import time
+
+import pytest
+from anyio import to_thread
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import metrics, monitor
+from app.middleware.monitor import RequestArrivalMiddleware
+from fastapi.routing import APIRoute
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    metrics.REGISTRY.clear()
+    yield
+
+
+def _sample(name: str):
+    """Value of an unlabelled metric in the registry snapshot"""
+    return dict((tuple(labels), value) for labels, value in metrics.REGISTRY.snapshot()[name]["samples"])[()]
+
+
+class TestThreadTracker:
+    """Tests for per-route threadpool wait and holder reporting"""
+
+    def _app(self, tracker: monitor.ThreadTracker) -> FastAPI:
+        app = FastAPI()
+        app.add_middleware(RequestArrivalMiddleware)
+
+        def slow(seconds: float):
+            time.sleep(seconds)
+            return {"ok": True}
+
+        def fast():
+            return {"ok": True}
+
+        app.router.routes.append(APIRoute("/slow", tracker.wrap(slow, "/slow"), methods=["GET"]))
+        app.router.routes.append(APIRoute("/fast", tracker.wrap(fast, "/fast"), methods=["GET"]))
+        return app
+
+    def test_wait_recorded_per_route(self):
+        tracker = monitor.ThreadTracker(threshold=10)
+        with TestClient(self._app(tracker)) as client:
+            assert client.get("/fast").status_code == 200
+        text = metrics.render(metrics.REGISTRY.snapshot())
+        assert 'threadpool_wait_seconds_count{route="/fast"} 1' in text
+
+    def test_saturation_logs_holding_routes(self, caplog):
+        """Test that a long wait logs the routes that were holding threads"""
+        tracker = monitor.ThreadTracker(threshold=0.05, warning_interval=0)
+        app = self._app(tracker)
+
+        async def run():
+            import httpx
+
+            monitor.configure_threadpool(2)
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                short = asyncio.create_task(client.get("/slow", params={"seconds": 0.1}))
+                long = asyncio.create_task(client.get("/slow", params={"seconds": 0.4}))
+                await asyncio.sleep(0.03)
+                fast = await client.get("/fast")
+                await asyncio.gather(short, long)
+            return fast
+
+        with caplog.at_level(logging.WARNING, logger="app.monitor"):
+            response = asyncio.run(run())
+        assert response.status_code == 200
+
+        events = [json.loads(record.message) for record in caplog.records if record.name == "app.monitor"]
+        assert events, "expected a threadpool_saturated warning"
+        assert events[0]["event"] == "threadpool_saturated"
+        assert events[0]["route"] == "/fast"
+        assert events[0]["wait_seconds"] >= 0.05  # queued behind both /slow requests
+        assert events[0]["holders"]["/slow"]["threads"] == 1
+
+    def test_warnings_rate_limited(self, caplog):
+        tracker = monitor.ThreadTracker(threshold=0, warning_interval=60)
+        with caplog.at_level(logging.WARNING, logger="app.monitor"):
+            with TestClient(self._app(tracker)) as client:
+                client.get("/fast")
+                client.get("/fast")
+        assert len([record for record in caplog.records if record.name == "app.monitor"]) == 1
+
+
+class TestLoopMonitor:
+    """Tests for event-loop lag and threadpool gauges"""
+
+    def test_lag_and_threadpool_gauges(self):
+        async def run():
+            monitor.configure_threadpool(7)
+            loop_monitor = monitor.LoopMonitor(interval=0.01)
+            loop_monitor.start()
+            await asyncio.sleep(0.02)
+            time.sleep(0.1)  # block the loop
+            await asyncio.sleep(0.03)
+            await loop_monitor.stop()
+
+        asyncio.run(run())
+        _, lag_sum, lag_count = _sample("event_loop_lag_seconds")
+        assert lag_count >= 2
+        assert lag_sum >= 0.05
+        assert _sample("threadpool_size") == 7
+        assert _sample("threadpool_busy_threads") == 0
+        assert _sample("threadpool_queued_tasks") == 0
+
+    def test_queued_tasks_log_holders(self, caplog):
+        """Test that a tick seeing queued tasks logs the routes holding threads"""
+        tracker = monitor.ThreadTracker(warning_interval=0)
+        blocking = tracker.wrap(lambda: time.sleep(0.2), "/report")
+
+        async def run():
+            monitor.configure_threadpool(1)
+            loop_monitor = monitor.LoopMonitor(interval=0.01, tracker=tracker)
+            loop_monitor.start()
+            await asyncio.gather(to_thread.run_sync(blocking), to_thread.run_sync(blocking))
+            await loop_monitor.stop()
+
+        with caplog.at_level(logging.WARNING, logger="app.monitor"):
+            asyncio.run(run())
+        events = [json.loads(record.message) for record in caplog.records if record.name == "app.monitor"]
+        assert events[0]["queued"] == 1
+        assert events[0]["size"] == 1
+        assert events[0]["holders"]["/report"]["threads"] == 1
+
+    def test_app_lifespan_applies_threadpool_size(self):
+        from app.main import app
+
+        with TestClient(app) as client:
+            limiter_size = client.portal.call(lambda: to_thread.current_default_thread_limiter().total_tokens)
+        assert limiter_size == monitor.THREADPOOL_SIZE
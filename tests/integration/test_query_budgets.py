@@ -0,0 +1,84 @@
+"""
+SQL statement budgets per endpoint.
+
+Each test declares how many statements an endpoint may run. Raising a budget
+should be a deliberate, reviewed change.
+"""
+import pytest
+
+from app import models
+
+
+@pytest.fixture
+def auth_headers(client):
+    response = client.post(
+        "/register",
+        json={"email": "budget@example.com", "password": "strongpass123"},
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def calc_id(client, auth_headers):
+    response = client.post("/api/calculations/", json={"a": 1, "b": 2, "type": "Add"}, headers=auth_headers)
+    return response.json()["id"]
+
+
+class TestQueryBudgets:
+    """Statement budgets for the calculation endpoints"""
+
+    def test_list_is_independent_of_row_count(self, client, auth_headers, db_session, query_budget):
+        """Test that listing many rows is still user lookup + one select (no N+1)"""
+        user = db_session.query(models.User).filter_by(email="budget@example.com").one()
+        db_session.add_all(models.Calculation(a=i, b=1, type="Add", user_id=user.id) for i in range(50))
+        db_session.commit()
+
+        with query_budget(2):
+            response = client.get("/api/calculations/", headers=auth_headers)
+        assert len(response.json()) == 50
+
+    def test_cached_list_only_looks_up_user(self, client, auth_headers, calc_id, query_budget):
+        """Test that a cached list only runs the user lookup"""
+        client.get("/api/calculations/", headers=auth_headers)
+        with query_budget(1):
+            client.get("/api/calculations/", headers=auth_headers)
+
+    def test_not_modified_only_looks_up_user(self, client, auth_headers, calc_id, query_budget):
+        """Test that a 304 on the list only runs the user lookup"""
+        etag = client.get("/api/calculations/", headers=auth_headers).headers["ETag"]
+        with query_budget(1):
+            response = client.get("/api/calculations/", headers={**auth_headers, "If-None-Match": etag})
+        assert response.status_code == 304
+
+    def test_detail(self, client, auth_headers, calc_id, query_budget):
+        """Test that a detail read is user lookup + one select"""
+        with query_budget(2):
+            client.get(f"/api/calculations/{calc_id}", headers=auth_headers)
+
+    def test_create(self, client, auth_headers, query_budget):
+        """Test that a create stays within its statement budget"""
+        with query_budget(4):
+            client.post("/api/calculations/", json={"a": 1, "b": 2, "type": "Add"}, headers=auth_headers)
+
+    def test_update(self, client, auth_headers, calc_id, query_budget):
+        """Test that an update without references stays within its statement budget"""
+        with query_budget(6):
+            client.put(f"/api/calculations/{calc_id}", json={"a": 5}, headers=auth_headers)
+
+    def test_delete(self, client, auth_headers, calc_id, query_budget):
+        """Test that a delete, including its delta-sync tombstone, stays within budget"""
+        with query_budget(7):
+            client.delete(f"/api/calculations/{calc_id}", headers=auth_headers)
+
+    def test_legacy_list(self, client, calc_id, query_budget):
+        """Test that the unauthenticated legacy list is a single select"""
+        with query_budget(1):
+            client.get("/calculations/")
+
+    def test_budget_failure_lists_statements(self, client, calc_id, query_budget):
+        """Test that exceeding a budget fails with the offending statements"""
+        with pytest.raises(pytest.fail.Exception) as failure:
+            with query_budget(0):
+                client.get("/calculations/")
+        assert "Query budget exceeded: 1 statements (budget 0)" in str(failure.value)
+        assert "SELECT" in str(failure.value)
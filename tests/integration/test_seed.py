@@ -0,0 +1,69 @@
+"""
+Integration tests for the synthetic data generator (app.seed).
+"""
+import numpy as np
+from sqlalchemy import create_engine, func
+from sqlalchemy.pool import StaticPool
+
+from app import crud, models
+from app.database import Base
+from app.seed import SEED_PASSWORD, calculation_counts, seed
+
+
+class TestSeed:
+    """Tests for seeding users and calculations"""
+
+    def test_seeded_db_fixture(self, seeded_db):
+        """Test that the fixture inserts the advertised number of rows"""
+        assert seeded_db.query(models.User).count() == 20
+        assert seeded_db.query(models.Calculation).count() == 1000
+
+    def test_counts_are_skewed_and_deterministic(self):
+        """Test that a few users hold most rows and the split repeats per seed"""
+        counts = calculation_counts(1000, 100, 1.1, np.random.default_rng(3))
+        again = calculation_counts(1000, 100, 1.1, np.random.default_rng(3))
+        assert counts.sum() == 100000
+        assert (counts == again).all()
+        assert np.sort(counts)[-10:].sum() > counts.sum() / 4
+
+    def test_uniform_when_skew_is_zero(self):
+        """Test that skew=0 spreads rows roughly evenly"""
+        counts = calculation_counts(10, 1000, 0.0, np.random.default_rng(0))
+        assert counts.min() > 800
+
+    def test_same_seed_same_rows(self, db_session):
+        """Test that seeding is reproducible row for row"""
+        engine = db_session.get_bind()
+        seed(engine, users=5, calculations=10, seed=9)
+        first = db_session.query(models.Calculation.a, models.Calculation.type).order_by(models.Calculation.id).all()
+        db_session.query(models.Calculation).delete()
+        db_session.query(models.User).delete()
+        db_session.commit()
+
+        seed(engine, users=5, calculations=10, seed=9)
+        second = db_session.query(models.Calculation.a, models.Calculation.type).order_by(models.Calculation.id).all()
+        assert first == second
+
+    def test_seeded_users_can_log_in(self, seeded_db):
+        """Test that the shared precomputed hash verifies"""
+        user = seeded_db.query(models.User).first()
+        assert crud.authenticate_user(seeded_db, email=user.email, password=SEED_PASSWORD)
+
+    def test_seeded_calculations_are_valid(self, seeded_db):
+        """Test that no Divide row has a zero divisor"""
+        zero_divisors = seeded_db.query(func.count(models.Calculation.id)).filter(
+            models.Calculation.type == "Divide", models.Calculation.b == 0
+        ).scalar()
+        assert zero_divisors == 0
+
+    def test_pooled_connection_keeps_its_durability(self, tmp_path):
+        """Test that the bulk load's synchronous=OFF is undone before the connection is reused"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'seed.db'}", poolclass=StaticPool)
+        Base.metadata.create_all(bind=engine)
+        with engine.connect() as conn:
+            before = conn.exec_driver_sql("PRAGMA synchronous").scalar()
+
+        seed(engine, users=2, calculations=5, seed=1)
+        with engine.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == before
+        engine.dispose()
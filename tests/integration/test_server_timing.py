@@ -0,0 +1,71 @@
+"""
+Integration tests for the Server-Timing header and structured request logs.
+"""
+import json
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import timing
+from app.main import app
+from app.middleware.timing import ServerTimingMiddleware
+
+
+@pytest.fixture
+def timed_client(override_get_db):
+    """The real app wrapped in ServerTimingMiddleware with SQL timing on"""
+    timing.install_sql_timing()
+    return TestClient(ServerTimingMiddleware(app))
+
+
+def _phases(response) -> dict:
+    entries = {}
+    for part in response.headers["Server-Timing"].split(", "):
+        name, _, rest = part.partition(";")
+        entries[name] = rest
+    return entries
+
+
+class TestServerTiming:
+    """Tests for per-phase request timings"""
+
+    def test_authenticated_list_reports_phases(self, timed_client):
+        """Test that auth, user lookup, SQL, serialization and handler are timed"""
+        token = timed_client.post(
+            "/register", json={"email": "timing@example.com", "password": "strongpass123"}
+        ).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        timed_client.post("/api/calculations/", json={"a": 1, "b": 2, "type": "Add"}, headers=headers)
+
+        response = timed_client.get("/api/calculations/", headers=headers)
+        assert response.status_code == 200
+        phases = _phases(response)
+        for name in ("auth", "user", "db", "serialize", "handler", "response", "total"):
+            assert name in phases
+        assert phases["total"].startswith("dur=")
+        assert phases["db"].endswith(f'desc="{response.headers["X-Query-Count"]} queries"')
+
+    def test_legacy_routes_are_timed(self, timed_client):
+        """Test that routes defined in app/main.py get handler and response phases"""
+        timed_client.post("/calculations/", json={"a": 1, "b": 2, "type": "Add"})
+        phases = _phases(timed_client.get("/calculations/"))
+        assert {"handler", "response", "db"} <= phases.keys()
+
+    def test_structured_log_line(self, timed_client, caplog):
+        """Test that one JSON log record is emitted per request"""
+        with caplog.at_level(logging.INFO, logger="app.timing"):
+            timed_client.get("/calculations/")
+        record = json.loads(caplog.records[-1].getMessage())
+        assert record["event"] == "request"
+        assert record["route"] == "/calculations/"
+        assert record["status"] == 200
+        assert "handler" in record["phases"]
+        assert record["queries"] == 1
+
+    def test_phase_is_noop_without_request(self):
+        """Test that phases outside a timed request do nothing"""
+        assert timing.current() is None
+        with timing.phase("anything"):
+            pass
+        assert timing.current() is None
@@ -1,3 +1,7 @@
+import time
+from datetime import timedelta
+
+from app import security
 from app.security import hash_password, verify_password
 
 def test_hash_and_verify_password():
@@ -7,3 +11,13 @@ def test_hash_and_verify_password():
     assert hashed != plain
     assert verify_password(plain, hashed)
     assert not verify_password("wrongpassword", hashed)
+
+
+def test_cached_token_still_expires(monkeypatch):
+    token = security.create_access_token({"sub": "cache@example.com"}, expires_delta=timedelta(minutes=5))
+    assert security.decode_token(token)["sub"] == "cache@example.com"
+    assert token in security._decode_cache
+
+    monkeypatch.setattr(time, "time", lambda: 10**12)
+    assert security.decode_token(token) == {}
+    assert token not in security._decode_cache
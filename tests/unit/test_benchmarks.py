@@ -0,0 +1,39 @@
+from benchmarks import runner
+from benchmarks.suite import BENCHMARKS
+
+
+def _doc(**medians):
+    return {"benchmarks": {name: {"median": value} for name, value in medians.items()}}
+
+
+class TestBenchmarkRunner:
+    """Test suite for the microbenchmark runner and comparison"""
+
+    def test_measure_reports_per_call_statistics(self):
+        """Test that measure returns positive per-call timings"""
+        stats = runner.measure(lambda: sum(range(10)), repeat=3, min_time=0.001)
+        assert stats["repeat"] == 3
+        assert stats["loops"] >= 1
+        assert 0 < stats["min"] <= stats["median"]
+
+    def test_run_suite_filters_by_name(self):
+        """Test that -k style filters select benchmarks by substring"""
+        results = runner.run_suite(BENCHMARKS, only=["factory."], repeat=2, min_time=0.001)
+        assert list(results["benchmarks"]) == ["factory.execute"]
+        assert results["version"] == runner.FORMAT_VERSION
+
+    def test_compare_flags_regressions_over_threshold(self):
+        """Test regression / improvement / ok classification"""
+        rows = runner.compare(
+            _doc(slow=1.0, fast=1.0, same=1.0, gone=1.0),
+            _doc(slow=1.2, fast=0.5, same=1.05, new=1.0),
+            threshold=0.10,
+        )
+        status = {row["name"]: row["status"] for row in rows}
+        assert status == {
+            "slow": "regression",
+            "fast": "improvement",
+            "same": "ok",
+            "gone": "removed",
+            "new": "added",
+        }
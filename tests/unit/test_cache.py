@@ -0,0 +1,106 @@
+import time
+
+import pytest
+
+from app import metrics
+from app.cache import CalculationCache, MemoryBackend, SQLiteBackend
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend_factory(request, tmp_path):
+    """Build either backend with the given ttl / byte cap"""
+    def _make(ttl=60.0, max_bytes=1024):
+        if request.param == "memory":
+            return MemoryBackend(ttl=ttl, max_bytes=max_bytes)
+        return SQLiteBackend(str(tmp_path / "cache.db"), ttl=ttl, max_bytes=max_bytes)
+    return _make
+
+
+class TestCacheBackends:
+    """Tests shared by the memory and SQLite backends"""
+
+    def test_set_and_get(self, backend_factory):
+        backend = backend_factory()
+        backend.set(1, "list:", 3, b"[]")
+        assert backend.get(1, "list:") == (3, b"[]")
+        assert backend.get(2, "list:") is None
+
+    def test_ttl_expiry(self, backend_factory):
+        backend = backend_factory(ttl=0.01)
+        backend.set(1, "list:", 1, b"[]")
+        time.sleep(0.02)
+        assert backend.get(1, "list:") is None
+
+    def test_byte_cap_evicts_least_recently_used(self, backend_factory):
+        backend = backend_factory(max_bytes=20)
+        backend.set(1, "calc:1", 1, b"x" * 8)
+        time.sleep(0.001)
+        backend.set(1, "calc:2", 1, b"x" * 8)
+        time.sleep(0.001)
+        backend.get(1, "calc:1")  # calc:2 is now least recently used
+        time.sleep(0.001)
+        evicted = backend.set(1, "calc:3", 1, b"x" * 8)
+        assert evicted == 1
+        assert backend.get(1, "calc:2") is None
+        assert backend.get(1, "calc:1") is not None
+
+    def test_delete_user_only_drops_that_user(self, backend_factory):
+        backend = backend_factory()
+        backend.set(1, "list:", 1, b"a")
+        backend.set(1, "calc:5", 1, b"b")
+        backend.set(2, "list:", 1, b"c")
+        backend.delete_user(1)
+        assert backend.get(1, "list:") is None
+        assert backend.get(1, "calc:5") is None
+        assert backend.get(2, "list:") == (1, b"c")
+
+
+class TestSQLiteBackend:
+    """Tests for the SQLite backend's running byte total"""
+
+    def test_byte_total_tracks_writes(self, tmp_path):
+        backend = SQLiteBackend(str(tmp_path / "cache.db"), max_bytes=1024)
+        backend.set(1, "calc:1", 1, b"x" * 10)
+        backend.set(1, "calc:1", 2, b"x" * 4)  # replacing an entry swaps its size
+        backend.set(2, "calc:2", 1, b"x" * 6)
+        assert backend._bytes() == 10
+        backend.delete_user(1)
+        assert backend._bytes() == 6
+        backend.clear()
+        assert backend._bytes() == 0
+
+    def test_total_seeded_from_older_cache_file(self, tmp_path):
+        path = str(tmp_path / "cache.db")
+        backend = SQLiteBackend(path)
+        backend.set(1, "list:", 1, b"x" * 7)
+        backend._conn.execute("DROP TABLE calc_cache_meta")
+        assert SQLiteBackend(path)._bytes() == 7
+
+
+class TestCalculationCache:
+    """Tests for version checking and statistics"""
+
+    def test_stale_version_is_a_miss(self):
+        cache = CalculationCache(MemoryBackend())
+        cache.set(1, cache.list_key(), 1, b"[]")
+        assert cache.get(1, cache.list_key(), 2) is None
+        assert cache.get(1, cache.list_key(), 1) == b"[]"
+        assert cache.stats.hits == 1
+        assert cache.stats.misses == 1
+        assert cache.stats.hit_rate == 0.5
+
+    def test_invalidate_counts_and_drops(self):
+        cache = CalculationCache(MemoryBackend())
+        cache.set(1, cache.calc_key(7), 1, b"{}")
+        cache.invalidate(1)
+        cache.invalidate(None)
+        assert cache.get(1, cache.calc_key(7), 1) is None
+        assert cache.stats.invalidations == 1
+
+    def test_evictions_exported(self):
+        before = metrics.CALC_CACHE_EVICTIONS.samples().get((), 0.0)
+        cache = CalculationCache(MemoryBackend(max_bytes=10))
+        cache.set(1, cache.calc_key(1), 1, b"x" * 8)
+        cache.set(1, cache.calc_key(2), 1, b"x" * 8)
+        assert cache.stats.evictions == 1
+        assert metrics.CALC_CACHE_EVICTIONS.samples()[()] == before + 1
@@ -1,4 +1,5 @@
 import pytest
+import numpy as np
 from app.services.factory import CalculationFactory, CalcType
 
 
@@ -51,3 +52,54 @@ class TestCalculationFactory:
         """Parametrized test for all operation types"""
         result = CalculationFactory.execute(op_type, a, b)
         assert result == expected
+
+    def test_get_operation_returns_shared_instance(self):
+        """Test that scalar dispatch reuses one instance per operation type"""
+        assert CalculationFactory.get_operation(CalcType.Add) is CalculationFactory.get_operation("Add")
+
+
+class TestCalculationFactoryBatch:
+    """Test suite for vectorized CalculationFactory.execute_many"""
+
+    def test_execute_many_matches_scalar_execute(self):
+        """Test that every element matches the scalar path"""
+        types = [CalcType.Add, "Sub", CalcType.Multiply, "Divide", CalcType.Add, CalcType.Divide]
+        a = [1.5, 10.0, 3.0, 7.0, -2.0, 1.0]
+        b = [2.0, 4.0, 5.0, 2.0, 2.0, 3.0]
+
+        results = CalculationFactory.execute_many(types, a, b)
+
+        expected = [CalculationFactory.execute(t, x, y) for t, x, y in zip(types, a, b)]
+        assert results.tolist() == expected
+
+    def test_execute_many_divide_by_zero_raises(self):
+        """Test that a zero divisor anywhere raises like the scalar path"""
+        with pytest.raises(ValueError, match="Cannot divide by zero"):
+            CalculationFactory.execute_many(["Divide", "Divide"], [1.0, 2.0], [1.0, 0.0])
+
+    def test_execute_many_divide_by_zero_nan_mode(self):
+        """Test that errors='nan' marks only the failing rows"""
+        results = CalculationFactory.execute_many(
+            ["Divide", "Add", "Divide"], [1.0, 2.0, 3.0], [0.0, 0.0, 3.0], errors="nan"
+        )
+        assert np.isnan(results[0])
+        assert results[1:].tolist() == [2.0, 1.0]
+
+    def test_execute_many_zero_divisor_allowed_for_other_types(self):
+        """Test that b == 0 is only an error for Divide rows"""
+        results = CalculationFactory.execute_many(["Multiply", "Sub"], [4.0, 4.0], [0.0, 0.0])
+        assert results.tolist() == [0.0, 4.0]
+
+    def test_execute_many_invalid_type_raises(self):
+        """Test that unknown types raise ValueError"""
+        with pytest.raises(ValueError, match="Invalid operation type"):
+            CalculationFactory.execute_many(["Add", "Pow"], [1.0, 2.0], [1.0, 2.0])
+
+    def test_execute_many_length_mismatch_raises(self):
+        """Test that misaligned inputs are rejected"""
+        with pytest.raises(ValueError, match="equal length"):
+            CalculationFactory.execute_many(["Add"], [1.0, 2.0], [1.0])
+
+    def test_execute_many_empty(self):
+        """Test that an empty batch returns an empty array"""
+        assert CalculationFactory.execute_many([], [], []).size == 0
@@ -0,0 +1,106 @@
+import gzip
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from app.middleware.compression import CompressionMiddleware, CompressionPolicy
+
+
+class FixedLoadPolicy(CompressionPolicy):
+    """Policy with a pinned load so tests do not depend on the machine"""
+
+    def __init__(self, load: float, **kwargs):
+        super().__init__(**kwargs)
+        self._fixed = load
+
+    def load(self) -> float:
+        return self._fixed
+
+
+BIG_JSON = [{"id": i, "a": 1.0, "b": 2.0, "type": "Add", "result": 3.0} for i in range(200)]
+
+
+async def big_json(request):
+    return JSONResponse(BIG_JSON, headers={"ETag": '"v1"'})
+
+
+async def small_json(request):
+    return JSONResponse({"ok": True})
+
+
+async def png(request):
+    return Response(b"\x89PNG" * 1000, media_type="image/png")
+
+
+async def stream(request):
+    async def chunks():
+        for i in range(5):
+            yield f"chunk-{i}," * 100
+    return StreamingResponse(chunks(), media_type="text/plain")
+
+
+def _client(load=0.0):
+    app = Starlette(routes=[
+        Route("/big", big_json),
+        Route("/small", small_json),
+        Route("/png", png),
+        Route("/stream", stream),
+    ])
+    wrapped = CompressionMiddleware(app, encodings=("gzip",), policy=FixedLoadPolicy(load))
+    return TestClient(wrapped)
+
+
+class TestCompressionMiddleware:
+    """Tests for the adaptive compression middleware"""
+
+    def test_large_json_is_gzipped(self):
+        """Test that large JSON bodies are compressed and ETags weakened"""
+        response = _client().get("/big", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.headers["etag"] == 'W/"v1"'
+        assert response.json() == BIG_JSON
+
+    def test_small_body_is_not_compressed(self):
+        """Test that bodies under the size threshold pass through"""
+        response = _client().get("/small", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+
+    def test_non_compressible_type_passes_through(self):
+        """Test that content types outside the rules are untouched"""
+        response = _client().get("/png", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+
+    def test_no_accept_encoding_passes_through(self):
+        """Test that clients must opt in via Accept-Encoding"""
+        response = _client().get("/big", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+        assert response.headers["etag"] == '"v1"'
+
+    def test_streaming_response_compressed_per_chunk(self):
+        """Test that streamed bodies are compressed into one valid gzip stream"""
+        with _client().stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+            assert response.headers["content-encoding"] == "gzip"
+            raw = b"".join(response.iter_raw())
+        assert gzip.decompress(raw).decode() == "".join(f"chunk-{i}," * 100 for i in range(5))
+
+    def test_overload_skips_compression(self):
+        """Test that compression is switched off above the skip load"""
+        response = _client(load=5.0).get("/big", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+
+
+@pytest.mark.parametrize("load,expected", [
+    (0.0, 6),
+    (0.5, 6),
+    (0.75, 4),
+    (1.0, 1),
+    (1.4, 1),
+    (1.5, None),
+])
+def test_policy_level_adapts_to_load(load, expected):
+    """Test the load to gzip level mapping"""
+    assert FixedLoadPolicy(load).level("gzip") == expected
@@ -0,0 +1,44 @@
+import pytest
+
+from app.services.graph import CycleError, DependencyGraph, FanOutError
+
+
+class TestDependencyGraph:
+    """Test suite for the calculation reference DAG"""
+
+    def test_downstream_order_is_topological(self):
+        """Test that a diamond is ordered so parents come before children"""
+        # 1 -> 2, 1 -> 3, (2, 3) -> 4
+        graph = DependencyGraph([(2, 1, None), (3, None, 1), (4, 2, 3)])
+        order = graph.downstream_order(1)
+        assert order.index(4) > order.index(2)
+        assert order.index(4) > order.index(3)
+        assert set(order) == {2, 3, 4}
+
+    def test_only_affected_nodes_are_returned(self):
+        """Test that unrelated branches are not recomputed"""
+        graph = DependencyGraph([(2, 1, None), (4, 3, None)])
+        assert graph.downstream_order(1) == [2]
+        assert graph.downstream_order(4) == []
+
+    def test_check_parents_detects_cycle(self):
+        """Test that referencing a descendant (or itself) is rejected"""
+        graph = DependencyGraph([(2, 1, None), (3, 2, None)])
+        with pytest.raises(CycleError):
+            graph.check_parents(1, {3})
+        with pytest.raises(CycleError):
+            graph.check_parents(2, {2})
+        graph.check_parents(3, {1})  # a second path is fine
+
+    def test_fan_out_cap(self):
+        """Test that updates touching too many nodes are refused"""
+        graph = DependencyGraph([(i, 1, None) for i in range(2, 10)])
+        with pytest.raises(FanOutError):
+            graph.downstream_order(1, max_nodes=5)
+
+    def test_set_parents_replaces_edges(self):
+        """Test that re-pointing a node drops its old edge"""
+        graph = DependencyGraph([(3, 1, None)])
+        graph.set_parents(3, {2})
+        assert graph.downstream_order(1) == []
+        assert graph.downstream_order(2) == [3]
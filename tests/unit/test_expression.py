@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from app.services.expression import cache_info, compile_expression, evaluate_expression
+
+
+class TestExpressionEvaluation:
+    """Test suite for compiled Expression formulas"""
+
+    @pytest.mark.parametrize("formula,expected", [
+        ("a + b", 7.0),
+        ("a * b - 1", 9.0),
+        ("(a + b) / 2", 3.5),
+        ("a ** 2 + b ** 2", 29.0),
+        ("-a + +b", -3.0),
+        ("sqrt(a * 5) + abs(-b)", 7.0),
+        ("max(a, b) + min(a, b)", 7.0),
+        ("a % b", 1.0),
+    ])
+    def test_scalar_evaluation(self, formula, expected):
+        """Test scalar evaluation with a=5, b=2"""
+        assert evaluate_expression(formula, a=5.0, b=2.0) == pytest.approx(expected)
+
+    def test_array_bindings(self):
+        """Test that NumPy bindings evaluate the whole batch at once"""
+        a = np.array([1.0, 2.0, 3.0])
+        b = np.array([4.0, 5.0, 6.0])
+        result = compile_expression("a * b + 1").evaluate(a=a, b=b)
+        assert result.tolist() == [5.0, 11.0, 19.0]
+
+    def test_scalar_divide_by_zero_raises(self):
+        """Test that scalar division by zero matches the Divide operation"""
+        with pytest.raises(ValueError, match="Cannot divide by zero"):
+            evaluate_expression("a / b", a=1.0, b=0.0)
+
+    def test_array_divide_by_zero_is_per_element(self):
+        """Test that arrays yield inf per element instead of raising"""
+        result = evaluate_expression("a / b", a=np.array([1.0, 1.0]), b=np.array([0.0, 2.0]))
+        assert np.isinf(result[0]) and result[1] == 0.5
+
+    def test_non_finite_scalar_raises(self):
+        """Test that domain errors surface as ValueError"""
+        with pytest.raises(ValueError, match="not a finite number"):
+            evaluate_expression("sqrt(a)", a=-1.0, b=0.0)
+
+
+class TestExpressionSafety:
+    """Test that only whitelisted syntax compiles"""
+
+    @pytest.mark.parametrize("formula", [
+        "__import__('os').system('true')",
+        "a.__class__",
+        "[a, b]",
+        "a if b else 1",
+        "c + 1",
+        "open('x')",
+        "'text'",
+        "lambda: 1",
+        "a +",
+        "",
+    ])
+    def test_rejects_unsafe_or_invalid(self, formula):
+        with pytest.raises(ValueError):
+            compile_expression(formula)
+
+    def test_rejects_too_long(self):
+        with pytest.raises(ValueError, match="too long"):
+            compile_expression("a + " * 200 + "b")
+
+
+class TestExpressionCache:
+    """Test the compilation cache"""
+
+    def test_normalized_formulas_share_cache_entry(self):
+        first = compile_expression("a  *  b + 3")
+        hits = cache_info().hits
+        second = compile_expression(" a * b   + 3 ")
+        assert second is first
+        assert cache_info().hits == hits + 1
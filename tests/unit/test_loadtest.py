@@ -0,0 +1,54 @@
+import asyncio
+
+from loadtest import harness
+from loadtest.stats import Recorder, percentile
+
+
+async def _fake_journey(client, recorder, rng, user_no, run_id):
+    await asyncio.sleep(0.001)
+    recorder.record("GET /fake", 200 if user_no % 10 else 500, rng.uniform(0.001, 0.002))
+
+
+class TestLoadTestStats:
+    """Test suite for load-test latency statistics"""
+
+    def test_percentile_nearest_rank(self):
+        """Test nearest-rank percentiles over 1..100"""
+        values = [float(i) for i in range(1, 101)]
+        assert percentile(values, 50) == 50.0
+        assert percentile(values, 95) == 95.0
+        assert percentile(values, 99) == 99.0
+        assert percentile([7.0], 99) == 7.0
+
+    def test_summary_counts_errors_per_route(self):
+        """Test that 4xx/5xx and transport failures count as errors"""
+        recorder = Recorder()
+        recorder.record("GET /a", 200, 0.010)
+        recorder.record("GET /a", 503, 0.020)
+        recorder.record("POST /b", 0, 0.030)
+        summary = recorder.summary(elapsed=2.0)
+        assert summary["routes"]["GET /a"]["requests"] == 2
+        assert summary["routes"]["GET /a"]["errors"] == 1
+        assert summary["routes"]["GET /a"]["statuses"] == {"200": 1, "503": 1}
+        assert summary["total"]["errors"] == 2
+        assert summary["total"]["throughput_rps"] == 1.5
+
+
+class TestLoadShapes:
+    """Test suite for closed- and open-loop load generation"""
+
+    def test_closed_loop_runs_every_virtual_user(self):
+        """Test that journeys run until the deadline on each virtual user"""
+        recorder = Recorder()
+        asyncio.run(harness.closed_loop(None, _fake_journey, recorder, concurrency=3, duration=0.05, seed=1, run_id="t"))
+        assert len(recorder.latencies["GET /fake"]) >= 3
+
+    def test_open_loop_is_reproducible(self):
+        """Test that the same seed produces the same number of arrivals"""
+        counts = []
+        for _ in range(2):
+            recorder = Recorder()
+            dropped = asyncio.run(harness.open_loop(None, _fake_journey, recorder, rate=200, duration=0.1, seed=7,
+                                                    run_id="t", max_in_flight=1000))
+            counts.append(len(recorder.latencies["GET /fake"]) + dropped)
+        assert counts[0] == counts[1] > 0
@@ -0,0 +1,86 @@
+import json
+import os
+
+import pytest
+
+from app import metrics
+from app.metrics import Counter, Gauge, Histogram, Registry
+
+
+@pytest.fixture
+def registry():
+    return Registry()
+
+
+class TestMetrics:
+    """Test suite for the dependency-free Prometheus metrics"""
+
+    def test_counter_and_gauge_render(self, registry):
+        """Test the text exposition of labelled counters and gauges"""
+        requests = Counter("requests_total", "Requests", ("route",), registry=registry)
+        in_flight = Gauge("in_flight", "In flight", registry=registry)
+        requests.inc("/a")
+        requests.inc("/a", amount=2)
+        in_flight.inc()
+        in_flight.dec()
+
+        text = metrics.render(registry.snapshot())
+        assert "# TYPE requests_total counter" in text
+        assert 'requests_total{route="/a"} 3.0' in text
+        assert "in_flight 0.0" in text
+
+    def test_histogram_buckets_are_cumulative(self, registry):
+        """Test bucket placement, +Inf, sum and count"""
+        latency = Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0), registry=registry)
+        for value in (0.05, 0.5, 5.0):
+            latency.observe(value)
+
+        text = metrics.render(registry.snapshot())
+        assert 'latency_seconds_bucket{le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{le="1.0"} 2' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+        assert "latency_seconds_sum 5.55" in text
+        assert "latency_seconds_count 3" in text
+
+    def test_label_values_are_escaped(self, registry):
+        counter = Counter("odd_total", "Odd labels", ("path",), registry=registry)
+        counter.inc('a"b\\c')
+        assert 'odd_total{path="a\\"b\\\\c"} 1.0' in metrics.render(registry.snapshot())
+
+    def test_duplicate_registration_rejected(self, registry):
+        Counter("dup_total", "Dup", registry=registry)
+        with pytest.raises(ValueError):
+            Counter("dup_total", "Dup", registry=registry)
+
+
+class TestMultiprocessMetrics:
+    """Test suite for file-backed aggregation across worker processes"""
+
+    def test_merge_sums_counters_and_drops_dead_gauges(self, registry):
+        """Test that counters from exited workers count but their gauges don't"""
+        counter = Counter("hits_total", "Hits", registry=registry)
+        gauge = Gauge("busy", "Busy", registry=registry)
+        histogram = Histogram("h", "H", buckets=(1.0,), registry=registry)
+        counter.inc(amount=2)
+        gauge.set(3)
+        histogram.observe(0.5)
+        snapshot = registry.snapshot()
+
+        merged = metrics.merge_snapshots([(True, snapshot), (False, snapshot)])
+        samples = {name: metric["samples"] for name, metric in merged.items()}
+        assert samples["hits_total"] == [[[], 4.0]]
+        assert samples["busy"] == [[[], 3.0]]
+        assert samples["h"] == [[[], [[2, 0], 1.0, 2]]]
+
+    def test_collect_reads_every_snapshot_file(self, registry, tmp_path):
+        """Test that a scrape includes other workers' snapshot files"""
+        counter = Counter("jobs_total", "Jobs", registry=registry)
+        counter.inc()
+        # Another (exited) worker's snapshot, written earlier
+        other = Registry()
+        Counter("jobs_total", "Jobs", registry=other).inc(amount=5)
+        (tmp_path / "metrics-999999999.json").write_text(json.dumps(other.snapshot()))
+
+        merged = metrics.collect(registry, str(tmp_path))
+        assert merged["jobs_total"]["samples"] == [[[], 6.0]]
+        assert (tmp_path / f"metrics-{os.getpid()}.json").exists()
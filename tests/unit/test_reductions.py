@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from app.schemas import CalcType, CalculationCreate
+from app.services.reductions import pack_operands, reduce_operands, unpack_operands
+
+
+class TestReductions:
+    """Test suite for array-valued calculations"""
+
+    @pytest.mark.parametrize(
+        "calc_type,expected",
+        [
+            (CalcType.Sum, 10.0),
+            (CalcType.Product, 24.0),
+            (CalcType.Mean, 2.5),
+            (CalcType.Min, 1.0),
+            (CalcType.Max, 4.0),
+        ],
+    )
+    def test_reductions(self, calc_type, expected):
+        """Test each reduction over a small array"""
+        assert reduce_operands(calc_type, np.array([1.0, 2.0, 3.0, 4.0])) == expected
+
+    def test_pack_round_trip(self):
+        """Test that the blob is 8 bytes per operand and unpacks unchanged"""
+        values = [0.5, -1.25, 1e300]
+        blob = pack_operands(values)
+        assert len(blob) == 8 * len(values)
+        assert unpack_operands(blob).tolist() == values
+
+    def test_empty_and_overflow_rejected(self):
+        """Test that empty arrays and non-finite results raise ValueError"""
+        with pytest.raises(ValueError):
+            reduce_operands(CalcType.Sum, np.array([]))
+        with pytest.raises(ValueError):
+            reduce_operands(CalcType.Product, np.array([1e200, 1e200]))
+
+    def test_schema_requires_operands_only_for_array_types(self):
+        """Test that operands and a/b are mutually exclusive by type"""
+        assert CalculationCreate(type="Sum", operands=[1, 2]).operands == [1.0, 2.0]
+        with pytest.raises(ValueError):
+            CalculationCreate(type="Sum")
+        with pytest.raises(ValueError):
+            CalculationCreate(type="Sum", operands=[1], a=1)
+        with pytest.raises(ValueError):
+            CalculationCreate(type="Add", a=1, b=2, operands=[1])
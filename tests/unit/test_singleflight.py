@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+from app.singleflight import SingleFlight, SingleFlightTimeout
+
+
+def _run_concurrently(group: SingleFlight, key, fn, callers: int, timeout: float | None = None):
+    """Start `callers` threads calling group.do and return their results or exceptions"""
+    results: list = [None] * callers
+
+    def call(index):
+        try:
+            results[index] = group.do(key, fn, timeout)
+        except Exception as exc:
+            results[index] = exc
+
+    threads = [threading.Thread(target=call, args=(index,)) for index in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+class TestSingleFlight:
+    """Test suite for single-flight coalescing"""
+
+    def test_concurrent_callers_share_one_computation(self):
+        group = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return b"body"
+
+        threads, results = _run_concurrently(group, "key", compute, callers=8)
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert results == [b"body"] * 8
+        assert group.in_flight() == 0
+
+    def test_error_propagates_to_every_waiter(self):
+        group = SingleFlight()
+        release = threading.Event()
+
+        def compute():
+            release.wait(5)
+            raise ValueError("boom")
+
+        threads, results = _run_concurrently(group, "key", compute, callers=4)
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join()
+        assert all(isinstance(result, ValueError) for result in results)
+
+    def test_waiter_times_out(self):
+        group = SingleFlight()
+        release = threading.Event()
+
+        def compute():
+            release.wait(5)
+            return 1
+
+        leader, _ = _run_concurrently(group, "key", compute, callers=1)
+        time.sleep(0.02)
+        with pytest.raises(SingleFlightTimeout):
+            group.do("key", compute, timeout=0.02)
+        release.set()
+        leader[0].join()
+
+    def test_distinct_keys_and_later_calls_recompute(self):
+        """Test that results are not kept once a call finishes"""
+        group = SingleFlight()
+        counter = iter(range(10))
+        assert group.do("a", lambda: next(counter)) == 0
+        assert group.do("b", lambda: next(counter)) == 1
+        assert group.do("a", lambda: next(counter)) == 2
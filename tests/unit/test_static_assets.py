@@ -0,0 +1,116 @@
+import gzip
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.routing import Mount
+
+from app.static_assets import StaticAssets, build, choose_encoding
+
+
+@pytest.fixture
+def asset_dirs(tmp_path):
+    """A source directory with one compressible page and an empty build directory"""
+    source = tmp_path / "static"
+    source.mkdir()
+    (source / "page.html").write_text("<html>" + "hello " * 200 + "</html>")
+    return source, tmp_path / "build"
+
+
+def _client(asset_app):
+    return TestClient(Starlette(routes=[Mount("/static", app=asset_app)]))
+
+
+class TestStaticAssetBuild:
+    """Tests for the precompress build step"""
+
+    def test_build_writes_compressed_variants(self, asset_dirs):
+        """Test that build writes a gzip variant next to each file's name"""
+        source, build_dir = asset_dirs
+        built = build(str(source), str(build_dir))
+
+        assert "gzip" in built["page.html"]
+        assert gzip.decompress((build_dir / "page.html.gz").read_bytes()) == (source / "page.html").read_bytes()
+
+    def test_stale_build_output_is_ignored(self, asset_dirs):
+        """Test that variants built from older content are never served"""
+        source, build_dir = asset_dirs
+        build(str(source), str(build_dir))
+        (source / "page.html").write_text("<html>" + "changed " * 200 + "</html>")
+        client = _client(StaticAssets(str(source), str(build_dir)))
+
+        response = client.get("/static/page.html", headers={"Accept-Encoding": "gzip"})
+        assert response.text.startswith("<html>changed")
+
+
+class TestStaticAssetServing:
+    """Tests for the in-memory static handler"""
+
+    def test_serves_gzip_when_accepted(self, asset_dirs):
+        """Test Accept-Encoding negotiation picks the compressed body"""
+        source, build_dir = asset_dirs
+        build(str(source), str(build_dir))
+        client = _client(StaticAssets(str(source), str(build_dir)))
+
+        response = client.get("/static/page.html", headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.text.startswith("<html>hello")
+
+    def test_identity_without_accept_encoding(self, asset_dirs):
+        """Test that clients without Accept-Encoding get the raw bytes"""
+        source, build_dir = asset_dirs
+        client = _client(StaticAssets(str(source), str(build_dir)))
+
+        response = client.get("/static/page.html", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+        assert response.headers["content-type"] == "text/html; charset=utf-8"
+
+    def test_responses_are_revalidated(self, asset_dirs):
+        """Test that assets are cached but revalidated through the ETag"""
+        source, build_dir = asset_dirs
+        client = _client(StaticAssets(str(source), str(build_dir)))
+        assert client.get("/static/page.html").headers["cache-control"] == "public, no-cache"
+
+    def test_if_none_match_returns_304(self, asset_dirs):
+        """Test conditional requests against the content hash ETag"""
+        source, build_dir = asset_dirs
+        client = _client(StaticAssets(str(source), str(build_dir)))
+
+        etag = client.get("/static/page.html").headers["etag"]
+        response = client.get("/static/page.html", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert "content-length" not in response.headers
+
+    def test_each_encoding_has_its_own_etag(self, asset_dirs):
+        """Test that identity and gzip bodies never share a strong validator"""
+        source, build_dir = asset_dirs
+        client = _client(StaticAssets(str(source), str(build_dir)))
+
+        identity = client.get("/static/page.html", headers={"Accept-Encoding": "identity"}).headers["etag"]
+        gzipped = client.get("/static/page.html", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+        assert identity != gzipped
+        assert gzipped == identity[:-1] + '-gz"'
+        # A gzip validator doesn't match the identity representation
+        response = client.get("/static/page.html", headers={"Accept-Encoding": "identity", "If-None-Match": gzipped})
+        assert response.status_code == 200
+
+    def test_missing_file_returns_404(self, asset_dirs):
+        """Test unknown paths return 404"""
+        source, build_dir = asset_dirs
+        client = _client(StaticAssets(str(source), str(build_dir)))
+        assert client.get("/static/nope.html").status_code == 404
+
+
+@pytest.mark.parametrize("header,expected", [
+    (None, "identity"),
+    ("gzip, deflate", "gzip"),
+    ("gzip;q=0, br", "br"),
+    ("br;q=0, gzip;q=0.5", "gzip"),
+    ("*", "br"),
+    ("deflate", "identity"),
+])
+def test_choose_encoding(header, expected):
+    """Test Accept-Encoding parsing with q-values and wildcards"""
+    assert choose_encoding(header, {"identity", "gzip", "br"}) == expected